@@ -9,8 +9,9 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # IMPORTS
 import data.HIF_load as hif_load
-from data.data_load import _get_snowflake_conn
+from data.data_load import _get_snowflake_conn, invalider_cache
 from data.users import get_users
+from utils.assets import forvarm_assets
 
 # --- 1. KONFIGURATION & BRANDING ---
 HIF_LOGO_URL = "https://cdn5.wyscout.com/photos/team/public/2659_120x120.png"
@@ -178,9 +179,12 @@ with st.sidebar:
     st.markdown('<hr class="custom-hr">', unsafe_allow_html=True)
     if st.button("Ryd cache", use_container_width=True):
         st.cache_data.clear()
+        invalider_cache()
         st.rerun()
 
 # --- 4. DATA LOADING & RENDERING ---
+# Logoer og truppens billeder hentes parallelt i baggrunden (kun første gang pr. proces)
+forvarm_assets()
 render_hif_header(f"{st.session_state['main_menu_selection']}  |  {st.session_state['sub_menu_selection'].upper()}")
 
 try:
@@ -10,8 +10,9 @@ from data.utils.team_mapping import (
     COMPETITION_NAME as DEFAULT_COMP,
     TOURNAMENTCALENDAR_NAME as DEFAULT_SEASON
 )
-from data.data_load import _get_snowflake_conn
+from data.data_load import _get_snowflake_conn, hent_kolonner
 from data.utils.stattype_map import STAT_TYPE_MAP
+from utils.assets import get_base64_image
 
 def apply_custom_style():
     st.markdown("""
@@ -282,12 +283,18 @@ def beregn_stilling(df_matches, valgt_saeson, valgt_turnering):
     df_standings.index = df_standings.index + 1
     return df_standings
 
+# Kolonner fra OPTA_MATCHINFO som forsiden bruger (næste modstander + stilling)
+KAMP_KOLONNER = [
+    'MATCH_OPTAUUID', 'MATCH_DATE_FULL', 'MATCH_LOCALTIME', 'MATCH_TIME', 'VENUE_LONGNAME', 'WEEK', 'MATCH_STATUS',
+    'CONTESTANTHOME_OPTAUUID', 'CONTESTANTHOME_NAME', 'CONTESTANTAWAY_OPTAUUID', 'CONTESTANTAWAY_NAME',
+    'TOTAL_HOME_SCORE', 'TOTAL_AWAY_SCORE',
+]
+
 def vis_side():
     apply_custom_style()
     conn = _get_snowflake_conn()
     if not conn: return
     
-    DB = "KLUB_HVIDOVREIF.AXIS"
     HIF_UUID = TEAMS.get("Hvidovre", {}).get("opta_uuid", "8gxd9ry2580pu1b1dd5ny9ymy").upper()
     
     active_season = DEFAULT_SEASON
@@ -297,8 +304,7 @@ def vis_side():
     # 1. Hent kampprogram
     df_matches = pd.DataFrame()
     if calendar_uuid:
-        df_matches = conn.query(f"SELECT * FROM {DB}.OPTA_MATCHINFO WHERE TOURNAMENTCALENDAR_OPTAUUID = '{calendar_uuid}'")
-        df_matches.columns = [str(c).upper() for c in df_matches.columns]
+        df_matches = hent_kolonner(conn, "OPTA_MATCHINFO", KAMP_KOLONNER, f"TOURNAMENTCALENDAR_OPTAUUID = '{calendar_uuid}'")
         if 'MATCH_DATE_FULL' in df_matches.columns:
             df_matches['MATCH_DATE_FULL'] = pd.to_datetime(df_matches['MATCH_DATE_FULL'], errors='coerce').dt.tz_localize(None)
 
@@ -351,8 +357,8 @@ def vis_side():
                 
                 hif_stats = beregn_hold_stats(df_stats, HIF_UUID)
                 opp_stats = beregn_hold_stats(df_stats, opp_id)
-                hif_logo = TEAMS.get("Hvidovre", {}).get("logo", "")
-                opp_logo = TEAMS.get(opp_name, {}).get("logo", "")
+                hif_logo = get_base64_image(TEAMS.get("Hvidovre", {}).get("logo", ""))
+                opp_logo = get_base64_image(TEAMS.get(opp_name, {}).get("logo", ""))
                 
                 stats_html = f"""
                 <table class='stats-table' style='width: 100%; margin-top: 4px;'>
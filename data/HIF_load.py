@@ -3,6 +3,7 @@ import pandas as pd
 import os
 from data.data_load import _get_snowflake_conn, load_local_players
 from data.sql.wy_queries import get_wy_queries
+from data.sql.registry import koer_query, sql_in_liste
 
 @st.cache_data(ttl=600)
 def get_squad_only():
@@ -24,7 +25,6 @@ def get_scouting_package():
         st.error("Kunne ikke oprette forbindelse til Snowflake.")
         return {}
         
-    DB = "KLUB_HVIDOVREIF.AXIS"
     queries = get_wy_queries("", "")
 
     # 1. Hent grundlæggende data (Lokale filer)
@@ -53,10 +53,11 @@ def get_scouting_package():
 
         # B. HENT SPECIFIK DATA (Hvis IDs findes)
         if all_relevant_ids:
-            id_str = f"({all_relevant_ids[0]})" if len(all_relevant_ids) == 1 else str(tuple(all_relevant_ids))
+            # Sorteret og uden dubletter, så samme spillere altid giver samme query-tekst
+            id_str = sql_in_liste(all_relevant_ids, tal=True)
             
             # Profilbilleder
-            df_sql_p = conn.query(f"SELECT PLAYER_WYID, IMAGEDATAURL FROM {DB}.WYSCOUT_PLAYERS WHERE PLAYER_WYID IN {id_str}")
+            df_sql_p = koer_query(conn, "wyscout_spillerbilleder", player_ids=all_relevant_ids)
             
             # Karriere
             career_q = queries["player_career"]
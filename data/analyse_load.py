@@ -1,9 +1,159 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import streamlit as st
-from data.data_load import _get_snowflake_conn, load_local_players
-from data.sql.opta_queries import get_opta_queries
+from data.data_load import _get_snowflake_conn, load_local_players, POOL_STOERRELSE
+from data.sql.opta_queries import get_opta_queries, HIF_UUID
+from data.utils.event_kaeder import EventKaede
+from data.utils.sekvens_vinduer import TidsIndeks, MAAL
 from data.utils.team_mapping import COMPETITION_NAME, TOURNAMENTCALENDAR_NAME, TEAM_COLORS
 
+# Aldrig flere samtidige queries end poolen har forbindelser
+MAX_PARALLELLE_QUERIES = min(6, POOL_STOERRELSE)
+SKUD_TYPER = [13, 14, 15, 16]
+SEKVENS_SEKUNDER = 20
+SEKVENS_KOLONNER = [
+    "MATCH_OPTAUUID", "SEQUENCEID", "EVENT_TIMESTAMP", "EVENT_TIMEMIN", "PLAYER_NAME", "EVENT_TYPEID",
+    "EVENT_CONTESTANT_OPTAUUID", "RAW_X", "RAW_Y", "QUALIFIER_LIST",
+    "HOME_TEAM", "AWAY_TEAM", "HOME_SCORE", "AWAY_SCORE",
+]
+ASSIST_NOEGLER = [
+    "ASSIST_PLAYER", "GOAL_SCORER", "PASS_START_X", "PASS_START_Y", "SHOT_X", "SHOT_Y",
+    "NEXT_EVENT_TYPE", "EVENT_OUTCOME", "EVENT_TYPEID", "EVENT_TIMESTAMP",
+]
+
+
+def hent_queries_parallelt(conn, queries, keys, max_workers=MAX_PARALLELLE_QUERIES):
+    """
+    Kører uafhængige queries samtidigt på en begrænset trådpulje.
+    Fejl i én query giver en tom DataFrame for netop den nøgle - de andre påvirkes ikke.
+    Returnerer (resultater, timings, fejl), alle dicts nøglet på query-navnet.
+    """
+    def koer(query_key):
+        start = time.perf_counter()
+        q = queries.get(query_key)
+        if not q:
+            return query_key, pd.DataFrame(), 0.0, None
+        try:
+            # Værdien er enten ren SQL eller (sql, params) fra registret
+            sql, params = q if isinstance(q, tuple) else (q, None)
+            res = conn.query(sql, params=params) if params else conn.query(sql)
+            df = pd.DataFrame(res) if not isinstance(res, pd.DataFrame) else res
+            df.columns = [c.upper() for c in df.columns]
+            return query_key, df, time.perf_counter() - start, None
+        except Exception as e:
+            return query_key, pd.DataFrame(), time.perf_counter() - start, e
+
+    resultater, timings, fejl = {}, {}, {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(keys)))) as pool:
+        for query_key, df, varighed, e in pool.map(koer, keys):
+            resultater[query_key] = df
+            timings[query_key] = round(varighed, 3)
+            if e is not None:
+                fejl[query_key] = e
+    return resultater, timings, fejl
+
+
+def byg_assists(df_events):
+    """
+    Assists og chanceskabelse ud fra HIF's events (opta_assist_events).
+    Næste HIF-event i kampen findes med kæde-motoren i stedet for LEAD i Snowflake;
+    resultatet har samme kolonner og rækker som den tidligere opta_assists-query:
+    vellykkede pasninger, der er hjørnespark eller efterfølges af et skud.
+    """
+    if df_events is None or df_events.empty:
+        return pd.DataFrame(columns=ASSIST_NOEGLER + ["IS_CORNER", "IS_CROSS", "IS_PROGRESSIVE"])
+
+    kaede = EventKaede(df_events, partition=["MATCH_OPTAUUID"], orden=["EVENT_TIMESTAMP", "EVENT_EVENTID"])
+    df = kaede.df.assign(
+        NEXT_EVENT_TYPE=kaede.naeste("EVENT_TYPEID"),
+        SHOT_X=kaede.naeste("EVENT_X"),
+        SHOT_Y=kaede.naeste("EVENT_Y"),
+        GOAL_SCORER=kaede.naeste("PLAYER_NAME"),
+    )
+    df = df[(df["EVENT_OUTCOME"] == 1) & (df["EVENT_TYPEID"] == 1)].rename(columns={
+        "PLAYER_NAME": "ASSIST_PLAYER", "EVENT_X": "PASS_START_X", "EVENT_Y": "PASS_START_Y",
+    })
+    df["IS_PROGRESSIVE"] = (df["SHOT_X"] > df["PASS_START_X"] + 25).astype(int)
+
+    df = (
+        df.groupby(ASSIST_NOEGLER, dropna=False, sort=False)[["IS_CORNER", "IS_CROSS", "IS_PROGRESSIVE"]]
+        .max()
+        .reset_index()
+    )
+    df = df[(df["IS_CORNER"] == 1) | df["NEXT_EVENT_TYPE"].isin(SKUD_TYPER)]
+    return df.sort_values("EVENT_TIMESTAMP", ascending=False, kind="mergesort").reset_index(drop=True)
+
+
+def byg_fremadrettede_pasninger(df_events):
+    """
+    Fremadrettede pasninger pr. (kamp, hold) ud fra opta_events: vellykkede pasninger,
+    hvor holdets næste pasning i kampen starter mere end 10 længere fremme. Svarer til
+    den tidligere LEAD(EVENT_X) OVER (PARTITION BY kamp, hold) i opta_team_stats.
+    """
+    kolonner = ["MATCH_OPTAUUID", "EVENT_CONTESTANT_OPTAUUID", "FORWARD_PASSES"]
+    if df_events is None or df_events.empty:
+        return pd.DataFrame(columns=kolonner)
+
+    pasninger = df_events[df_events["EVENT_TYPEID"] == 1]
+    kaede = EventKaede(
+        pasninger,
+        partition=["MATCH_OPTAUUID", "EVENT_CONTESTANT_OPTAUUID"],
+        orden=["EVENT_TIMESTAMP", "EVENT_EVENTID"],
+    )
+    df = kaede.df.assign(
+        FORWARD_PASSES=(kaede.df["EVENT_OUTCOME"] == 1) & (kaede.naeste("LOCATIONX") > kaede.df["LOCATIONX"] + 10),
+    )
+    return (
+        df.groupby(["MATCH_OPTAUUID", "EVENT_CONTESTANT_OPTAUUID"], sort=False)["FORWARD_PASSES"]
+        .sum()
+        .reset_index()
+    )
+
+
+def _tilfoej_fremadrettede(df_stats, df_fremad):
+    """HOME/AWAY_FORWARD_PASSES på opta_team_stats, som de tidligere LEFT JOINs gav dem."""
+    if df_stats is None or df_stats.empty:
+        return df_stats
+    df = df_stats
+    for side, efter in (("HOME", "HOME_FORMATION"), ("AWAY", "AWAY_FORMATION")):
+        fremad = df_fremad.rename(columns={
+            "EVENT_CONTESTANT_OPTAUUID": f"CONTESTANT{side}_OPTAUUID", "FORWARD_PASSES": f"{side}_FORWARD_PASSES",
+        })
+        df = df.merge(fremad, on=["MATCH_OPTAUUID", f"CONTESTANT{side}_OPTAUUID"], how="left")
+        if efter in df.columns:
+            kolonne = df.pop(f"{side}_FORWARD_PASSES")
+            df.insert(df.columns.get_loc(efter) + 1, kolonne.name, kolonne)
+    return df
+
+
+def byg_sekvens_map(df_events, df_matches, sekunder=SEKVENS_SEKUNDER, hold=None):
+    """
+    Alle events i de `sekunder` før hvert mål (kun `hold`'s mål, hvis angivet).
+    df_events er opta_sequence_events; vinduerne skæres ud lokalt, så en anden
+    længde ikke kræver en ny query. SEQUENCEID er målets EVENT_EVENTID.
+    """
+    if df_events is None or df_events.empty:
+        return pd.DataFrame(columns=SEKVENS_KOLONNER)
+
+    indeks = TidsIndeks(df_events)
+    df = indeks.vinduer(
+        indeks.udloesere(MAAL, hold=hold),
+        sekunder=sekunder,
+        udloeser_kolonner={"SEQUENCEID": "EVENT_EVENTID"},
+    )
+    if df_matches is not None and not df_matches.empty:
+        kampe = df_matches[[
+            "MATCH_OPTAUUID", "CONTESTANTHOME_NAME", "CONTESTANTAWAY_NAME", "TOTAL_HOME_SCORE", "TOTAL_AWAY_SCORE",
+        ]].drop_duplicates("MATCH_OPTAUUID").rename(columns={
+            "CONTESTANTHOME_NAME": "HOME_TEAM", "CONTESTANTAWAY_NAME": "AWAY_TEAM",
+            "TOTAL_HOME_SCORE": "HOME_SCORE", "TOTAL_AWAY_SCORE": "AWAY_SCORE",
+        })
+        df = df.merge(kampe, on="MATCH_OPTAUUID", how="left")
+    df = df.reindex(columns=SEKVENS_KOLONNER)
+    return df.sort_values("EVENT_TIMESTAMP", kind="mergesort").reset_index(drop=True)
+
+
 @st.cache_data(ttl=600)
 def get_analysis_package(hif_only=False, match_uuid=None):
     """
@@ -17,37 +167,34 @@ def get_analysis_package(hif_only=False, match_uuid=None):
     # 1. Opsætning af filtre og queries
     comp_f = str(COMPETITION_NAME)
     season_f = str(TOURNAMENTCALENDAR_NAME)
-    queries = get_opta_queries(liga_f=comp_f, saeson_f=season_f, hif_only=hif_only)
+    queries = get_opta_queries(liga_f=comp_f, saeson_f=season_f, hif_only=hif_only, match_uuid=match_uuid)
     
-    def safe_query(query_key):
-        q = queries.get(query_key)
-        if not q:
-            return pd.DataFrame()
-        try:
-            res = conn.query(q)
-            df = pd.DataFrame(res) if not isinstance(res, pd.DataFrame) else res
-            df.columns = [c.upper() for c in df.columns]
-            return df
-        except Exception as e:
-            st.error(f"Fejl i Snowflake query '{query_key}': {e}")
-            return pd.DataFrame()
-
-    # 2. Hent kerne-data (Fjernet linebreaks og shapes herfra)
-    df_matches = safe_query("opta_matches")
-    df_opta_stats = safe_query("opta_team_stats")
-    df_sequence = safe_query("opta_sequence_map")
-    df_shots = safe_query("opta_shotevents")
-    df_league_shots = safe_query("opta_league_shotevents")
-    df_assists = safe_query("opta_assists")
-    df_xg_agg = safe_query("opta_expected_goals")
-    df_all_events = safe_query("opta_events") 
-
-    # 3. Fysisk data (håndterer match_uuid filter)
-    df_fys = safe_query("opta_physical_stats")
-    if match_uuid and not df_fys.empty:
-        clean_uuid = str(match_uuid).strip().replace('g', '')
-        if 'MATCH_OPTAUUID' in df_fys.columns:
-            df_fys = df_fys[df_fys['MATCH_OPTAUUID'].str.contains(clean_uuid, na=False, case=False)]
+    # 2. Hent kerne-data parallelt (Fjernet linebreaks og shapes herfra)
+    keys = [
+        "opta_matches", "opta_team_stats", "opta_sequence_events", "opta_shotevents",
+        "opta_league_shotevents", "opta_assist_events", "opta_expected_goals", "opta_events",
+        "opta_physical_stats",
+    ]
+    start = time.perf_counter()
+    res, timings, fejl = hent_queries_parallelt(conn, queries, keys)
+    timings["total"] = round(time.perf_counter() - start, 3)
+
+    # st.error må kun kaldes fra script-tråden, derfor rapporteres fejl først her
+    for query_key, e in fejl.items():
+        st.error(f"Fejl i Snowflake query '{query_key}': {e}")
+
+    df_matches = res["opta_matches"]
+    df_all_events = res["opta_events"]
+    df_opta_stats = _tilfoej_fremadrettede(res["opta_team_stats"], byg_fremadrettede_pasninger(df_all_events))
+    df_sequence_events = res["opta_sequence_events"]
+    df_sequence = byg_sekvens_map(df_sequence_events, df_matches, hold=HIF_UUID if hif_only else None)
+    df_shots = res["opta_shotevents"]
+    df_league_shots = res["opta_league_shotevents"]
+    df_assists = byg_assists(res["opta_assist_events"])
+    df_xg_agg = res["opta_expected_goals"]
+
+    # 3. Fysisk data (kun hentet, når der er valgt en kamp - filtreret på MATCH_SSIID i SQL)
+    df_fys = res["opta_physical_stats"]
 
     # 4. Spiller-navne mapping (HIF lokale navne)
     df_local = load_local_players()
@@ -74,12 +221,15 @@ def get_analysis_package(hif_only=False, match_uuid=None):
         "opta": {
             "team_stats": df_opta_stats,
             "opta_sequence_map": df_sequence,
+            "sequence_events": df_sequence_events,
             "league_shotevents": df_league_shots,
             "events": df_all_events
         },
         "config": {
             "liga_navn": comp_f, 
             "season": season_f, 
+            "hif_only": hif_only,
             "colors": TEAM_COLORS
-        }
+        },
+        "timings": timings
     }
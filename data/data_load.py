@@ -1,27 +1,41 @@
 import streamlit as st
 import pandas as pd
 import os
+import re
+import time
+import hashlib
+import queue
+import random
+import threading
 import requests
+import snowflake.connector
+from snowflake.connector import errors as sf_errors
+from contextlib import contextmanager
+import pyarrow as pa
+import pyarrow.parquet as pq
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import serialization
 
 # --- 1. SNOWFLAKE FORBINDELSE (OPTIMERET) ---
+def _snowflake_parametre():
+    """Login-parametre fra secrets, med den private nøgle omsat til DER."""
+    s = st.secrets["connections"]["snowflake"]
+    p_key_raw = s["private_key"]
+    p_key_pem = p_key_raw.strip().replace("\\n", "\n") if isinstance(p_key_raw, str) else p_key_raw
+    p_key_obj = serialization.load_pem_private_key(p_key_pem.encode('utf-8'), password=None, backend=default_backend())
+    p_key_der = p_key_obj.private_bytes(encoding=serialization.Encoding.DER, format=serialization.PrivateFormat.PKCS8, encryption_algorithm=serialization.NoEncryption())
+    return dict(account=s["account"], user=s["user"], role=s["role"], warehouse=s["warehouse"],
+                database=s["database"], schema=s["schema"], private_key=p_key_der)
+
 @st.cache_resource
 def get_snowflake_session():
     """
     Opretter og cacher Snowflake-forbindelsen. 
     Kaldes kun første gang appen kører.
+    Bruges kun som reserve, hvis forbindelses-poolen ikke kan oprettes.
     """
     try:
-        s = st.secrets["connections"]["snowflake"]
-        p_key_raw = s["private_key"]
-        p_key_pem = p_key_raw.strip().replace("\\n", "\n") if isinstance(p_key_raw, str) else p_key_raw
-        p_key_obj = serialization.load_pem_private_key(p_key_pem.encode('utf-8'), password=None, backend=default_backend())
-        p_key_der = p_key_obj.private_bytes(encoding=serialization.Encoding.DER, format=serialization.PrivateFormat.PKCS8, encryption_algorithm=serialization.NoEncryption())
-        
-        conn = st.connection("snowflake", type="snowflake", account=s["account"], user=s["user"], 
-                             role=s["role"], warehouse=s["warehouse"], database=s["database"], 
-                             schema=s["schema"], private_key=p_key_der)
+        conn = st.connection("snowflake", type="snowflake", **_snowflake_parametre())
         return conn
     except Exception as e:
         st.error(f"❌ Snowflake Forbindelsesfejl: {e}")
@@ -29,7 +43,671 @@ def get_snowflake_session():
 
 def _get_snowflake_conn():
     """Bevarer kompatibilitet med dine eksisterende 30 filer."""
-    return get_snowflake_session()
+    try:
+        conn = PooledConnection(get_snowflake_pool())
+    except Exception:
+        # Poolen kunne ikke logge ind -> den fælles st.connection (viser fejlen i UI'et)
+        conn = get_snowflake_session()
+    if conn is None:
+        return None
+    return CachedConnection(conn, get_result_cache())
+
+# --- 1A. FORBINDELSES-POOL ---
+# Én delt forbindelse betyder, at én langsom query får alle andre brugere til at vente,
+# og en tabt session giver fejl indtil appen genstartes. I stedet holdes et lille antal
+# forbindelser, der lånes ud pr. query, sundhedstjekkes før brug og genoprettes ved fejl.
+POOL_STOERRELSE = 8             # >= analyse_load.MAX_PARALLELLE_QUERIES, plus plads til andre brugere
+POOL_CHECKOUT_TIMEOUT = 60      # sekunder en query venter på en ledig forbindelse pr. forsøg
+POOL_CHECKOUT_FORSOEG = 3       # query()/cursor() prøver igen med en kort pause, før PoolTimeout når kalderen
+POOL_PING_EFTER = 5 * 60        # ledig længere end dette -> SELECT 1 før udlån
+POOL_MAX_ALDER = 4 * 3600       # forbindelser ældre end dette lukkes og erstattes
+
+# Snowflake-fejlkoder for udløbet/ukendt session
+_SESSION_FEJLKODER = {390111, 390112, 390114}
+
+
+class PoolTimeout(TimeoutError):
+    pass
+
+
+def _er_forbindelsesfejl(e, raw=None):
+    """Sand hvis fejlen skyldes forbindelsen (og ikke selve SQL'en)."""
+    try:
+        if raw is not None and raw.is_closed():
+            return True
+    except Exception:
+        return True
+    if isinstance(e, (sf_errors.OperationalError, sf_errors.InterfaceError)):
+        return True
+    return getattr(e, "errno", None) in _SESSION_FEJLKODER
+
+
+class SnowflakePool:
+    """
+    Begrænset pool af snowflake.connector-forbindelser, delt mellem sessioner og tråde.
+    Højst `stoerrelse` forbindelser er åbne; en udlånt forbindelse bruges kun af én query ad gangen.
+    """
+
+    def __init__(self, opret, stoerrelse=POOL_STOERRELSE, checkout_timeout=POOL_CHECKOUT_TIMEOUT,
+                 ping_efter=POOL_PING_EFTER, max_alder=POOL_MAX_ALDER):
+        self._opret = opret
+        self.stoerrelse = stoerrelse
+        self.checkout_timeout = checkout_timeout
+        self.ping_efter = ping_efter
+        self.max_alder = max_alder
+        self._pladser = threading.BoundedSemaphore(stoerrelse)
+        self._ledige = queue.LifoQueue()  # (forbindelse, oprettet, sidst_brugt)
+        self._oprettet = {}               # id(forbindelse) -> oprettet
+        self._lock = threading.Lock()
+
+    def _ny(self):
+        raw = self._opret()
+        with self._lock:
+            self._oprettet[id(raw)] = time.time()
+        return raw
+
+    def _luk(self, raw):
+        with self._lock:
+            self._oprettet.pop(id(raw), None)
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def _sund(self, raw, oprettet, sidst_brugt):
+        nu = time.time()
+        if nu - oprettet > self.max_alder:
+            return False
+        try:
+            if raw.is_closed():
+                return False
+            if nu - sidst_brugt > self.ping_efter:
+                cur = raw.cursor()
+                try:
+                    cur.execute("SELECT 1")
+                    cur.fetchone()
+                finally:
+                    cur.close()
+        except Exception:
+            return False
+        return True
+
+    def udlaan(self, timeout=None, forsoeg=1):
+        """
+        Låner en sund forbindelse; venter højst `timeout` sekunder på en ledig plads pr. forsøg.
+        Med forsoeg > 1 ventes der igen efter en kort, stigende pause, så en travl pool
+        giver kø i stedet for en fejl.
+        """
+        timeout = self.checkout_timeout if timeout is None else timeout
+        for i in range(max(1, forsoeg)):
+            if i:
+                time.sleep(min(2.0, 0.1 * 2 ** i) * random.uniform(0.5, 1.0))
+            if self._pladser.acquire(timeout=timeout):
+                break
+        else:
+            raise PoolTimeout(
+                f"Alle {self.stoerrelse} Snowflake-forbindelser er optaget (ventede {forsoeg} x {timeout} s)"
+            )
+        try:
+            while True:
+                try:
+                    raw, oprettet, sidst_brugt = self._ledige.get_nowait()
+                except queue.Empty:
+                    return self._ny()
+                if self._sund(raw, oprettet, sidst_brugt):
+                    return raw
+                self._luk(raw)
+        except BaseException:
+            self._pladser.release()
+            raise
+
+    def aflever(self, raw, kasser=False):
+        """Returnerer en lånt forbindelse. kasser=True lukker den i stedet (fx efter en forbindelsesfejl)."""
+        try:
+            with self._lock:
+                oprettet = self._oprettet.get(id(raw))
+            if kasser or oprettet is None:
+                self._luk(raw)
+            else:
+                self._ledige.put((raw, oprettet, time.time()))
+        finally:
+            self._pladser.release()
+
+    @contextmanager
+    def forbindelse(self, timeout=None, forsoeg=1):
+        raw = self.udlaan(timeout, forsoeg)
+        kasser = False
+        try:
+            yield raw
+        except Exception as e:
+            kasser = _er_forbindelsesfejl(e, raw)
+            raise
+        finally:
+            self.aflever(raw, kasser=kasser)
+
+    def status(self):
+        with self._lock:
+            aabne = len(self._oprettet)
+        ledige = self._ledige.qsize()
+        return {"stoerrelse": self.stoerrelse, "aabne": aabne, "ledige": ledige, "i_brug": aabne - ledige}
+
+    def luk_alle(self):
+        while True:
+            try:
+                raw, _, _ = self._ledige.get_nowait()
+            except queue.Empty:
+                break
+            self._luk(raw)
+
+
+class _PoolCursor:
+    """Cursor der holder sin forbindelse lånt, indtil cursoren lukkes (fx af pd.read_sql)."""
+
+    def __init__(self, pool, raw):
+        self._cur = raw.cursor()
+        self._pool = pool
+        self._raw = raw
+        self._fejl = False
+
+    def execute(self, *args, **kwargs):
+        try:
+            self._cur.execute(*args, **kwargs)
+        except Exception as e:
+            self._fejl = _er_forbindelsesfejl(e, self._raw)
+            raise
+        return self
+
+    def close(self):
+        if self._raw is None:
+            return
+        raw, self._raw = self._raw, None
+        try:
+            self._cur.close()
+        except Exception:
+            pass
+        self._pool.aflever(raw, kasser=self._fejl)
+
+    def __iter__(self):
+        return iter(self._cur)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def __getattr__(self, navn):
+        if navn.startswith("_"):
+            raise AttributeError(navn)
+        return getattr(self._cur, navn)
+
+
+class PooledConnection:
+    """
+    Samme flade som st.connection('snowflake') for det appen bruger: query() og cursor().
+    Hver query låner en forbindelse fra poolen og afleverer den igen bagefter; fejler
+    forbindelsen undervejs, kasseres den og queryen prøves én gang til på en ny.
+    """
+
+    def __init__(self, pool):
+        self._pool = pool
+
+    def query(self, sql, ttl=None, show_spinner=None, params=None, **kwargs):
+        # ttl/show_spinner hører til st.connection's hukommelsescache - her er det disk-cachen der cacher
+        for forsoeg in range(2):
+            try:
+                with self._pool.forbindelse(forsoeg=POOL_CHECKOUT_FORSOEG) as raw:
+                    cur = raw.cursor()
+                    try:
+                        cur.execute(sql, params=params, **kwargs)
+                        return cur.fetch_pandas_all()
+                    finally:
+                        cur.close()
+            except PoolTimeout:
+                raise
+            except Exception as e:
+                if forsoeg == 0 and _er_forbindelsesfejl(e):
+                    continue
+                raise
+
+    def cursor(self):
+        raw = self._pool.udlaan(forsoeg=POOL_CHECKOUT_FORSOEG)
+        try:
+            return _PoolCursor(self._pool, raw)
+        except Exception:
+            self._pool.aflever(raw, kasser=True)
+            raise
+
+    @property
+    def pool(self):
+        return self._pool
+
+
+@st.cache_resource
+def get_snowflake_pool():
+    """
+    Poolen oprettes én gang pr. proces. Første forbindelse åbnes med det samme, så
+    login-fejl viser sig her; fejler den, caches intet og næste kald prøver igen.
+    """
+    parametre = _snowflake_parametre()
+    pool = SnowflakePool(lambda: snowflake.connector.connect(client_session_keep_alive=True, **parametre))
+    pool.aflever(pool.udlaan())
+    return pool
+
+# --- 1B. PERSISTENT RESULTAT-CACHE (PARQUET PÅ DISK) ---
+# st.cache_data lever kun i den enkelte proces, så hver genstart/deploy starter koldt.
+# Resultater gemmes derfor også som Parquet-filer, nøglet på den normaliserede SQL-tekst.
+CACHE_DIR = os.path.join(os.getcwd(), ".cache", "snowflake")
+CACHE_MAX_BYTES = 2 * 1024 ** 3  # 2 GB samlet budget før LRU-oprydning
+
+# Levetid (sekunder) pr. datasæt/tabel. Opta-tabellerne får samme korte levetid som
+# sidernes egne st.cache_data (5-10 min), så en igangværende eller netop spillet kamp
+# slår igennem på kampdage. Den tunge liga-eventhentning (liga_spillere) går uden om
+# denne cache via EventStore, hvor færdigspillede kampe kun hentes én gang.
+CACHE_TTL = {
+    "OPTA_EVENTS": 600,
+    "OPTA_QUALIFIERS": 600,
+    "OPTA_MATCH_LINEUPS": 600,
+    "OPTA_MATCHEXPECTEDGOALS": 600,
+    "OPTA_MATCHSTATS": 600,
+    "OPTA_MATCHINFO": 300,
+    "SECONDSPECTRUM": 12 * 3600,
+    "WYSCOUT": 24 * 3600,
+}
+CACHE_TTL_DEFAULT = 3600
+
+_TABEL_RE = re.compile(r"\b(?:FROM|JOIN)\s+(?:[\w$]+\.)+([A-Z][A-Z0-9_$]*)", re.IGNORECASE)
+
+
+def normaliser_sql(sql):
+    """Ensretter whitespace og afsluttende semikolon, så samme query altid giver samme nøgle."""
+    return re.sub(r"\s+", " ", str(sql)).strip().rstrip(";").strip()
+
+
+def _find_tabeller(sql):
+    return [t.upper() for t in _TABEL_RE.findall(sql)]
+
+
+def _ttl_for_tabel(tabel):
+    for prefix, ttl in CACHE_TTL.items():
+        if tabel.startswith(prefix):
+            return ttl
+    return CACHE_TTL_DEFAULT
+
+
+class ResultCache:
+    """
+    Disk-baseret LRU-cache for query-resultater.
+    Filens mtime er oprettelsestidspunktet (TTL), atime er sidste brug (LRU).
+    Ingen fælles indeksfil, så flere worker-processer kan dele mappen.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _sti(self, dataset, noegle):
+        return os.path.join(self.cache_dir, f"{dataset}__{noegle}.parquet")
+
+    @staticmethod
+    def noegle(sql, params=None):
+        raw = normaliser_sql(sql)
+        if params:
+            raw += "|" + repr(params)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def dataset_og_ttl(sql):
+        """Datasættet er første tabel i queryen; TTL er den korteste blandt alle involverede tabeller."""
+        tabeller = _find_tabeller(sql)
+        if not tabeller:
+            return "QUERY", CACHE_TTL_DEFAULT
+        return tabeller[0], min(_ttl_for_tabel(t) for t in tabeller)
+
+    def frisk_sti(self, dataset, noegle, ttl):
+        """Stien til en gyldig cachefil (og markerer den som brugt), ellers None."""
+        sti = self._sti(dataset, noegle)
+        try:
+            st_info = os.stat(sti)
+        except FileNotFoundError:
+            return None
+        nu = time.time()
+        if ttl is not None and nu - st_info.st_mtime > ttl:
+            self._slet(sti)
+            return None
+        os.utime(sti, (nu, st_info.st_mtime))
+        return sti
+
+    def hent(self, dataset, noegle, ttl):
+        sti = self.frisk_sti(dataset, noegle, ttl)
+        if sti is None:
+            return None
+        try:
+            return pd.read_parquet(sti)
+        except Exception:
+            self._slet(sti)
+            return None
+
+    def gem(self, dataset, noegle, df):
+        if df is None or not isinstance(df, pd.DataFrame):
+            return
+        sti = self._sti(dataset, noegle)
+        tmp = f"{sti}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            df.to_parquet(tmp, index=False)
+            os.replace(tmp, sti)
+        except Exception:
+            # Kolonner pyarrow ikke kan serialisere -> resultatet caches bare ikke på disk
+            self._slet(tmp)
+            return
+        self._ryd_op()
+
+    def invalider(self, dataset=None, sql=None, params=None):
+        """
+        Sletter cachede resultater. Uden argumenter ryddes alt,
+        med dataset kun den tabel (fx 'OPTA_EVENTS'), med sql (og params) kun den ene query.
+        Nøglen dannes præcis som i CachedConnection.query, så også parameteriserede
+        queries kan invalideres hver for sig. Returnerer antal slettede filer.
+        """
+        if sql is not None:
+            ds, _ = self.dataset_og_ttl(normaliser_sql(sql))
+            sti = self._sti((dataset or ds).upper(), self.noegle(sql, params))
+            return 1 if self._slet(sti) else 0
+
+        antal = 0
+        prefix = f"{dataset.upper()}__" if dataset else ""
+        for navn in os.listdir(self.cache_dir):
+            if navn.endswith(".parquet") and navn.startswith(prefix):
+                antal += 1 if self._slet(os.path.join(self.cache_dir, navn)) else 0
+        return antal
+
+    def _ryd_op(self):
+        """Sletter mindst nyligt brugte filer, indtil cachen er under budgettet."""
+        with self._lock:
+            filer = []
+            for navn in os.listdir(self.cache_dir):
+                if not navn.endswith(".parquet"):
+                    continue
+                sti = os.path.join(self.cache_dir, navn)
+                try:
+                    info = os.stat(sti)
+                except FileNotFoundError:
+                    continue
+                filer.append((info.st_atime, info.st_size, sti))
+
+            total = sum(f[1] for f in filer)
+            for _, stoerrelse, sti in sorted(filer):
+                if total <= self.max_bytes:
+                    break
+                if self._slet(sti):
+                    total -= stoerrelse
+
+    @staticmethod
+    def _slet(sti):
+        try:
+            os.remove(sti)
+            return True
+        except OSError:
+            return False
+
+
+class CachedConnection:
+    """
+    Tynd wrapper om forbindelsen (pool eller st.connection): query() slår først op i disk-cachen.
+    Alle andre attributter sendes uændret videre til den rigtige forbindelse.
+    """
+
+    def __init__(self, conn, cache):
+        self._conn = conn
+        self._cache = cache
+
+    def query(self, sql, *args, dataset=None, cache_ttl=None, use_cache=True, **kwargs):
+        if not use_cache or self._cache is None:
+            return self._conn.query(sql, *args, **kwargs)
+
+        auto_dataset, auto_ttl = self._cache.dataset_og_ttl(normaliser_sql(sql))
+        dataset = (dataset or auto_dataset).upper()
+        ttl = cache_ttl if cache_ttl is not None else auto_ttl
+        noegle = self._cache.noegle(sql, kwargs.get("params"))
+
+        df = self._cache.hent(dataset, noegle, ttl)
+        if df is not None:
+            return df
+
+        df = self._conn.query(sql, *args, **kwargs)
+        self._cache.gem(dataset, noegle, df)
+        return df
+
+    def query_batches(self, sql, params=None, dataset=None, cache_ttl=None, use_cache=True):
+        """
+        Som query(), men resultatet leveres som en række mindre DataFrames i stedet for
+        én samlet, så hukommelsen kun skal rumme én batch ad gangen. Ved cache-miss
+        skrives batchene løbende til Parquet-filen; ved cache-hit læses den batchvis.
+        """
+        if not use_cache or self._cache is None:
+            yield from _pandas_batches(self._conn, sql, params)
+            return
+
+        auto_dataset, auto_ttl = self._cache.dataset_og_ttl(normaliser_sql(sql))
+        dataset = (dataset or auto_dataset).upper()
+        ttl = cache_ttl if cache_ttl is not None else auto_ttl
+        noegle = self._cache.noegle(sql, params)
+
+        sti = self._cache.frisk_sti(dataset, noegle, ttl)
+        if sti is not None:
+            try:
+                fil = pq.ParquetFile(sti)
+            except Exception:
+                self._cache._slet(sti)
+            else:
+                for batch in fil.iter_batches(batch_size=STREAM_BATCH_RAEKKER):
+                    yield batch.to_pandas()
+                return
+
+        sti = self._cache._sti(dataset, noegle)
+        tmp = f"{sti}.{os.getpid()}.{threading.get_ident()}.tmp"
+        writer = None
+        skriv_cache = True
+        try:
+            for tabel in _arrow_batches(self._conn, sql, params):
+                if skriv_cache:
+                    try:
+                        if writer is None:
+                            writer = pq.ParquetWriter(tmp, tabel.schema)
+                        writer.write_table(tabel.cast(writer.schema))
+                    except Exception:
+                        # Skiftende/ukendte typer -> resultatet caches bare ikke på disk
+                        skriv_cache = False
+                        if writer is not None:
+                            writer.close()
+                            writer = None
+                        self._cache._slet(tmp)
+                yield tabel.to_pandas()
+            if writer is not None:
+                writer.close()
+                writer = None
+                os.replace(tmp, sti)
+                self._cache._ryd_op()
+        finally:
+            # Afbrudt undervejs (fx consumer stoppede) -> halv fil kasseres
+            if writer is not None:
+                writer.close()
+            self._cache._slet(tmp)
+
+    def invalider(self, dataset=None, sql=None, params=None):
+        return self._cache.invalider(dataset=dataset, sql=sql, params=params) if self._cache else 0
+
+    def __getattr__(self, navn):
+        return getattr(self._conn, navn)
+
+
+@st.cache_resource
+def get_result_cache():
+    try:
+        return ResultCache()
+    except OSError as e:
+        st.warning(f"Disk-cache deaktiveret: {e}")
+        return None
+
+
+def invalider_cache(dataset=None, sql=None, params=None):
+    """Eksplicit invalidering af disk-cachen (fx efter nye kampe eller fra 'Ryd cache')."""
+    cache = get_result_cache()
+    return cache.invalider(dataset=dataset, sql=sql, params=params) if cache else 0
+
+# --- 1C. STREAMING AF STORE RESULTATER (ARROW-BATCHES) ---
+# conn.query() samler hele resultatet i én DataFrame (og holder det i st.cache_data).
+# For store udtræk hentes i stedet connectorens Arrow-batches én ad gangen via en cursor.
+STREAM_BATCH_RAEKKER = 100_000
+
+
+def _arrow_batches(conn, sql, params=None):
+    cur = conn.cursor()
+    try:
+        cur.execute(sql, params=params)
+        try:
+            batches = cur.fetch_arrow_batches()
+        except Exception:
+            # Resultater der ikke kommer i Arrow-format (fx meget små) -> ét samlet fetch
+            df = cur.fetch_pandas_all()
+            yield pa.Table.from_pandas(df, preserve_index=False)
+            return
+        for tabel in batches:
+            yield tabel
+    finally:
+        cur.close()
+
+
+def _pandas_batches(conn, sql, params=None):
+    for tabel in _arrow_batches(conn, sql, params):
+        yield tabel.to_pandas()
+
+
+def stream_query(conn, sql, params=None, **kwargs):
+    """
+    Generator af DataFrames for `sql`. Med CachedConnection bruges disk-cachen også
+    for streaming; ellers går den direkte til connectoren.
+    """
+    if isinstance(conn, CachedConnection):
+        yield from conn.query_batches(sql, params=params, **kwargs)
+    else:
+        yield from _pandas_batches(conn, sql, params)
+
+# --- 1D. KOLONNE-PROJEKTION ---
+# Brede tabeller som OPTA_MATCHINFO hentes ikke længere med SELECT *. Hver side angiver
+# de kolonner den bruger; kun dem hentes, og hver kolonne caches for sig (sammen med
+# nøglekolonnen), så en side der beder om en delmængde af hentede kolonner slår dem op.
+SKEMA_TTL = 24 * 3600
+DB_SKEMA = "KLUB_HVIDOVREIF.AXIS"
+
+
+def projektion(kolonner, alias=None):
+    """Kolonneliste til SELECT, fx projektion(['A', 'B'], 'e') -> 'e.A, e.B'."""
+    prefix = f"{alias}." if alias else ""
+    return ", ".join(f"{prefix}{k}" for k in kolonner)
+
+
+def hent_skema(conn, tabel, db=DB_SKEMA):
+    """Tabellens kolonnenavne (store bogstaver) via en query uden rækker - caches et døgn."""
+    sql = f"SELECT * FROM {db}.{tabel} LIMIT 0"
+    if isinstance(conn, CachedConnection):
+        df = conn.query(sql, cache_ttl=SKEMA_TTL)
+    else:
+        df = conn.query(sql)
+    return [str(c).upper() for c in df.columns] if df is not None else []
+
+
+def hent_kolonner(conn, tabel, kolonner, where, noegle="MATCH_OPTAUUID", db=DB_SKEMA):
+    """
+    SELECT af netop `kolonner` fra `tabel` med filteret `where`.
+    Kolonner der ikke findes i tabellen, hentes ikke og er heller ikke med i
+    resultatet, så sidernes .get(kolonne, standard) falder tilbage på standardværdien.
+    Med disk-cachen gemmes hver kolonne for sig sammen med et indeks over den seneste
+    hentning (kolonner + tidspunkt). Alle kolonner i et resultat stammer fra samme
+    hentning og har derfor samme alder og TTL; mangler en kolonne, eller er den fra en
+    anden hentning, hentes de ønskede og de allerede cachede kolonner igen i én query.
+    Resultatet har én række pr. `noegle`.
+    """
+    kolonner = [str(k).upper() for k in kolonner]
+    skema = set(hent_skema(conn, tabel, db))
+    findes = [k for k in kolonner if k in skema] if skema else list(kolonner)
+    if noegle not in findes:
+        findes = [noegle] + findes
+
+    def _query(kol):
+        sql = f"SELECT {projektion(kol)} FROM {db}.{tabel} WHERE {where}"
+        if isinstance(conn, CachedConnection):
+            df = conn.query(sql, use_cache=False)
+        else:
+            df = conn.query(sql)
+        if df is None:
+            return pd.DataFrame(columns=kol)
+        df.columns = [str(c).upper() for c in df.columns]
+        return df
+
+    cache = conn._cache if isinstance(conn, CachedConnection) else None
+    if cache is None:
+        df = _query(findes).drop_duplicates(subset=[noegle])
+    else:
+        dataset, scope = tabel.upper(), cache.noegle(f"{db}.{tabel}|{where}")
+        # Indekset: {KOLONNE, HENTNING} for seneste hentning; HENTNING er tidspunktet i ns
+        indeks = cache.hent(dataset, f"{scope}__indeks", None)
+        df = _kolonner_fra_cache(cache, dataset, scope, indeks, noegle, findes)
+        if df is None:
+            df = _hent_og_gem_kolonner(cache, dataset, scope, indeks, noegle, findes, skema, _query)
+
+    return df[[k for k in kolonner if k in df.columns]]
+
+
+def _kolonner_fra_cache(cache, dataset, scope, indeks, noegle, findes):
+    """Resultatet samlet fra cachen, hvis den seneste hentning er frisk og har alle kolonner - ellers None."""
+    if indeks is None or indeks.empty or not set(findes) <= set(indeks["KOLONNE"]) | {noegle}:
+        return None
+    hentning = int(indeks["HENTNING"].iloc[0])
+    if time.time_ns() - hentning > _ttl_for_tabel(dataset) * 1e9:
+        return None
+
+    # Kolonnerne slås op under hentningens egen nøgle, så de altid er fra samme query
+    df = None
+    for k in [k for k in findes if k != noegle] or [noegle]:
+        df_k = cache.hent(dataset, f"{scope}__{hentning:x}__{k}", None)
+        if df_k is None:
+            return None
+        df_k = df_k.drop_duplicates(subset=[noegle])
+        df = df_k if df is None else df.merge(df_k, on=noegle, how="left")
+    return df
+
+
+def _hent_og_gem_kolonner(cache, dataset, scope, indeks, noegle, findes, skema, _query):
+    """
+    Henter `findes` plus den seneste hentnings kolonner (så sider med forskellige
+    kolonnesæt ikke skiftes til at hente hinandens kolonner igen) i én query. Hver
+    kolonne gemmes under den nye hentnings nøgle, indekset skrives til sidst, og den
+    forrige hentnings kolonner slettes.
+    """
+    tidligere = [] if indeks is None else [k for k in indeks["KOLONNE"] if not skema or k in skema]
+    alle = findes + [k for k in tidligere if k not in findes]
+
+    df_ny = _query(alle).drop_duplicates(subset=[noegle])
+    hentning = time.time_ns()
+    gemte = [k for k in df_ny.columns if k != noegle] or [noegle]
+    for k in gemte:
+        cache.gem(dataset, f"{scope}__{hentning:x}__{k}", df_ny[list(dict.fromkeys([noegle, k]))])
+    cache.gem(dataset, f"{scope}__indeks", pd.DataFrame({"KOLONNE": gemte, "HENTNING": hentning}))
+
+    if indeks is not None and not indeks.empty:
+        gammel = int(indeks["HENTNING"].iloc[0])
+        for k in indeks["KOLONNE"]:
+            cache._slet(cache._sti(dataset, f"{scope}__{gammel:x}__{k}"))
+    return df_ny[[k for k in findes if k in df_ny.columns]]
 
 # --- 2. API SESSION MANAGER (TIL WYSCOUT/OPTA/SS) ---
 @st.cache_resource
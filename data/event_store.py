@@ -0,0 +1,244 @@
+# data/event_store.py
+"""
+Lokalt event-lager for sæsonens Opta-events, partitioneret pr. kamp (MATCH_OPTAUUID).
+
+En spillet kamps events ændrer sig ikke, så i stedet for at hente hele sæsonen
+ved hver cache-udløb hentes kun kampe, der ikke allerede ligger i lageret,
+eller hvis MATCH_STATUS har ændret sig siden sidst (fx Fixture -> Played).
+Ikke-afsluttede kampe med events (fx i gang) hentes igen, når deres fil er ældre
+end UAFSLUTTET_TTL; kommende kampe uden events og med uændret status hentes ikke.
+"""
+import os
+import json
+import threading
+import time
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from data.data_load import CachedConnection
+
+EVENT_STORE_DIR = os.path.join(os.getcwd(), ".cache", "events")
+FAERDIG_STATUS = "Played"
+UAFSLUTTET_TTL = 10 * 60  # sekunder før en ikke-afsluttet kamp med events hentes igen
+SYNC_BATCH_STOERRELSE = 40
+
+
+# Én lås pr. lager-mappe for hele processen: EventStore oprettes pr. kald (fx i
+# liga_spillere._event_lager), så en lås på instansen beskytter ikke manifestet
+_MAPPE_LAASE = {}
+_MAPPE_LAASE_LOCK = threading.Lock()
+
+
+def _mappe_laas(mappe):
+    noegle = os.path.realpath(mappe)
+    with _MAPPE_LAASE_LOCK:
+        return _MAPPE_LAASE.setdefault(noegle, threading.Lock())
+
+
+def _tmp_sti(sti):
+    """Midlertidigt filnavn, der er unikt pr. proces og tråd."""
+    return f"{sti}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def query_uden_cache(conn, sql):
+    """Lageret er selv den persistente cache, så disk-cachen i data_load springes over."""
+    if isinstance(conn, CachedConnection):
+        return conn.query(sql, use_cache=False)
+    return conn.query(sql)
+
+
+def match_ids_sql(match_ids):
+    return "(" + ", ".join(f"'{str(m).strip()}'" for m in match_ids) + ")"
+
+
+def _foren_skemaer(skema, nyt):
+    """Forener to skemaer; null-kolonner får den anden sides type, og int/float forenes til float."""
+    if skema is None or skema.equals(nyt):
+        return nyt
+    return pa.unify_schemas([skema, nyt], promote_options="permissive")
+
+
+def _skriv_tabel(writer, sti, tabel):
+    """
+    Skriver tabel til kampens fil og returnerer writeren. Har tabellen en type writerens
+    skema ikke kan rumme (fx END_X, der var null i kampens første rækker), lukkes writeren,
+    det skrevne læses tilbage og castes, og en ny writer åbnes med det forenede skema.
+    """
+    if writer is None:
+        writer = pq.ParquetWriter(sti, tabel.schema)
+    skema = _foren_skemaer(writer.schema, tabel.schema)
+    if not skema.equals(writer.schema):
+        writer.close()
+        skrevet = pq.read_table(sti).select(skema.names).cast(skema)
+        writer = pq.ParquetWriter(sti, skema)
+        writer.write_table(skrevet)
+    writer.write_table(tabel.select(skema.names).cast(skema))
+    return writer
+
+
+class EventStore:
+    def __init__(self, navn, base_dir=EVENT_STORE_DIR, match_col="MATCH_OPTAUUID"):
+        self.dir = os.path.join(base_dir, navn)
+        self.match_col = match_col
+        self._manifest_sti = os.path.join(self.dir, "_manifest.json")
+        os.makedirs(self.dir, exist_ok=True)
+        self._lock = _mappe_laas(self.dir)
+
+    # --- MANIFEST: {match_uuid: status ved seneste sync} ---
+    def manifest(self):
+        try:
+            with open(self._manifest_sti, encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _gem_manifest(self, manifest):
+        tmp = _tmp_sti(self._manifest_sti)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, self._manifest_sti)
+
+    def _sti(self, match_uuid):
+        return os.path.join(self.dir, f"{match_uuid}.parquet")
+
+    def _skal_opdateres(self, m, status, manifest, nu):
+        sti = self._sti(m)
+        try:
+            info = os.stat(sti)
+        except FileNotFoundError:
+            return True
+        if manifest.get(m) != status:
+            return True
+        if status == FAERDIG_STATUS:
+            return False
+        # Ikke afsluttet med uændret status: kun kampe med events (i gang) hentes igen,
+        # og højst hvert UAFSLUTTET_TTL sekund
+        if nu - info.st_mtime <= UAFSLUTTET_TTL:
+            return False
+        try:
+            return pq.ParquetFile(sti).metadata.num_rows > 0
+        except Exception:
+            return True
+
+    def mangler(self, status_map):
+        """
+        Returnerer de kampe der skal (gen)hentes: nye, ændret status, manglende fil,
+        eller ikke afsluttede kampe med events, hvis fil er ældre end UAFSLUTTET_TTL.
+        """
+        manifest = self.manifest()
+        nu = time.time()
+        return [m for m, status in status_map.items() if self._skal_opdateres(m, status, manifest, nu)]
+
+    def gem(self, df_events, status_map):
+        """Skriver én Parquet-fil pr. kamp og opdaterer manifestet for alle kampe i status_map."""
+        with self._lock:
+            manifest = self.manifest()
+            grupper = {}
+            if df_events is not None and not df_events.empty:
+                grupper = dict(tuple(df_events.groupby(self.match_col, sort=False)))
+            for m, status in status_map.items():
+                df_kamp = grupper.get(m, df_events.iloc[0:0] if df_events is not None else pd.DataFrame())
+                tmp = _tmp_sti(self._sti(m))
+                df_kamp.to_parquet(tmp, index=False)
+                os.replace(tmp, self._sti(m))
+                manifest[m] = status
+            self._gem_manifest(manifest)
+
+    def gem_batchvis(self, batches, status_map):
+        """
+        Som gem(), men for en strøm af DataFrames (fx stream_query): hver batch fordeles
+        straks på kampenes Parquet-filer, så kun én batch ligger i hukommelsen ad gangen.
+        Skemaet følger data: er en kolonne kun null i de første rækker (Arrow-typen null),
+        forenes det med typen i senere rækker (_skriv_tabel).
+        """
+        with self._lock:
+            writers = {}
+            tmp_stier = {m: _tmp_sti(self._sti(m)) for m in status_map}
+            skema = None  # samlet skema til tomme filer
+            try:
+                for df_batch in batches:
+                    if df_batch is None or df_batch.empty:
+                        continue
+                    df_batch.columns = [str(c).upper() for c in df_batch.columns]
+                    for m, df_kamp in df_batch.groupby(self.match_col, sort=False):
+                        if m not in tmp_stier:
+                            continue
+                        tabel = pa.Table.from_pandas(df_kamp, preserve_index=False).replace_schema_metadata(None)
+                        writers[m] = _skriv_tabel(writers.get(m), tmp_stier[m], tabel)
+                        skema = _foren_skemaer(skema, tabel.schema)
+                for w in writers.values():
+                    w.close()
+
+                manifest = self.manifest()
+                for m, status in status_map.items():
+                    if m not in writers:
+                        # Kampe uden events får en tom fil, så de ikke hentes igen
+                        tom = pa.Table.from_pylist([], schema=skema) if skema is not None else pa.table({})
+                        pq.write_table(tom, tmp_stier[m])
+                    os.replace(tmp_stier[m], self._sti(m))
+                    manifest[m] = status
+                self._gem_manifest(manifest)
+            finally:
+                for w in writers.values():
+                    w.close()
+                for m, tmp in tmp_stier.items():
+                    if os.path.exists(tmp):
+                        try:
+                            os.remove(tmp)
+                        except OSError:
+                            pass
+
+    def laes(self, match_ids=None):
+        if match_ids is None:
+            match_ids = list(self.manifest().keys())
+        dele = [pd.read_parquet(self._sti(m)) for m in match_ids if os.path.exists(self._sti(m))]
+        dele = [d for d in dele if not d.empty]
+        if not dele:
+            return pd.DataFrame()
+        return pd.concat(dele, ignore_index=True)
+
+    def laes_batchvis(self, match_ids=None, kampe_pr_batch=SYNC_BATCH_STOERRELSE):
+        """Læser lageret i bidder af kampe_pr_batch kampe, så hele sæsonen aldrig er samlet i hukommelsen."""
+        if match_ids is None:
+            match_ids = list(self.manifest().keys())
+        for i in range(0, len(match_ids), kampe_pr_batch):
+            df = self.laes(match_ids[i:i + kampe_pr_batch])
+            if not df.empty:
+                yield df
+
+    def opdater(self, status_map, hent_events, batch_size=SYNC_BATCH_STOERRELSE):
+        """
+        Henter de manglende kampe ind i lageret uden at læse noget tilbage.
+        hent_events: funktion der tager en liste af match_uuids og returnerer deres
+        events - enten som én DataFrame eller som en strøm af DataFrames.
+        Returnerer antal kampe hentet fra Snowflake.
+        """
+        mangler = self.mangler(status_map)
+        for i in range(0, len(mangler), batch_size):
+            batch = mangler[i:i + batch_size]
+            resultat = hent_events(batch)
+            batch_status = {m: status_map[m] for m in batch}
+            if resultat is None or isinstance(resultat, pd.DataFrame):
+                if resultat is not None and not resultat.empty:
+                    resultat.columns = [str(c).upper() for c in resultat.columns]
+                self.gem(resultat, batch_status)
+            else:
+                self.gem_batchvis(resultat, batch_status)
+        return len(mangler)
+
+    def sync(self, status_map, hent_events, batch_size=SYNC_BATCH_STOERRELSE):
+        """
+        status_map: {match_uuid: MATCH_STATUS} for alle sæsonens kampe.
+        Returnerer (alle events for kampene i status_map, antal kampe hentet fra Snowflake).
+        """
+        n_hentet = self.opdater(status_map, hent_events, batch_size)
+        return self.laes(list(status_map.keys())), n_hentet
+
+    def ryd(self):
+        with self._lock:
+            for navn in os.listdir(self.dir):
+                try:
+                    os.remove(os.path.join(self.dir, navn))
+                except OSError:
+                    pass
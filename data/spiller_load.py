@@ -0,0 +1,540 @@
+# data/spiller_load.py
+"""
+Fælles datagrundlag for spillersiderne (Spillerprofil, Spiller-stats og Spilleraktioner).
+
+Liga-stats og alle holds trup-stats bygges ét sted og caches én gang for hele
+ligaen (byg_liga_stats); byg_spiller_og_holdstats vælger kun det valgte holds udsnit,
+så skift mellem hold og mellem de tre sider genbruger samme Snowflake-kald og pipeline.
+
+STATS_MOTOR vælger hvor spiller-stats tælles:
+  - "sql": Snowflake aggregerer og returnerer én række pr. spiller pr. hold;
+    kun holdets egne events hentes rå (til aktionskort og kampfanen).
+  - "pandas": ligaens events læses kamp-bid for kamp-bid fra event-lageret og
+    tælles lokalt (_byg_event_stats); deltællingerne lægges sammen til sidst.
+Begge giver samme kolonner og tal (tests/test_spiller_motorer.py); fejler SQL-motoren
+med en Snowflake-fejl, vises en advarsel og pandas-vejen bruges.
+Ingen af motorerne holder ligaens events i cachen: det valgte holds events hentes
+pr. hold (SQL-motoren fra Snowflake, pandas-motoren fra event-lageret);
+df_liga_total returneres fortsat tom.
+"""
+import os
+import pandas as pd
+import streamlit as st
+from snowflake.connector.errors import DatabaseError, ProgrammingError
+
+from data.utils.team_mapping import TEAMS
+from data.utils.mapping import get_action_labels
+from data.utils.qualifier_index import qualifier_index, har_qualifier_maske, assist_maske
+from data.utils.spiller_qualifiers import ACTION_CATEGORIES, POSITION_ACTIONS
+from data.utils.event_dtyper import komprimer_events
+from data.sql.liga_spillere import hent_events_batchvis, hent_expected, hent_liga_aggregater, hent_hold_events
+from data.sql.registry import koer_query, kanonisk_liste
+
+try:
+    from data.players import player_mapping
+    _STATIC_PLAYERS = getattr(player_mapping, 'PLAYER_MAPPING', [])
+except ImportError:
+    _STATIC_PLAYERS = []
+
+DB = "KLUB_HVIDOVREIF.AXIS"
+SEASONNAME = "2026/2027"
+LIGA_IDS = "('2mb332vncy4450vu14paj8844', 'e5p78j2r7v8h3u9s5k0l2m4n6', 'f6q89k3s8w9i4v0t6l1m3n5o7', '335', '328', '329', '43319', '331')"
+STATS_MOTOR = "sql"
+# Kun Snowflake-fejl (rettigheder, SQL) udløser pandas-motoren; andre fejl er rigtige fejl
+SQL_MOTOR_FEJL = (ProgrammingError, DatabaseError)
+
+# --- POSITIONSDATA (fra den statiske spillerliste i data/players/player_mapping.py) ---
+POSITION_MAP = {
+    str(p.get('player_optauuid')).strip(): p.get('position', 'Ukendt')
+    for p in _STATIC_PLAYERS if p.get('player_optauuid')
+}
+
+KATEGORIER_DER_KRAEVER_QUALIFIER = {
+    "indlaeg",
+    "afgoerende_pasninger",
+    "keeper_distribution",
+    "corner_frispark",
+    "blokeringer",
+}
+
+ALLE_SPQ_KATEGORIER = sorted({
+    key
+    for pos_dict in POSITION_ACTIONS.values()
+    for side_liste in pos_dict.values()
+    for key in side_liste
+})
+
+
+def tilfoej_kategori_kolonner(df_stats: pd.DataFrame, df_events: pd.DataFrame, category_keys) -> pd.DataFrame:
+    """
+    Beriger en stats-dataframe (indekseret på player_optauuid) med én kolonne
+    pr. aktionskategori fra spiller_qualifiers.ACTION_CATEGORIES.
+
+    Vektoriseret: qualifier-match slås op i framens qualifier-indeks
+    (data/utils/qualifier_index.py), der bygges én gang for hele df_events.
+    """
+    if df_events is None or df_events.empty:
+        for key in category_keys:
+            df_stats[key] = 0
+        return df_stats
+
+    for key in category_keys:
+        cat = ACTION_CATEGORIES[key]
+        type_mask = df_events['event_typeid'].isin(cat['type_ids'])
+
+        if key in KATEGORIER_DER_KRAEVER_QUALIFIER and cat['qualifier_ids']:
+            final_mask = type_mask & qualifier_index(df_events).any_of(cat['qualifier_ids'])
+        else:
+            final_mask = type_mask
+
+        counts = df_events[final_mask].groupby('player_optauuid', observed=True).size()
+        df_stats[key] = counts.reindex(df_stats.index, fill_value=0).astype('Int64')
+
+    return df_stats
+
+
+def tilfoej_fremadrettede_pasninger(df_stats: pd.DataFrame, df_events: pd.DataFrame) -> pd.DataFrame:
+    """
+    Tæller fremadrettede pasninger - en pasning der flytter bolden fremad
+    (end_x > event_x), samme definition som "Offensive pasninger"-visningen
+    i Spilleraktioner-fanen. Kræver slutkoordinater (end_x/end_y) i data;
+    findes de ikke, sættes kolonnen til 0 for alle spillere.
+    """
+    if df_events is None or df_events.empty or 'end_x' not in df_events.columns:
+        df_stats['fremadrettede_pasninger'] = 0
+        return df_stats
+
+    mask = (
+        (df_events['event_typeid'] == 1)
+        & df_events['end_x'].notna()
+        & (df_events['end_x'] > df_events['event_x'])
+    )
+    counts = df_events[mask].groupby('player_optauuid', observed=True).size()
+    df_stats['fremadrettede_pasninger'] = counts.reindex(df_stats.index, fill_value=0).astype('Int64')
+    return df_stats
+
+
+def _event_flag(df_events: pd.DataFrame) -> pd.DataFrame:
+    """
+    Alle tællinger i _byg_event_stats som 0/1-kolonner, beregnet i ét gennemløb af hele framen.
+    Kolonnenavnene er de færdige stats-kolonner, så de kan summeres direkte pr. spiller.
+    """
+    et = df_events['event_typeid']
+    qi = qualifier_index(df_events)
+    er_dribling = et == 3
+    nul = pd.Series(0, index=df_events.index)
+    flag = {
+        'Aktioner': pd.Series(1, index=df_events.index),
+        'Gule_kort': har_qualifier_maske(df_events, 17, 31),
+        'Roede_kort': har_qualifier_maske(df_events, 17, 33),
+        'Indskiftet': et == 19,
+        'Udskiftet': et == 18,
+        'Pasninger': df_events['Pasninger_Total'] if 'Pasninger_Total' in df_events.columns else nul,
+        'Pasninger_Succes': df_events['Pasninger_Succes'] if 'Pasninger_Succes' in df_events.columns else nul,
+        'Stikninger': har_qualifier_maske(df_events, 1, 4),
+        'Indlæg': har_qualifier_maske(df_events, 1, [2, 155]),
+        'Afslutninger': et.isin([13, 14, 15, 16]),
+        'Erobringer': et.isin([7, 8, 12, 49]),
+        'Driblinger': er_dribling,
+        'Driblinger_Succes': er_dribling & qi.none_of(211),
+        'Gennembrud_Overtake': er_dribling & qi.has_qualifier(465),
+        'Rum_Driblinger_Space': er_dribling & qi.has_qualifier(464),
+        'Offensive_Dueller': qi.has_qualifier(286),
+        'Defensive_Dueller': qi.has_qualifier(285),
+        'Defensive_1v1_Stoppet': qi.has_qualifier(467),
+        'Chancer_skabt': qi.has_qualifier(210),
+        'Key_Passes': qi.has_qualifier(210),
+        'Tacklinger': et == 7,
+        'Clearinger': et == 12,
+        'Blokeringer': et == 55,
+        'Interceptioner': et == 5,
+        'Frispark_imod': et == 4,
+    }
+    return pd.DataFrame({k: v.to_numpy().astype('int64') for k, v in flag.items()}, index=df_events.index)
+
+
+def _byg_event_stats(df_events: pd.DataFrame, pr_kamp: bool = False) -> pd.DataFrame:
+    """
+    Fælles spiller-stats, brugt til både liga og hold: event-flag i ét gennemløb
+    og derefter én groupby().agg() pr. (spiller, visningsnavn).
+    pr_kamp=True grupperer også på kamp og giver et (match_optauuid, player_optauuid)-indeks.
+    """
+    flag = _event_flag(df_events)
+    flag['player_optauuid'] = df_events['player_optauuid']
+    flag['visningsnavn'] = df_events['visningsnavn']
+    agg = {k: (k, 'sum') for k in EVENT_STATS_KOLONNER if k != 'Kampe'}
+    if 'match_optauuid' in df_events.columns:
+        flag['match_optauuid'] = df_events['match_optauuid']
+        agg['Kampe'] = ('match_optauuid', 'nunique')
+
+    noegler = ['player_optauuid']
+    if pr_kamp:
+        noegler = ['match_optauuid'] + noegler
+        flag['match_optauuid'] = df_events['match_optauuid'].astype(str)
+
+    stats = flag.groupby(noegler + ['visningsnavn'], observed=True).agg(**agg)
+    if 'Kampe' not in stats.columns:
+        stats['Kampe'] = 1
+    stats = stats[EVENT_STATS_KOLONNER].astype('int64')
+    stats = stats.reset_index().drop_duplicates(subset=noegler)
+    # Kategoriske nøgler (komprimer_events) -> almindelige strenge i den færdige stats-tabel
+    for col in noegler + ['visningsnavn']:
+        stats[col] = stats[col].astype(object)
+    return stats.set_index(noegler)
+
+
+EVENT_STATS_KOLONNER = [
+    'Kampe', 'Aktioner', 'Gule_kort', 'Roede_kort', 'Indskiftet', 'Udskiftet',
+    'Pasninger', 'Pasninger_Succes', 'Stikninger', 'Indlæg', 'Afslutninger', 'Erobringer',
+    'Driblinger', 'Driblinger_Succes', 'Gennembrud_Overtake', 'Rum_Driblinger_Space',
+    'Offensive_Dueller', 'Defensive_Dueller', 'Defensive_1v1_Stoppet', 'Chancer_skabt',
+    'Key_Passes', 'Tacklinger', 'Clearinger', 'Blokeringer', 'Interceptioner', 'Frispark_imod',
+]
+
+
+def _sql_kategorier() -> dict:
+    """ACTION_CATEGORIES omsat til (type_ids, qualifier_ids) til SQL-motoren - samme regler som tilfoej_kategori_kolonner."""
+    kategorier = {}
+    for key in ALLE_SPQ_KATEGORIER:
+        cat = ACTION_CATEGORIES[key]
+        qual_ids = cat['qualifier_ids'] if key in KATEGORIER_DER_KRAEVER_QUALIFIER and cat['qualifier_ids'] else None
+        kategorier[key] = (cat['type_ids'], qual_ids)
+    return kategorier
+
+
+def _event_ekstra(df_events: pd.DataFrame, index) -> pd.DataFrame:
+    """Mål, assists, kategori-kolonner og fremadrettede pasninger talt på rå events (pandas-motoren)."""
+    ekstra = pd.DataFrame(index=index)
+    ekstra['Mål'] = df_events[df_events['event_typeid'] == 16].groupby('player_optauuid', observed=True).size().reindex(index, fill_value=0)
+    ekstra['Assists'] = assist_maske(df_events).astype(int).groupby(df_events['player_optauuid'], observed=True).sum().reindex(index, fill_value=0)
+    ekstra = tilfoej_kategori_kolonner(ekstra, df_events, ALLE_SPQ_KATEGORIER)
+    ekstra = tilfoej_fremadrettede_pasninger(ekstra, df_events)
+    return ekstra
+
+
+def _stats_fra_aggregater(df_agg: pd.DataFrame, hold_optauuid: str = None):
+    """
+    Samler SQL-motorens (spiller, hold)-rækker til samme form som _byg_event_stats
+    (indeks player_optauuid, visningsnavn + EVENT_STATS_KOLONNER) plus ekstra-kolonnerne.
+    En spiller optræder kun for ét hold pr. kamp, så Kampe kan summeres på tværs af hold.
+    """
+    if hold_optauuid is not None:
+        df_agg = df_agg[df_agg['hold_optauuid'] == hold_optauuid]
+    if df_agg.empty:
+        return pd.DataFrame(), pd.DataFrame()
+
+    tal_kolonner = [c for c in df_agg.columns if c not in ('player_optauuid', 'hold_optauuid', 'visningsnavn', 'match_name', 'first_name')]
+    navne = df_agg.groupby('player_optauuid')['visningsnavn'].first() if 'visningsnavn' in df_agg.columns else df_agg.groupby('player_optauuid')['match_name'].first()
+    summer = df_agg.groupby('player_optauuid')[tal_kolonner].sum().astype('int64')
+
+    event_stats = summer[EVENT_STATS_KOLONNER].copy()
+    event_stats.insert(0, 'visningsnavn', navne)
+    ekstra = summer.drop(columns=EVENT_STATS_KOLONNER)
+    return event_stats, ekstra
+
+
+def _saml_truppen_stats(event_stats: pd.DataFrame, ekstra: pd.DataFrame, expected: pd.DataFrame, er_hold: bool) -> pd.DataFrame:
+    """Fælles efterbehandling for begge motorer: xG/minutter, mål/assists, procenter, position og kategorier."""
+    stats = event_stats.copy()
+    stats['Minutter'] = expected['minutes'].reindex(stats.index, fill_value=0).round(0).astype('Int64')
+    stats['xG'] = expected['xg'].reindex(stats.index, fill_value=0).round(2)
+    stats['xA'] = expected['xa'].reindex(stats.index, fill_value=0).round(2)
+    stats['Mål'] = ekstra['Mål'].reindex(stats.index, fill_value=0).astype('Int64')
+    stats['Assists'] = ekstra['Assists'].reindex(stats.index, fill_value=0).astype('Int64')
+    stats['Pasningsprocent'] = ((stats['Pasninger_Succes'] / stats['Pasninger']) * 100).where(stats['Pasninger'] > 0, 0).round(1)
+    stats['Position'] = stats.index.to_series().apply(lambda u: POSITION_MAP.get(str(u).strip(), 'Ukendt'))
+    if er_hold:
+        for col in ['Kampe', 'Aktioner', 'Gule_kort', 'Roede_kort', 'Indskiftet', 'Udskiftet', 'Pasninger', 'Pasninger_Succes']:
+            if col in stats.columns:
+                stats[col] = stats[col].fillna(0).astype('Int64')
+    for col in ekstra.columns:
+        if col not in ('Mål', 'Assists'):
+            stats[col] = ekstra[col].reindex(stats.index, fill_value=0).astype('Int64')
+    return stats
+
+
+def _agger_expected(df_expected: pd.DataFrame, hold_optauuid: str = None) -> pd.DataFrame:
+    """
+    Aggregerer df_expected (xG/xA/minutter - én række pr. spiller PR. KAMP)
+    til sæson-totaler pr. spiller. Sæt hold_optauuid for kun at summere
+    kampe spillet for det pågældende hold (bruges til holdets egne spillere,
+    så evt. klubskifte midt i sæsonen ikke blander minutter/xG sammen).
+    """
+    if df_expected is None or df_expected.empty:
+        return pd.DataFrame(columns=['xg', 'xa', 'minutes'])
+
+    df = df_expected.copy()
+    if hold_optauuid is not None and 'hold_optauuid' in df.columns:
+        df = df[df['hold_optauuid'] == hold_optauuid]
+
+    for col in ('xg', 'xa', 'minutes'):
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+        else:
+            df[col] = 0
+
+    if 'player_optauuid' not in df.columns or df.empty:
+        return pd.DataFrame(columns=['xg', 'xa', 'minutes'])
+
+    return df.groupby('player_optauuid')[['xg', 'xa', 'minutes']].sum()
+
+
+def _forbered_events(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.dropna(subset=['visningsnavn']).copy()
+    df['event_timestamp'] = pd.to_datetime(df['event_timestamp_str'])
+    df['qual_list'] = df['qualifiers'].fillna('').str.split(',')
+    df['Pasninger_Total'] = (df['event_typeid'] == 1).astype(int)
+    df['Pasninger_Succes'] = ((df['event_typeid'] == 1) & (df['outcome'] == 1)).astype(int)
+    return komprimer_events(df)
+
+@st.cache_data(ttl=600, show_spinner="Indlæser spillerliste...")
+def hent_navne_map() -> dict:
+    try:
+        csv_path = os.path.join(os.getcwd(), 'data', 'players', '1div_overskrivning.csv')
+        df_csv = pd.read_csv(csv_path)
+        return dict(zip(df_csv['PLAYER_OPTAUUID'].astype(str), df_csv['NAVN']))
+    except Exception:
+        return {}
+
+
+@st.cache_data(ttl=1800, show_spinner=False)
+def hent_holdliste(_conn) -> dict:
+    df_teams_raw = koer_query(_conn, "liga_holdliste", liga_ids=kanonisk_liste(LIGA_IDS))
+    if df_teams_raw is not None:
+        df_teams_raw.columns = df_teams_raw.columns.str.lower()
+    else:
+        df_teams_raw = pd.DataFrame()
+
+    mapping_lookup = {
+        str(info['opta_uuid']).lower().replace('t', ''): name
+        for name, info in TEAMS.items() if 'opta_uuid' in info
+    }
+
+    team_map = {}
+    if not df_teams_raw.empty:
+        for _, r in df_teams_raw.iterrows():
+            uuid_clean = str(r['contestanthome_optauuid']).lower().replace('t', '')
+            if uuid_clean in mapping_lookup:
+                team_map[mapping_lookup[uuid_clean]] = r['contestanthome_optauuid']
+    return team_map
+
+
+@st.cache_resource(ttl=300, show_spinner="Beregner ligaens spillerstats...")
+def byg_liga_stats(_conn, navne_map: dict, motor: str = None):
+    """
+    Holdsuafhængigt trin: ligaens spiller-stats og ALLE holds trup-stats beregnes
+    én gang og deles af alle hold og sessioner (cache_resource - ingen kopi pr. kald,
+    så resultatet må ikke ændres af kalderen). Returnerer None uden data, ellers en dict:
+      liga         - truppen_stats_liga (basis for percentiler/sammenligning)
+      hold_stats   - {hold_optauuid: truppen_stats}
+      expected     - renset df_expected
+      motor        - "sql" eller "pandas"
+    """
+    motor = motor or STATS_MOTOR
+    if motor == "sql":
+        try:
+            return _liga_stats_sql(_conn, navne_map)
+        except SQL_MOTOR_FEJL as e:
+            # fx manglende rettigheder eller SQL-fejl - fald tilbage til pandas-motoren, men vis hvorfor
+            st.warning(f"SQL-motoren fejlede ({type(e).__name__}: {e}) - spiller-stats tælles lokalt i stedet.")
+    return _liga_stats_pandas(_conn, navne_map)
+
+
+@st.cache_data(ttl=300, show_spinner="Behandler spiller- og holddata...")
+def byg_spiller_og_holdstats(_conn, valgt_uuid_hold: str, navne_map: dict):
+    """
+    Spillersidernes datagrundlag for ét hold: holdets events, trup-stats, liga-stats
+    og xG-data. Det tunge ligger i byg_liga_stats; her vælges kun holdets udsnit, så
+    skift af hold ikke genberegner ligaen.
+    Cachet pr. (valgt_uuid_hold, navne_map) og delt mellem alle tre spillersider.
+    """
+    liga = byg_liga_stats(_conn, navne_map)
+    df_all = None
+    if liga is not None and liga['motor'] == "sql":
+        try:
+            df_all = _hold_events_sql(_conn, valgt_uuid_hold, navne_map)
+        except SQL_MOTOR_FEJL as e:
+            st.warning(f"Holdets events kunne ikke hentes med SQL-motoren ({type(e).__name__}: {e}) - bruger pandas-motoren.")
+            liga = byg_liga_stats(_conn, navne_map, motor="pandas")
+
+    if liga is None:
+        tom = pd.DataFrame()
+        return tom, tom, tom, tom, tom
+
+    if df_all is None:
+        df_all = _hold_events_pandas(_conn, valgt_uuid_hold, navne_map)
+    truppen_stats = liga['hold_stats'].get(valgt_uuid_hold, pd.DataFrame())
+    return df_all, pd.DataFrame(), truppen_stats, liga['liga'], liga['expected']
+
+
+def _liga_stats_pandas(_conn, navne_map: dict):
+    # Ligaens events læses kamp-bid for kamp-bid; kun deltællingerne (liga og pr. hold)
+    # gemmes undervejs og lægges sammen til sidst, så højst én bid er i hukommelsen.
+    delresultater, kamp_par = [], []
+    hold_del, hold_kamp_par = {}, {}
+    for df_batch in hent_events_batchvis(_conn, DB, LIGA_IDS, navne_map):
+        df_batch = _forbered_events(df_batch)
+        if df_batch.empty:
+            continue
+        event_stats = _byg_event_stats(df_batch)
+        delresultater.append((event_stats, _event_ekstra(df_batch, event_stats.index)))
+        kamp_par.append(df_batch[['player_optauuid', 'match_optauuid']].astype(str).drop_duplicates())
+        if 'hold_optauuid' not in df_batch.columns:
+            continue
+        for hold, df_hold in df_batch.groupby(df_batch['hold_optauuid'].astype(str), sort=False):
+            event_stats_hold = _byg_event_stats(df_hold)
+            hold_del.setdefault(hold, []).append((event_stats_hold, _event_ekstra(df_hold, event_stats_hold.index)))
+            hold_kamp_par.setdefault(hold, []).append(
+                df_hold[['player_optauuid', 'match_optauuid']].astype(str).drop_duplicates()
+            )
+
+    if not delresultater:
+        return None
+
+    df_expected = hent_expected(_conn, DB, LIGA_IDS)
+    event_stats_liga, ekstra_liga = _saml_delresultater(delresultater, kamp_par)
+    truppen_stats_liga = _saml_truppen_stats(event_stats_liga, ekstra_liga, _agger_expected(df_expected), er_hold=False)
+
+    hold_stats = {}
+    for hold, dele in hold_del.items():
+        event_stats_hold, ekstra_hold = _saml_delresultater(dele, hold_kamp_par[hold])
+        hold_stats[hold] = _saml_truppen_stats(
+            event_stats_hold, ekstra_hold, _agger_expected(df_expected, hold_optauuid=hold), er_hold=True
+        )
+
+    return {
+        'liga': truppen_stats_liga, 'hold_stats': hold_stats,
+        'expected': _rens_expected(df_expected), 'motor': "pandas",
+    }
+
+
+def _hold_events_pandas(_conn, valgt_uuid_hold: str, navne_map: dict) -> pd.DataFrame:
+    """Pandas-motorens udgave af _hold_events_sql: holdets rækker plukkes ud af event-lageret bid for bid."""
+    dele = []
+    for df_batch in hent_events_batchvis(_conn, DB, LIGA_IDS, navne_map):
+        if 'hold_optauuid' not in df_batch.columns:
+            continue
+        df_batch = df_batch[df_batch['hold_optauuid'].astype(str) == str(valgt_uuid_hold)]
+        if not df_batch.empty:
+            dele.append(_forbered_events(df_batch))
+    if not dele:
+        return pd.DataFrame()
+    df_all = komprimer_events(pd.concat(dele, ignore_index=True))
+    df_all['Action_Label'] = _action_labels(df_all)
+    return df_all
+
+
+@st.cache_data(ttl=300, show_spinner="Beregner kampstatistik...")
+def hent_kamp_stats(_conn, valgt_uuid_hold: str, navne_map: dict) -> pd.DataFrame:
+    """
+    Faktatabel med én række pr. (kamp, spiller) for holdet - samme kolonner som
+    Kampoversigt-fanen viser. Bygges én gang pr. hold oven på byg_spiller_og_holdstats,
+    så valg af kamp i fanen kun er et opslag: kamp_stats.xs(kamp_uuid, level='match_optauuid').
+    """
+    df_all, _, _, _, df_expected = byg_spiller_og_holdstats(_conn, valgt_uuid_hold, navne_map)
+    return byg_kamp_stats(df_all, df_expected)
+
+
+def byg_kamp_stats(df_all: pd.DataFrame, df_expected: pd.DataFrame) -> pd.DataFrame:
+    if df_all is None or df_all.empty or 'match_optauuid' not in df_all.columns:
+        return pd.DataFrame()
+
+    stats = _byg_event_stats(df_all, pr_kamp=True)
+    noegler = [df_all['match_optauuid'].astype(str), df_all['player_optauuid'].astype(str)]
+
+    def pr_kamp_og_spiller(maske):
+        return maske.astype(int).groupby(noegler).sum().reindex(stats.index, fill_value=0)
+
+    if df_expected is not None and not df_expected.empty and {'match_optauuid', 'player_optauuid'} <= set(df_expected.columns):
+        expected = df_expected.groupby(
+            [df_expected['match_optauuid'].astype(str), df_expected['player_optauuid'].astype(str)]
+        )[['xg', 'xa', 'minutes']].sum()
+        expected.index.names = stats.index.names
+        expected = expected.reindex(stats.index, fill_value=0)
+    else:
+        expected = pd.DataFrame(0.0, index=stats.index, columns=['xg', 'xa', 'minutes'])
+
+    stats['Minutter'] = expected['minutes'].round(0).astype('Int64')
+    stats['xG'] = expected['xg'].round(2)
+    stats['xA'] = expected['xa'].round(2)
+    stats['Mål'] = pr_kamp_og_spiller(df_all['event_typeid'] == 16).astype('Int64')
+    stats['Assists'] = pr_kamp_og_spiller(assist_maske(df_all)).astype('Int64')
+    stats['Pasningsprocent'] = ((stats['Pasninger_Succes'] / stats['Pasninger']) * 100).where(stats['Pasninger'] > 0, 0).round(1)
+    stats['Position'] = stats.index.get_level_values('player_optauuid').map(lambda u: POSITION_MAP.get(str(u).strip(), 'Ukendt'))
+    if 'end_x' in df_all.columns:
+        fremad = (df_all['event_typeid'] == 1) & df_all['end_x'].notna() & (df_all['end_x'] > df_all['event_x'])
+        stats['fremadrettede_pasninger'] = pr_kamp_og_spiller(fremad).astype('Int64')
+    else:
+        stats['fremadrettede_pasninger'] = 0
+    return stats
+
+
+def _saml_delresultater(delresultater, kamp_par):
+    """
+    Lægger deltællingerne fra hver event-bid sammen til ét sæt liga-stats.
+    Kampe tælles ud fra de unikke (spiller, kamp)-par, så en kamp der er delt
+    over to bidder ikke tælles dobbelt.
+    """
+    event_stats = pd.concat([d[0] for d in delresultater])
+    navne = event_stats.groupby(level=0)['visningsnavn'].first()
+    tal = event_stats.drop(columns=['visningsnavn']).groupby(level=0).sum()
+    kampe = pd.concat(kamp_par).drop_duplicates().groupby('player_optauuid').size()
+    tal['Kampe'] = kampe.reindex(tal.index, fill_value=0).astype(tal['Kampe'].dtype)
+    tal.insert(0, 'visningsnavn', navne)
+    tal.index.name = 'player_optauuid'
+
+    ekstra = pd.concat([d[1] for d in delresultater]).groupby(level=0).sum()
+    return tal, ekstra
+
+
+def _liga_stats_sql(_conn, navne_map: dict):
+    """
+    SQL-motoren: liga-stats tælles i Snowflake (én række pr. spiller pr. hold), og
+    hvert holds trup-stats er blot et udsnit af de rækker. Ligaens rå events hentes
+    netop ikke - holdets egne events hentes pr. hold i _hold_events_sql.
+    """
+    df_expected, df_agg = hent_liga_aggregater(_conn, DB, LIGA_IDS, navne_map, _sql_kategorier())
+    if df_agg.empty:
+        return None
+
+    event_stats_liga, ekstra_liga = _stats_fra_aggregater(df_agg)
+    truppen_stats_liga = _saml_truppen_stats(event_stats_liga, ekstra_liga, _agger_expected(df_expected), er_hold=False) if not event_stats_liga.empty else pd.DataFrame()
+
+    hold_stats = {}
+    for hold in df_agg['hold_optauuid'].dropna().astype(str).unique():
+        event_stats_hold, ekstra_hold = _stats_fra_aggregater(df_agg, hold_optauuid=hold)
+        if not event_stats_hold.empty:
+            hold_stats[hold] = _saml_truppen_stats(
+                event_stats_hold, ekstra_hold, _agger_expected(df_expected, hold_optauuid=hold), er_hold=True
+            )
+
+    return {
+        'liga': truppen_stats_liga, 'hold_stats': hold_stats,
+        'expected': _rens_expected(df_expected), 'motor': "sql",
+    }
+
+
+def _hold_events_sql(_conn, valgt_uuid_hold: str, navne_map: dict) -> pd.DataFrame:
+    df_all = hent_hold_events(_conn, DB, valgt_uuid_hold, LIGA_IDS, navne_map)
+    if not df_all.empty:
+        df_all = _forbered_events(df_all)
+        df_all['Action_Label'] = _action_labels(df_all)
+    return df_all
+
+
+def _action_labels(df_all: pd.DataFrame) -> pd.Series:
+    if df_all.empty:
+        return pd.Series(dtype=object, index=df_all.index)
+    return get_action_labels(df_all)
+
+
+def _rens_expected(df_expected: pd.DataFrame) -> pd.DataFrame:
+    if df_expected is None:
+        df_expected = pd.DataFrame()
+    elif not df_expected.empty:
+        df_expected = df_expected.copy()
+        for col in ('xg', 'xa', 'minutes'):
+            if col in df_expected.columns:
+                df_expected[col] = pd.to_numeric(df_expected[col], errors='coerce').fillna(0)
+
+    return df_expected
@@ -1,6 +1,13 @@
-import numpy as np
+import hashlib
 import pandas as pd
 
+from data.event_store import EventStore, query_uden_cache, match_ids_sql
+from data.sql.registry import sql_in_liste
+from data.data_load import stream_query
+
+# Bumpes når kolonnerne i _sql_events ændres, så gamle lagrede kampe ikke blandes med nye
+EVENTS_SQL_VERSION = 1
+
 
 def _rens_uuid(val):
     """Sikker rensning af Opta UUID, der fjerner evt. foranstillet 't' uden at røre 't' inde i strengen."""
@@ -13,41 +20,9 @@ def _rens_uuid(val):
 
 
 def _forbered_liga_ids(liga_ids):
-    """Sikrer at liga_ids altid konverteres til et sikkert SQL IN-format, uanset datatype."""
-    if liga_ids is None:
-        return "('__DUMMY__')"
-
-    if isinstance(liga_ids, pd.Series):
-        liga_ids = liga_ids.dropna().tolist()
-    elif isinstance(liga_ids, np.ndarray):
-        liga_ids = liga_ids.tolist()
-    elif isinstance(liga_ids, (str, int, float)):
-        s = str(liga_ids).strip()
-        if "," in s and not (
-            s.startswith("'") or s.startswith('"') or s.startswith("(")
-        ):
-            liga_ids = [item.strip() for item in s.split(",")]
-        else:
-            liga_ids = [s]
-    elif isinstance(liga_ids, (list, tuple, set)):
-        liga_ids = list(liga_ids)
-    else:
-        try:
-            liga_ids = list(liga_ids)
-        except Exception:
-            liga_ids = [str(liga_ids)]
-
-    clean_ids = []
-    for x in liga_ids:
-        if x is not None:
-            val = str(x).strip().strip("'\"()[]")
-            if val:
-                clean_ids.append(f"'{val}'")
-
-    if not clean_ids:
-        return "('__DUMMY__')"
-
-    return f"({', '.join(clean_ids)})"
+    """Sikrer at liga_ids altid konverteres til et sikkert SQL IN-format, uanset datatype.
+    Listen er sorteret og uden dubletter, så samme ligaer altid giver samme query-tekst."""
+    return sql_in_liste(liga_ids)
 
 
 def _anvend_player_mapping(df, navne_map):
@@ -80,13 +55,15 @@ def _anvend_player_mapping(df, navne_map):
     return df
 
 
-def hent_match_og_haendelsesdata(
-    conn, db_navn, valgt_uuid_hold, liga_ids, navne_map
-):
-    """Henter events, forventede mål og database-stats med navne fra player_mapping."""
-    liga_ids_sql = _forbered_liga_ids(liga_ids)
-
-    sql_events = (
+def _sql_events(db_navn, liga_ids_sql, match_ids=None, hold_uuid=None):
+    """
+    Event-query med qualifiers; med match_ids/hold_uuid begrænses den til netop de kampe/det hold.
+    Holdet bindes som %(hold)s, så kalderen skal give params={"hold": ...} med til conn.query.
+    """
+    match_filter = f"AND e.MATCH_OPTAUUID IN {match_ids_sql(match_ids)}" if match_ids else ""
+    if hold_uuid:
+        match_filter += " AND e.EVENT_CONTESTANT_OPTAUUID = %(hold)s"
+    return (
         """
         SELECT 
             e.EVENT_X, e.EVENT_Y, e.EVENT_TYPEID, e.MATCH_OPTAUUID, 
@@ -104,6 +81,7 @@ def hent_match_og_haendelsesdata(
         LEFT JOIN {db_navn}.OPTA_QUALIFIERS q ON e.EVENT_OPTAUUID = q.EVENT_OPTAUUID
         WHERE m.TOURNAMENTCALENDAR_OPTAUUID IN {liga_ids_sql}
           AND e.EVENT_TIMESTAMP >= '2026-07-01'
+          {match_filter}
         GROUP BY 
             e.EVENT_X, e.EVENT_Y, e.EVENT_TYPEID, e.MATCH_OPTAUUID, 
             p.MATCH_NAME, p.FIRST_NAME, p.SHORT_LAST_NAME, m.MATCHLENGTHMIN,
@@ -112,19 +90,69 @@ def hent_match_og_haendelsesdata(
     """
         .replace("{db_navn}", str(db_navn))
         .replace("{liga_ids_sql}", str(liga_ids_sql))
+        .replace("{match_filter}", match_filter)
     )
 
-    df_all = conn.query(sql_events)
 
-    if df_all is not None and not df_all.empty:
-        df_all.columns = df_all.columns.str.lower()
-        for col in ["end_x", "end_y", "matchlenghtmin"]:
-            if col in df_all.columns:
-                df_all[col] = pd.to_numeric(df_all[col], errors="coerce")
-        df_all = _anvend_player_mapping(df_all, navne_map)
+def _event_lager(conn, db_navn, liga_ids_sql):
+    """
+    Synkroniserer det lokale event-lager (kun nye/ændrede kampe hentes, og de streames
+    batchvis ind i lageret) og returnerer (lager, sæsonens match_ids).
+    Returnerer (None, None), hvis lageret ikke kan bruges.
+    """
+    try:
+        scope = hashlib.sha1(f"{db_navn}|{liga_ids_sql}".encode("utf-8")).hexdigest()[:12]
+        store = EventStore(f"liga_{scope}_v{EVENTS_SQL_VERSION}")
+    except OSError:
+        return None, None
+
+    df_kampe = query_uden_cache(
+        conn,
+        f"SELECT DISTINCT MATCH_OPTAUUID, MATCH_STATUS FROM {db_navn}.OPTA_MATCHINFO "
+        f"WHERE TOURNAMENTCALENDAR_OPTAUUID IN {liga_ids_sql}",
+    )
+    if df_kampe is None or df_kampe.empty:
+        return store, []
+    df_kampe.columns = df_kampe.columns.str.upper()
+    status_map = dict(zip(
+        df_kampe["MATCH_OPTAUUID"].astype(str),
+        df_kampe["MATCH_STATUS"].fillna("").astype(str),
+    ))
+
+    store.opdater(
+        status_map,
+        lambda match_ids: stream_query(conn, _sql_events(db_navn, liga_ids_sql, match_ids), use_cache=False),
+    )
+    return store, list(status_map.keys())
+
+
+def _rens_events(df, navne_map):
+    """Små bogstaver, numeriske slutkoordinater og visningsnavne fra player_mapping."""
+    df.columns = df.columns.str.lower()
+    for col in ["end_x", "end_y", "matchlenghtmin"]:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    return _anvend_player_mapping(df, navne_map)
+
+
+def hent_events_batchvis(conn, db_navn, liga_ids, navne_map, kampe_pr_batch=40):
+    """
+    Generator over sæsonens events i bidder af kampe_pr_batch kampe (aldrig hele
+    sæsonen på én gang). Hver bid er renset med _rens_events.
+    """
+    liga_ids_sql = _forbered_liga_ids(liga_ids)
+    store, match_ids = _event_lager(conn, db_navn, liga_ids_sql)
+    if store is None:
+        batches = stream_query(conn, _sql_events(db_navn, liga_ids_sql))
     else:
-        df_all = pd.DataFrame()
+        batches = store.laes_batchvis(match_ids, kampe_pr_batch)
+    for df in batches:
+        if df is not None and not df.empty:
+            yield _rens_events(df, navne_map)
+
 
+def _hent_expected(conn, db_navn, liga_ids_sql):
+    """xG, xA og minutter - én række pr. spiller pr. kamp."""
     sql_expected = (
         """
         SELECT 
@@ -148,71 +176,129 @@ def hent_match_og_haendelsesdata(
         df_expected.columns = df_expected.columns.str.lower()
     else:
         df_expected = pd.DataFrame()
+    return df_expected
 
-    sql_db_stats = (
-        """
-        WITH EventQualifiers AS (
-            SELECT 
-                e.EVENT_OPTAUUID, e.PLAYER_OPTAUUID, e.EVENT_TYPEID, e.EVENT_TIMESTAMP, e.MATCH_OPTAUUID,
-                e.EVENT_CONTESTANT_OPTAUUID as HOLD_OPTAUUID,
-                p.MATCH_NAME, p.FIRST_NAME, p.SHORT_LAST_NAME,
-                LISTAGG(q.QUALIFIER_QID, ',') WITHIN GROUP (ORDER BY q.QUALIFIER_QID) as QUALIFIERS
-            FROM {db_navn}.OPTA_EVENTS e
-            JOIN {db_navn}.OPTA_MATCHINFO m ON e.MATCH_OPTAUUID = m.MATCH_OPTAUUID
-            JOIN (SELECT DISTINCT PLAYER_OPTAUUID, FIRST_NAME, LAST_NAME, SHORT_LAST_NAME, MATCH_NAME FROM {db_navn}.OPTA_MATCH_LINEUPS WHERE FIRST_NAME IS NOT NULL) p 
-                ON e.PLAYER_OPTAUUID = p.PLAYER_OPTAUUID
-            LEFT JOIN {db_navn}.OPTA_QUALIFIERS q ON e.EVENT_OPTAUUID = q.EVENT_OPTAUUID
-            WHERE m.TOURNAMENTCALENDAR_OPTAUUID IN {liga_ids_sql}
-              AND e.EVENT_TIMESTAMP >= '2026-07-01'
-            GROUP BY e.EVENT_OPTAUUID, e.PLAYER_OPTAUUID, e.EVENT_TYPEID, e.EVENT_TIMESTAMP, e.MATCH_OPTAUUID, e.EVENT_CONTESTANT_OPTAUUID, p.FIRST_NAME, p.SHORT_LAST_NAME, p.MATCH_NAME
-        ),
-        SortedEvents AS (
-            SELECT 
-                PLAYER_OPTAUUID, HOLD_OPTAUUID, MATCH_NAME, FIRST_NAME, SHORT_LAST_NAME, EVENT_TYPEID, MATCH_OPTAUUID, QUALIFIERS,
-                LAG(PLAYER_OPTAUUID) OVER (PARTITION BY MATCH_OPTAUUID ORDER BY EVENT_TIMESTAMP) AS ASSIST_PLAYER_UUID,
-                LAG(EVENT_TYPEID) OVER (PARTITION BY MATCH_OPTAUUID ORDER BY EVENT_TIMESTAMP) AS PREV_EVENT_TYPEID,
-                LAG(QUALIFIERS) OVER (PARTITION BY MATCH_OPTAUUID ORDER BY EVENT_TIMESTAMP) AS PREV_QUALIFIERS
-            FROM EventQualifiers
-        ),
-        PlayerGoals AS (
-            SELECT PLAYER_OPTAUUID, 
-                MAX(HOLD_OPTAUUID) AS HOLD_OPTAUUID,
-                MAX(MATCH_NAME) AS MATCH_NAME, MAX(FIRST_NAME) AS FIRST_NAME, MAX(SHORT_LAST_NAME) AS SHORT_LAST_NAME,
-                SUM(CASE WHEN EVENT_TYPEID = 16 THEN 1 ELSE 0 END) AS GOALS
-            FROM SortedEvents
-            GROUP BY PLAYER_OPTAUUID
-        ),
-        PlayerAssists AS (
-            SELECT ASSIST_PLAYER_UUID AS PLAYER_OPTAUUID, COUNT(*) AS ASSISTS
-            FROM SortedEvents
-            WHERE EVENT_TYPEID = 16 
-              AND ASSIST_PLAYER_UUID IS NOT NULL
-              AND ASSIST_PLAYER_UUID != PLAYER_OPTAUUID
-              AND (QUALIFIERS LIKE '%29%' OR PREV_QUALIFIERS LIKE '%210%')
-            GROUP BY ASSIST_PLAYER_UUID
-        )
-        SELECT 
-            g.PLAYER_OPTAUUID as player_optauuid, g.HOLD_OPTAUUID as hold_optauuid, g.MATCH_NAME as match_name,
-            g.FIRST_NAME as first_name, g.SHORT_LAST_NAME as short_last_name,
-            g.GOALS as goals, COALESCE(a.ASSISTS, 0) as assists
-        FROM PlayerGoals g
-        LEFT JOIN PlayerAssists a ON g.PLAYER_OPTAUUID = a.PLAYER_OPTAUUID
+
+def hent_expected(conn, db_navn, liga_ids):
+    return _hent_expected(conn, db_navn, _forbered_liga_ids(liga_ids))
+
+
+def _sql_har_q(qid):
+    """Qualifier-tjek på LISTAGG-strengen; kommaerne omkring sikrer at fx 21 ikke matcher 210."""
+    return f"(',' || COALESCE(QUALIFIERS, '') || ',') LIKE '%,{int(qid)},%'"
+
+
+def _sql_tael(betingelse, alias):
+    return f'SUM(CASE WHEN {betingelse} THEN 1 ELSE 0 END) AS "{alias}"'
+
+
+def _sql_spiller_aggregater(kilde, kategorier=None):
+    """
+    Aggregerer event-rækkerne i `kilde` til én række pr. (spiller, hold) med de
+    samme tal som _byg_event_stats i data/spiller_load.py beregner i pandas.
+    kategorier: {navn: (type_ids, qualifier_ids eller None)} fra spiller_qualifiers.
+    Kilden skal have kolonnerne fra _sql_events samt END_X_NUM (numerisk END_X).
+    """
+    def typ(*ids):
+        return f"EVENT_TYPEID IN ({', '.join(str(int(i)) for i in ids)})"
+
+    def nogen_q(qids):
+        return "(" + " OR ".join(_sql_har_q(q) for q in qids) + ")"
+
+    kolonner = [
+        'COUNT(DISTINCT MATCH_OPTAUUID) AS "Kampe"',
+        'COUNT(*) AS "Aktioner"',
+        _sql_tael(f"{typ(17)} AND {_sql_har_q(31)}", "Gule_kort"),
+        _sql_tael(f"{typ(17)} AND {_sql_har_q(33)}", "Roede_kort"),
+        _sql_tael(typ(19), "Indskiftet"),
+        _sql_tael(typ(18), "Udskiftet"),
+        _sql_tael(typ(1), "Pasninger"),
+        _sql_tael(f"{typ(1)} AND OUTCOME = 1", "Pasninger_Succes"),
+        _sql_tael(f"{typ(1)} AND {_sql_har_q(4)}", "Stikninger"),
+        _sql_tael(f"{typ(1)} AND {nogen_q([2, 155])}", "Indlæg"),
+        _sql_tael(typ(13, 14, 15, 16), "Afslutninger"),
+        _sql_tael(typ(7, 8, 12, 49), "Erobringer"),
+        _sql_tael(typ(3), "Driblinger"),
+        _sql_tael(f"{typ(3)} AND NOT {_sql_har_q(211)}", "Driblinger_Succes"),
+        _sql_tael(f"{typ(3)} AND {_sql_har_q(465)}", "Gennembrud_Overtake"),
+        _sql_tael(f"{typ(3)} AND {_sql_har_q(464)}", "Rum_Driblinger_Space"),
+        _sql_tael(_sql_har_q(286), "Offensive_Dueller"),
+        _sql_tael(_sql_har_q(285), "Defensive_Dueller"),
+        _sql_tael(_sql_har_q(467), "Defensive_1v1_Stoppet"),
+        _sql_tael(_sql_har_q(210), "Chancer_skabt"),
+        _sql_tael(_sql_har_q(210), "Key_Passes"),
+        _sql_tael(typ(7), "Tacklinger"),
+        _sql_tael(typ(12), "Clearinger"),
+        _sql_tael(typ(55), "Blokeringer"),
+        _sql_tael(typ(5), "Interceptioner"),
+        _sql_tael(typ(4), "Frispark_imod"),
+        _sql_tael(typ(16), "Mål"),
+        _sql_tael(_sql_har_q(210), "Assists"),
+    ]
+    for navn, (type_ids, qual_ids) in (kategorier or {}).items():
+        betingelse = typ(*type_ids)
+        if qual_ids:
+            betingelse += f" AND {nogen_q(qual_ids)}"
+        kolonner.append(_sql_tael(betingelse, navn))
+    kolonner.append(_sql_tael(f"{typ(1)} AND END_X_NUM IS NOT NULL AND END_X_NUM > EVENT_X", "fremadrettede_pasninger"))
+
+    return f"""
+        SELECT
+            PLAYER_OPTAUUID AS "player_optauuid",
+            HOLD_OPTAUUID AS "hold_optauuid",
+            MIN(MATCH_NAME) AS "match_name",
+            MIN(FIRST_NAME) AS "first_name",
+            {(","+chr(10)+"            ").join(kolonner)}
+        FROM {kilde}
+        GROUP BY PLAYER_OPTAUUID, HOLD_OPTAUUID
     """
-        .replace("{db_navn}", str(db_navn))
-        .replace("{liga_ids_sql}", str(liga_ids_sql))
-    )
 
-    df_db_stats = conn.query(sql_db_stats)
-    if df_db_stats is not None and not df_db_stats.empty:
-        df_db_stats.columns = df_db_stats.columns.str.lower()
-        df_db_stats = df_db_stats.drop_duplicates(
-            subset=["player_optauuid"]
-        ).copy()
-        df_db_stats = _anvend_player_mapping(df_db_stats, navne_map)
+
+def hent_liga_aggregater(conn, db_navn, liga_ids, navne_map, kategorier=None):
+    """
+    Holdsuafhængig del af hent_spiller_aggregater: tællingerne for hele ligaen
+    (én række pr. (spiller, hold)) samt xG-data. Returnerer (df_expected, df_aggregater).
+    """
+    liga_ids_sql = _forbered_liga_ids(liga_ids)
+
+    sql_agg = (
+        "WITH Events AS ("
+        + _sql_events(db_navn, liga_ids_sql)
+        + "), EventsNum AS (SELECT ev.*, TRY_CAST(ev.END_X AS FLOAT) AS END_X_NUM FROM Events ev)"
+        + _sql_spiller_aggregater("EventsNum", kategorier)
+    )
+    df_agg = conn.query(sql_agg)
+    if df_agg is not None and not df_agg.empty:
+        df_agg = _anvend_player_mapping(df_agg, navne_map)
     else:
-        df_db_stats = pd.DataFrame()
+        df_agg = pd.DataFrame()
+
+    df_expected = _hent_expected(conn, db_navn, liga_ids_sql)
+    return df_expected, df_agg
 
-    return df_all, df_expected, df_db_stats
+
+def hent_hold_events(conn, db_navn, valgt_uuid_hold, liga_ids, navne_map):
+    """Kun ét holds rå events (renset med _rens_events)."""
+    hold = str(valgt_uuid_hold).strip()
+    df_hold = conn.query(
+        _sql_events(db_navn, _forbered_liga_ids(liga_ids), hold_uuid=hold),
+        params={"hold": hold},
+    )
+    if df_hold is not None and not df_hold.empty:
+        return _rens_events(df_hold, navne_map)
+    return pd.DataFrame()
+
+
+def hent_spiller_aggregater(conn, db_navn, valgt_uuid_hold, liga_ids, navne_map, kategorier=None):
+    """
+    Server-side spiller-stats:
+    tællingerne beregnes i Snowflake og hentes som én række pr. (spiller, hold),
+    så kun holdets egne events og xG-data skal hentes rå.
+    Returnerer (df_hold_events, df_expected, df_aggregater).
+    """
+    df_expected, df_agg = hent_liga_aggregater(conn, db_navn, liga_ids, navne_map, kategorier)
+    df_hold = hent_hold_events(conn, db_navn, valgt_uuid_hold, liga_ids, navne_map)
+    return df_hold, df_expected, df_agg
 
 
 def hent_samlet_spiller_statistik(conn, db_navn, liga_ids, navne_map=None):
@@ -0,0 +1,152 @@
+# data/sql/registry.py
+"""
+Navngivne, versionerede SQL-skabeloner med bundne parametre.
+
+Snowflake genbruger kun et cachet resultat, når query-teksten er identisk.
+UUID'er, datoer og id-lister der flettes direkte ind via f-strings giver
+forskellig tekst for samme forespørgsel (tuple vs. enkelt id, rækkefølge fra
+et set, whitespace). Her bygges teksten derfor altid ens:
+  - whitespace normaliseres og queryen får et fast /* navn vN */ præfiks
+  - værdier sendes som parametre (%(navn)s) i stedet for at blive flettet ind
+  - id-lister sorteres og dubletter fjernes, så IN-lister altid står ens
+"""
+import re
+import numpy as np
+import pandas as pd
+
+DB = "KLUB_HVIDOVREIF.AXIS"
+
+# --- 1. KANONISKE IN-LISTER ---
+_TOKEN_RE = re.compile(r"'([^']*)'|\"([^\"]*)\"|([^,()\s'\"]+)")
+
+
+def kanonisk_liste(values):
+    """
+    Omdanner et vilkårligt id-input (enkelt værdi, liste, tuple, set, Series,
+    '(a, b)'-streng eller 'a,b'-streng) til en sorteret tuple af unikke strenge.
+    """
+    if values is None:
+        return ()
+    if isinstance(values, (pd.Series, pd.Index, np.ndarray)):
+        values = list(values)
+    if isinstance(values, (str, int, float, np.integer, np.floating)):
+        values = [m.group(1) or m.group(2) or m.group(3) for m in _TOKEN_RE.finditer(str(values))]
+    ud = set()
+    for v in values:
+        if v is None or (isinstance(v, float) and np.isnan(v)):
+            continue
+        s = str(v).strip().strip("'\"()[]").strip()
+        if s.endswith(".0") and s[:-2].isdigit():
+            s = s[:-2]
+        if s and s.lower() not in ("nan", "none"):
+            ud.add(s)
+    return tuple(sorted(ud))
+
+
+def sql_in_liste(values, tal=False, tom="('__DUMMY__')"):
+    """
+    Kanonisk SQL IN-liste som literal - til builders der ikke kan bruge parametre.
+    tal=True giver numeriske id'er uden anførselstegn, fx Wyscout-id'er.
+    """
+    ids = kanonisk_liste(values)
+    if tal:
+        ids = tuple(sorted({i for i in ids if i.lstrip("-").isdigit()}, key=int))
+    if not ids:
+        return tom
+    if tal:
+        return "(" + ", ".join(ids) + ")"
+    return "(" + ", ".join("'" + i.replace("'", "''") + "'" for i in ids) + ")"
+
+
+def normaliser(sql):
+    return re.sub(r"\s+", " ", sql).strip().rstrip(";").strip()
+
+
+# --- 2. SKABELONER ---
+# Version bumpes når en skabelons SQL ændres, så den nye tekst ikke forveksles med den gamle.
+QUERY_REGISTRY = {
+    "fys_spiller_kamp": {
+        "version": 1,
+        "sql": f"""
+            SELECT PLAYER_NAME, JERSEY, TEAM_SSIID, DISTANCE, TOP_SPEED, SPRINTS, SPEEDRUNS,
+                PERCENTDISTANCEHIGHSPEEDSPRINTING as DIST_SPRINT_PCT,
+                PERCENTTIMEHIGHSPEEDSPRINTING as TIME_SPRINT_PCT
+            FROM {DB}.SECONDSPECTRUM_F53A_GAME_PLAYER
+            WHERE MATCH_SSIID = %(match_id)s
+        """,
+    },
+    "fys_hold_kamp": {
+        "version": 1,
+        "sql": f"""
+            SELECT TEAM_NAME, TEAM_SSIID, TEAMDISTANCE,
+                TEAMPERCENTDISTANCEHIGHSPEEDSPRINTING as TEAM_SPRINT_PCT,
+                TEAMPERCENTDISTANCEHIGHSPEEDRUNNING as TEAM_HSR_PCT
+            FROM {DB}.SECONDSPECTRUM_F53A_GAME_TEAM
+            WHERE MATCH_SSIID = %(match_id)s
+        """,
+    },
+    "liga_holdliste": {
+        "version": 1,
+        "sql": f"""
+            SELECT DISTINCT CONTESTANTHOME_NAME, CONTESTANTHOME_OPTAUUID
+            FROM {DB}.OPTA_MATCHINFO
+            WHERE TOURNAMENTCALENDAR_OPTAUUID IN (%(liga_ids)s)
+        """,
+    },
+    "hold_spillede_kampe": {
+        "version": 1,
+        "sql": f"""
+            SELECT MATCH_OPTAUUID, MATCH_DATE_FULL, WEEK, MATCH_STATUS, CONTESTANTHOME_OPTAUUID, CONTESTANTHOME_NAME,
+                CONTESTANTAWAY_OPTAUUID, CONTESTANTAWAY_NAME, TOTAL_HOME_SCORE, TOTAL_AWAY_SCORE
+            FROM {DB}.OPTA_MATCHINFO
+            WHERE TOURNAMENTCALENDAR_NAME = %(saeson)s
+              AND MATCH_STATUS = 'Played'
+              AND (CONTESTANTHOME_OPTAUUID = %(hold_uuid)s OR CONTESTANTAWAY_OPTAUUID = %(hold_uuid)s)
+            ORDER BY MATCH_DATE_FULL DESC
+        """,
+    },
+    "wyscout_spillerbilleder": {
+        "version": 1,
+        "sql": f"""
+            SELECT PLAYER_WYID, IMAGEDATAURL
+            FROM {DB}.WYSCOUT_PLAYERS
+            WHERE PLAYER_WYID IN (%(player_ids)s)
+        """,
+    },
+}
+
+
+def byg_query(navn, **params):
+    """
+    Returnerer (sql, params) for en registreret skabelon.
+    Liste-parametre (tuple/list/set/Series) gøres kanoniske, enkeltværdier trimmes.
+    Connectoren binder lister uden parenteser, derfor skrives skabelonerne som IN (%(ids)s).
+    """
+    if navn not in QUERY_REGISTRY:
+        raise KeyError(f"Ukendt query i registret: {navn}")
+    skabelon = QUERY_REGISTRY[navn]
+    return bind_sql(navn, skabelon["sql"], skabelon["version"], **params)
+
+
+def bind_sql(navn, sql, version=1, **params):
+    """
+    Som byg_query(), men for SQL der bygges uden for registret (fx opta_queries):
+    samme præfiks, normalisering og kanoniske parametre.
+    """
+    sql = f"/* {navn} v{version} */ " + normaliser(sql)
+
+    bundne = {}
+    for k, v in params.items():
+        if isinstance(v, (list, tuple, set, frozenset, pd.Series, pd.Index, np.ndarray)):
+            bundne[k] = list(kanonisk_liste(v) or ("__DUMMY__",))
+        elif isinstance(v, str):
+            bundne[k] = v.strip()
+        else:
+            bundne[k] = v
+    return sql, bundne
+
+
+def koer_query(conn, navn, **params):
+    """Kører en registreret skabelon med bundne parametre via conn.query(sql, params=...)."""
+    sql, bundne = byg_query(navn, **params)
+    return conn.query(sql, params=bundne)
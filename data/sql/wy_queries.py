@@ -1,3 +1,5 @@
+from data.sql.registry import sql_in_liste
+
 def get_wy_queries(comp_filter, season_filter):
     DB = "KLUB_HVIDOVREIF.AXIS"
 
@@ -5,10 +7,8 @@ def get_wy_queries(comp_filter, season_filter):
     # Sikring mod tomme filtre (bruges til spillerlisten/oversigten)
     if not comp_filter:
         c_f = "(328)"
-    elif isinstance(comp_filter, (list, tuple)):
-        c_f = f"({comp_filter[0]})" if len(comp_filter) == 1 else str(tuple(comp_filter))
     else:
-        c_f = f"({comp_filter})"
+        c_f = sql_in_liste(comp_filter, tal=True, tom="(328)")
 
     if isinstance(season_filter, str) and not season_filter.startswith('='):
         s_f = f" = '{season_filter}'"
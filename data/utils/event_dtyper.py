@@ -0,0 +1,93 @@
+# data/utils/event_dtyper.py
+"""
+Kompakte datatyper for event-frames (df_all / liga-events).
+
+Rå fra Snowflake ligger UUID'er og navne som Python-strenge (object), type-id'er
+som int64, koordinater som float64 og qual_list som én Python-liste pr. række.
+komprimer_events() ændrer det ved indlæsning:
+  - UUID'er, navne og hold-id'er -> category
+  - event_typeid/outcome og 0/1-flag -> int8/int16
+  - koordinater -> float32
+  - qualifiers -> category, og qual_list deler ét liste-objekt pr. unik kombination
+Gruppering på de kategoriske kolonner skal ske med observed=True.
+"""
+import sys
+import numpy as np
+import pandas as pd
+
+KATEGORI_KOLONNER = [
+    'player_optauuid', 'hold_optauuid', 'match_optauuid', 'visningsnavn',
+    'match_name', 'first_name', 'short_last_name', 'qualifiers',
+]
+HELTALS_KOLONNER = ['event_typeid', 'outcome', 'matchlengthmin', 'Pasninger_Total', 'Pasninger_Succes']
+KOORDINAT_KOLONNER = ['event_x', 'event_y', 'end_x', 'end_y']
+
+
+def hukommelse_bytes(df: pd.DataFrame) -> int:
+    """
+    Reel hukommelse for en event-frame. memory_usage(deep=True) tæller et delt
+    liste-objekt én gang pr. række; her tælles hvert unikt objekt kun én gang.
+    """
+    total = int(df.index.memory_usage(deep=True))
+    for col in df.columns:
+        s = df[col]
+        if s.dtype == object and len(s) and isinstance(s.iloc[0], list):
+            total += s.size * 8  # pointer pr. række
+            unikke = {id(v): v for v in s if isinstance(v, list)}
+            total += sum(sys.getsizeof(v) + sum(sys.getsizeof(x) for x in v) for v in unikke.values())
+        else:
+            total += int(s.memory_usage(deep=True, index=False))
+    return total
+
+
+def _del_qual_lister(qualifiers: pd.Series) -> pd.Series:
+    """Én liste pr. unik qualifier-streng i stedet for én pr. række."""
+    kategorier = qualifiers.cat.categories
+    opslag = np.empty(len(kategorier) + 1, dtype=object)
+    for i, v in enumerate(kategorier):
+        opslag[i] = str(v).split(',')
+    opslag[-1] = ['']  # manglende qualifiers (kode -1), som fillna('').str.split(',')
+    return pd.Series(opslag[qualifiers.cat.codes.to_numpy()], index=qualifiers.index, name='qual_list')
+
+
+def komprimer_events(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Skifter kolonnerne til kompakte typer og lægger en hukommelsesrapport i df.attrs.
+    Ændrer df direkte - kald den på en frame der ikke deles med andre.
+    """
+    if df is None or df.empty:
+        return df
+
+    foer = hukommelse_bytes(df)
+
+    for col in KATEGORI_KOLONNER:
+        if col not in df.columns:
+            continue
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            # Fx et hold-udsnit af en liga-frame: ubrugte kategorier smides væk
+            df[col] = df[col].cat.remove_unused_categories()
+        else:
+            df[col] = df[col].astype('category')
+
+    for col in HELTALS_KOLONNER:
+        if col in df.columns and df[col].notna().all():
+            df[col] = pd.to_numeric(df[col], downcast='integer')
+
+    for col in KOORDINAT_KOLONNER:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype('float32')
+
+    if 'qual_list' in df.columns and 'qualifiers' in df.columns:
+        df['qual_list'] = _del_qual_lister(df['qualifiers'])
+
+    efter = hukommelse_bytes(df)
+    df.attrs['hukommelse'] = hukommelses_rapport(foer, efter)
+    return df
+
+
+def hukommelses_rapport(foer: int, efter: int) -> dict:
+    return {
+        'foer_mb': round(foer / 1024 ** 2, 2),
+        'efter_mb': round(efter / 1024 ** 2, 2),
+        'besparelse_pct': round((1 - efter / foer) * 100, 1) if foer else 0.0,
+    }
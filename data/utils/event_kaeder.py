@@ -0,0 +1,118 @@
+# data/utils/event_kaeder.py
+"""
+Lokal kæde-motor for event-frames.
+
+Assists, chanceskabelse og standardsituationernes udfald bygger alle på "hvad skete
+der lige før/efter denne event i samme kamp". I stedet for at hver query laver sin
+egen LEAD/LAG-scanning i Snowflake sorteres events én gang lokalt efter
+(kamp, periode, tidsstempel, event-id), og naboerne findes med NumPy-skift, der
+maskeres ved kampgrænserne:
+  - naeste()/forrige(): værdien n events frem/tilbage i samme kamp (NaN ved kanten)
+  - boldskifte(): første event i kampen eller holdet er skiftet siden forrige event
+  - sekvens_id(): løbende nummer for hver sammenhængende besiddelse
+Kolonnenavne findes med både store og små bogstaver (Snowflake-frames vs. df_all).
+"""
+import numpy as np
+import pandas as pd
+
+KAMP_KOLONNER = ('match_optauuid', 'MATCH_OPTAUUID')
+PERIODE_KOLONNER = ('period_id', 'PERIOD_ID', 'event_periodid', 'EVENT_PERIODID')
+TID_KOLONNER = ('event_timestamp', 'EVENT_TIMESTAMP', 'event_timestamp_str', 'EVENT_TIMESTAMP_STR')
+EVENT_ID_KOLONNER = ('event_eventid', 'EVENT_EVENTID')
+HOLD_KOLONNER = (
+    'hold_optauuid', 'HOLD_OPTAUUID', 'event_contestant_optauuid', 'EVENT_CONTESTANT_OPTAUUID',
+    'team_uuid', 'TEAM_UUID',
+)
+
+
+def _kolonne(df, kandidater):
+    return next((c for c in kandidater if c in df.columns), None)
+
+
+def _koder(s: pd.Series) -> np.ndarray:
+    """Heltalskode pr. række; ens værdier får samme kode (NaN giver -1)."""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return s.cat.codes.to_numpy()
+    return pd.factorize(s, use_na_sentinel=True)[0]
+
+
+class EventKaede:
+    """
+    Sorterer df én gang og holder styr på, hvor hver kamp (partition) starter.
+    partition: kolonner der afgrænser en kæde - standard er kamp-kolonnen.
+    orden: sorteringen inden for kæden - standard er periode, tidsstempel og event-id
+    (dem der findes). Angiv den eksplicit for at ramme en bestemt SQL-rækkefølge.
+    Resultaterne har de sorterede rækkers oprindelige index, så de kan sættes
+    direkte ind i kaede.df eller i den oprindelige frame.
+    """
+
+    def __init__(self, df: pd.DataFrame, partition=None, orden=None, hold_col=None):
+        if partition is None:
+            kamp = _kolonne(df, KAMP_KOLONNER)
+            if kamp is None:
+                raise KeyError("Event-framen har ingen kamp-kolonne (match_optauuid/MATCH_OPTAUUID)")
+            partition = [kamp]
+        if orden is None:
+            orden = [
+                c for c in (_kolonne(df, k) for k in (PERIODE_KOLONNER, TID_KOLONNER, EVENT_ID_KOLONNER))
+                if c is not None
+            ]
+        self.partition = list(partition)
+        self.orden = list(orden)
+        self.hold_col = hold_col or _kolonne(df, HOLD_KOLONNER)
+
+        self.df = df.sort_values(self.partition + self.orden, kind='mergesort') if len(df) else df
+        n = len(self.df)
+        start = np.zeros(n, dtype=bool)
+        if n:
+            start[0] = True
+            for col in self.partition:
+                k = _koder(self.df[col])
+                start[1:] |= k[1:] != k[:-1]
+        self._start = start
+        self._gruppe = np.cumsum(start) - 1
+
+    def __len__(self):
+        return len(self.df)
+
+    def _positioner(self, n):
+        """Position n rækker væk samt om den ligger i samme kæde."""
+        pos = np.arange(len(self.df)) + n
+        ok = (pos >= 0) & (pos < len(self.df))
+        ok[ok] = self._gruppe[pos[ok]] == self._gruppe[ok]
+        return np.where(ok, pos, 0), ok
+
+    def _skift(self, col, n, fyld) -> pd.Series:
+        s = self.df[col] if isinstance(col, str) else col
+        pos, ok = self._positioner(n)
+        vaerdier = s.iloc[pos] if len(s) else s
+        ud = pd.Series(vaerdier.array, index=self.df.index, name=s.name)
+        return ud.where(ok) if fyld is None else ud.where(ok, fyld)
+
+    def naeste(self, col, n=1, fyld=None) -> pd.Series:
+        """
+        Som LEAD(col, n) OVER (PARTITION BY kamp ORDER BY orden).
+        col er et kolonnenavn eller en Series i kaede.df's rækkefølge (fx en qualifier-maske);
+        fyld erstatter NaN ved kædens kant, fx False for masker.
+        """
+        return self._skift(col, n, fyld)
+
+    def forrige(self, col, n=1, fyld=None) -> pd.Series:
+        """Som LAG(col, n) OVER (PARTITION BY kamp ORDER BY orden)."""
+        return self._skift(col, -n, fyld)
+
+    def kaede_start(self) -> pd.Series:
+        return pd.Series(self._start, index=self.df.index)
+
+    def boldskifte(self) -> pd.Series:
+        """True hvor en ny besiddelse starter: første event i kæden eller nyt hold."""
+        if self.hold_col is None:
+            raise KeyError("Event-framen har ingen hold-kolonne til besiddelsesskift")
+        k = _koder(self.df[self.hold_col])
+        skift = self._start.copy()
+        skift[1:] |= k[1:] != k[:-1]
+        return pd.Series(skift, index=self.df.index)
+
+    def sekvens_id(self) -> pd.Series:
+        """Løbende besiddelsesnummer, unikt på tværs af kampe (0, 1, 2, ...)."""
+        return (self.boldskifte().cumsum() - 1).astype('int64')
@@ -1,4 +1,8 @@
 # data/utils/mapping.py
+import numpy as np
+import pandas as pd
+
+from data.utils.qualifier_index import qualifier_index
 
 # --- 1. SPORTLIG OPTA EVENT TYPE MAPPING ---
 OPTA_EVENT_TYPES = {
@@ -131,8 +135,77 @@ def get_action_label(row):
     except Exception:
         return "Ukendt aktion"
 
+# Navne på de labels der kun afhænger af event-typen (NIVEAU 3, defensivt)
+_TYPE_LABELS = {"7": "Tackling", "8": "Interception", "10": "Redning", "49": "Erobring", "12": "Clearing", "3": "Dribling"}
+
+def get_action_labels(df):
+    """
+    get_action_label for en hel event-frame i ét vektoriseret gennemløb (np.select over
+    type- og qualifier-masker i samme prioritet som rækkefunktionen).
+    Som rækkefunktionen læses qualifiers kun, hvis framen har 'qual_list'; selve opslaget
+    sker i framens qualifier-indeks (qualifiers/QUALIFIERS, som qual_list er splittet fra).
+    """
+    type_col = 'EVENT_TYPEID' if 'EVENT_TYPEID' in df.columns else 'event_typeid'
+    if type_col not in df.columns:
+        return pd.Series("Ukendt aktion", index=df.index, dtype=object)
+    # Event-typerne som koder ind i de (få) unikke værdier, så masker er heltalsopslag
+    koder, unikke = pd.factorize(df[type_col], use_na_sentinel=False)
+    unikke_str = np.array([str(u) for u in unikke], dtype=object)
+
+    qi = qualifier_index(df) if 'qual_list' in df.columns else None
+
+    def q(qid):
+        if qi is None:
+            return np.zeros(len(df), dtype=bool)
+        return qi.has_qualifier(qid).to_numpy()
+
+    def er(*ids):
+        return np.isin(koder, np.flatnonzero(np.isin(unikke_str, ids)))
+
+    skud = er("13", "14", "15", "16")
+    hoved = q(15)
+    stolpe = q(138) | er("14")
+
+    valg = [
+        (~er(*CORE_GAME_EVENTS), None),
+        # NIVEAU 1
+        (q(214), "Stor chance"),
+        (q(210) & er("16"), "Målgivende assist"),
+        (q(210), "Key Pass (Chance skabt)"),
+        # NIVEAU 2
+        (q(14), "Afgørende indgreb (Sidste mand)"),
+        (q(4), "Stikning"),
+        (q(195), "Pull back"),
+        (q(196), "Sideskift"),
+        (q(155), "Chippet pasning"),
+        # NIVEAU 3: pasninger
+        (er("1") & q(2), "Indlæg"),
+        (er("1") & q(107), "Indkast"),
+        (er("1") & q(1), "Lang bold"),
+        (er("1"), "Pasning"),
+        # Skud - event 16 altid mål først
+        (er("16") & q(9), "MÅL (Straffespark)"),
+        (er("16") & hoved, "MÅL (Hovedstød)"),
+        (er("16"), "MÅL"),
+        (skud & stolpe & hoved, "Skud på stolpe (Hovedstød)"),
+        (skud & stolpe, "Skud på stolpe"),
+        (er("15") & hoved, "Skud på mål (Hovedstød)"),
+        (er("15"), "Skud på mål"),
+        (skud & hoved, "Afslutning (Hovedstød)"),
+        (skud, "Afslutning"),
+    ] + [(er(t), label) for t, label in _TYPE_LABELS.items()]
+
+    labels = np.array([label for _, label in valg] + [None], dtype=object)
+    kode = np.select([maske for maske, _ in valg], np.arange(len(valg)), default=len(valg))
+    ud = labels[kode]
+    # Fallback: navnet fra OPTA_EVENT_TYPES for øvrige kerne-events
+    fallback = kode == len(valg)
+    navne = np.array([OPTA_EVENT_TYPES.get(u, f"Aktion {u}") for u in unikke_str], dtype=object)
+    ud[fallback] = navne[koder[fallback]]
+    return pd.Series(ud, index=df.index, dtype=object)
+
 def is_assist(event_typeid, qualifiers=None):
-    """Hurtig tjek om en aktion er en assist (ID 210)."""
+    """Hurtig tjek om en aktion er en assist (ID 210). For hele frames: qualifier_index.assist_maske."""
     if qualifiers is None:
         return False
     return "210" in [str(q) for q in qualifiers]
@@ -140,6 +213,7 @@ def is_assist(event_typeid, qualifiers=None):
 def har_qualifier(event_typeid, qualifiers_list, target_event_id, target_qual_ids):
     """
     Tjekker om en hændelse matcher en specifik event type samt indeholder én eller flere angivne qualifiers.
+    Rækkevis - for hele frames bruges qualifier_index.har_qualifier_maske.
     """
     if str(event_typeid) != str(target_event_id):
         return False
@@ -0,0 +1,146 @@
+# data/utils/qualifier_index.py
+"""
+Qualifier-indeks for event-frames.
+
+Hver event har sine Opta-qualifiers som én komma-streng ('qualifiers'/'QUALIFIERS',
+fra LISTAGG) eller som en liste ('qual_list'). I stedet for at scanne listen række
+for række bygges et indeks én gang pr. frame:
+  - hver unik qualifier-kombination får en pakket bitmaske (uint64-ord, én bit pr. qualifier-id)
+  - hver række peger på sin kombination via en heltalskode (kategori-koderne, hvis
+    kolonnen allerede er category - se event_dtyper.komprimer_events)
+Et opslag som any_of([2, 155]) er dermed en bit-operation på de få unikke kombinationer
+efterfulgt af ét numpy-opslag pr. række.
+"""
+import threading
+import weakref
+import numpy as np
+import pandas as pd
+
+QUALIFIER_KOLONNER = ('qualifiers', 'QUALIFIERS', 'qual_list')
+
+
+def _som_ids(ids):
+    """Enkelt id eller liste af id'er (int/str) -> liste af rensede strenge."""
+    if ids is None:
+        return []
+    if isinstance(ids, (str, int, np.integer)):
+        ids = [ids]
+    return [str(q).strip() for q in ids]
+
+
+class QualifierIndex:
+    def __init__(self, koder: np.ndarray, kombinationer, index: pd.Index):
+        self._koder = np.asarray(koder, dtype=np.int64)
+        self._index = index
+        self._bit = {}
+
+        par = []
+        for i, kombi in enumerate(kombinationer):
+            for q in str(kombi).split(','):
+                q = q.strip()
+                if q:
+                    par.append((i, self._bit.setdefault(q, len(self._bit))))
+
+        # Sidste række er "ingen qualifiers" (kode -1 rammer den via negativ indeksering)
+        n_ord = max(1, (len(self._bit) + 63) // 64)
+        self._bits = np.zeros((len(kombinationer) + 1, n_ord), dtype=np.uint64)
+        if par:
+            raekker, bits = np.array(par, dtype=np.int64).T
+            np.bitwise_or.at(self._bits, (raekker, bits // 64), np.left_shift(np.uint64(1), (bits % 64).astype(np.uint64)))
+
+    @classmethod
+    def fra_serie(cls, s: pd.Series) -> "QualifierIndex":
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            return cls(s.cat.codes.to_numpy(), s.cat.categories, s.index)
+        foerste = s.first_valid_index()
+        if foerste is not None and isinstance(s.loc[foerste], (list, tuple)):
+            s = s.map(lambda v: ','.join(str(q) for q in v) if isinstance(v, (list, tuple)) else v)
+        koder, kombinationer = pd.factorize(s, use_na_sentinel=True)
+        return cls(koder, kombinationer, s.index)
+
+    def __len__(self):
+        return len(self._koder)
+
+    @property
+    def qualifier_ids(self):
+        return set(self._bit)
+
+    def _maske(self, ids):
+        """Bitmaske for ids samt om alle ids findes i indekset."""
+        maske = np.zeros(self._bits.shape[1], dtype=np.uint64)
+        alle_kendte = True
+        for q in _som_ids(ids):
+            bit = self._bit.get(q)
+            if bit is None:
+                alle_kendte = False
+                continue
+            maske[bit // 64] |= np.uint64(1) << np.uint64(bit % 64)
+        return maske, alle_kendte
+
+    def _pr_raekke(self, pr_kombi: np.ndarray) -> pd.Series:
+        return pd.Series(pr_kombi[self._koder], index=self._index)
+
+    def any_of(self, ids) -> pd.Series:
+        """Rækker der har mindst én af ids."""
+        maske, _ = self._maske(ids)
+        return self._pr_raekke((self._bits & maske).any(axis=1))
+
+    def all_of(self, ids) -> pd.Series:
+        """Rækker der har alle ids."""
+        maske, alle_kendte = self._maske(ids)
+        if not alle_kendte:
+            return self._pr_raekke(np.zeros(len(self._bits), dtype=bool))
+        return self._pr_raekke(((self._bits & maske) == maske).all(axis=1))
+
+    def none_of(self, ids) -> pd.Series:
+        return ~self.any_of(ids)
+
+    def has_qualifier(self, ids) -> pd.Series:
+        """Som mapping.har_qualifier uden event-tjekket: mindst én af ids."""
+        return self.any_of(ids)
+
+
+# --- INDEKS PR. FRAME ---
+# Bygges første gang en frame spørges og genbruges, så længe framen lever og
+# hverken rækker eller qualifier-kolonne er skiftet ud.
+_INDEKS = {}
+_INDEKS_LOCK = threading.Lock()
+
+
+def _qualifier_kolonne(df: pd.DataFrame):
+    for col in QUALIFIER_KOLONNER:
+        if col in df.columns:
+            return col
+    raise KeyError("Event-framen har ingen qualifier-kolonne (qualifiers/QUALIFIERS/qual_list)")
+
+
+def qualifier_index(df: pd.DataFrame) -> QualifierIndex:
+    col = _qualifier_kolonne(df)
+    noegle = id(df)
+    with _INDEKS_LOCK:
+        post = _INDEKS.get(noegle)
+    if post is not None:
+        ref, kol, idx = post
+        if ref() is df and kol == col and idx._index is df.index and len(idx) == len(df):
+            return idx
+
+    idx = QualifierIndex.fra_serie(df[col])
+    with _INDEKS_LOCK:
+        _INDEKS[noegle] = (weakref.ref(df, lambda _, n=noegle: _INDEKS.pop(n, None)), col, idx)
+    return idx
+
+
+def har_qualifier_maske(df: pd.DataFrame, event_id, qual_ids) -> pd.Series:
+    """Vektoriseret mapping.har_qualifier: event-typen er event_id og mindst én af qual_ids findes."""
+    type_col = 'event_typeid' if 'event_typeid' in df.columns else 'EVENT_TYPEID'
+    typer = df[type_col]
+    if pd.api.types.is_integer_dtype(typer) and str(event_id).isdigit():
+        type_ok = typer == int(event_id)
+    else:
+        type_ok = typer.astype(str) == str(event_id)
+    return type_ok & qualifier_index(df).any_of(qual_ids)
+
+
+def assist_maske(df: pd.DataFrame) -> pd.Series:
+    """Vektoriseret mapping.is_assist: qualifier 210 (shot assist)."""
+    return qualifier_index(df).has_qualifier(210)
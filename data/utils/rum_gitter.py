@@ -0,0 +1,96 @@
+# data/utils/rum_gitter.py
+"""
+Forhåndsaggregerede 2D-histogrammer for heatmaps.
+
+Heatmap-siderne tegnede tidligere en KDE direkte på de rå koordinater (samplet ned
+til 3000 punkter pr. hold), og hvert filterskift gik tilbage til rådata. Her tælles
+events én gang ind i et fast gitter pr. gruppe - fx hold x spiller x kategori x kamp:
+  - hver (gruppe, celle) med mindst én event gemmes som én post (gruppe, celle, antal)
+  - et vilkårligt udsnit (fx et hold i et udvalg af kampe) er én np.bincount over
+    de poster, hvis gruppe passer på filteret
+  - udglatningen sker på det summerede gitter (utils.taethed.kde_fra_gitter), så
+    prisen for at tegne afhænger af gitterets størrelse og ikke af antallet af events
+"""
+import hashlib
+import numpy as np
+import pandas as pd
+
+STANDARD_BINS = (100, 100)
+STANDARD_OMRAADE = ((0.0, 100.0), (0.0, 100.0))
+
+
+class RumGitter:
+    """
+    df: events med koordinaterne x_col/y_col og gruppenøglerne `noegler`.
+    bins: (nx, ny) celler, omraade: ((x_min, x_max), (y_min, y_max)).
+    Koordinater uden for området (og NaN) tælles ikke med.
+    """
+
+    def __init__(self, df: pd.DataFrame, x_col, y_col, noegler, bins=STANDARD_BINS, omraade=STANDARD_OMRAADE):
+        self.noegler = list(noegler)
+        self.nx, self.ny = bins
+        self.omraade = omraade
+        (x0, x1), (y0, y1) = omraade
+
+        x = pd.to_numeric(df[x_col], errors='coerce').to_numpy(dtype=float)
+        y = pd.to_numeric(df[y_col], errors='coerce').to_numpy(dtype=float)
+        ok = (x >= x0) & (x <= x1) & (y >= y0) & (y <= y1)
+
+        # Samme celle-kanter som np.histogram2d: et punkt præcis på en kant (fx x=29.0) hører
+        # til cellen over kanten; (x - x0) / bredde * nx kan runde det ned i cellen under
+        ix = np.minimum(np.searchsorted(np.linspace(x0, x1, self.nx + 1), x[ok], side='right') - 1, self.nx - 1)
+        iy = np.minimum(np.searchsorted(np.linspace(y0, y1, self.ny + 1), y[ok], side='right') - 1, self.ny - 1)
+        celle = iy * self.nx + ix
+
+        grupper = df[self.noegler][ok]
+        gruppe = grupper.groupby(self.noegler, sort=False, dropna=False, observed=True).ngroup().to_numpy()
+        n_celler = self.nx * self.ny
+        par, antal = np.unique(gruppe.astype(np.int64) * n_celler + celle, return_counts=True)
+        self._gruppe = par // n_celler
+        self._celle = par % n_celler
+        self._antal = antal
+
+        # Én række pr. gruppe (indeks = gruppekoden) med nøgleværdier og antal events
+        self.grupper = (
+            grupper.assign(_gruppe=gruppe)
+            .drop_duplicates('_gruppe')
+            .set_index('_gruppe')
+            .sort_index()
+        )
+        self.grupper['N'] = np.bincount(self._gruppe, weights=self._antal, minlength=len(self.grupper)).astype(np.int64)
+
+        h = hashlib.sha1(repr((bins, omraade, self.noegler)).encode())
+        for a in (self._gruppe, self._celle, self._antal):
+            h.update(a.tobytes())
+        h.update(pd.util.hash_pandas_object(self.grupper, index=True).to_numpy().tobytes())
+        self.fingeraftryk = h.hexdigest()
+
+    def __len__(self):
+        return len(self._antal)
+
+    def _valgte(self, filtre) -> np.ndarray:
+        """Bool-maske over posterne for grupper, der matcher filtre ({kolonne: værdi eller liste})."""
+        ok = pd.Series(True, index=self.grupper.index)
+        for col, v in filtre.items():
+            if v is None:
+                continue
+            vaerdier = list(v) if isinstance(v, (list, tuple, set, np.ndarray, pd.Index)) else [v]
+            ok &= self.grupper[col].isin(vaerdier)
+        return ok.to_numpy()[self._gruppe]
+
+    def sum(self, **filtre) -> np.ndarray:
+        """Summeret gitter (ny, nx) for de grupper, der matcher filtre; None betyder alle."""
+        valgt = self._valgte(filtre)
+        return np.bincount(
+            self._celle[valgt], weights=self._antal[valgt], minlength=self.nx * self.ny
+        ).reshape(self.ny, self.nx)
+
+    def antal(self, **filtre) -> int:
+        return int(self._antal[self._valgte(filtre)].sum())
+
+    def centre(self):
+        """Cellernes midtpunkter (xc, yc) - til contourf/pcolormesh."""
+        (x0, x1), (y0, y1) = self.omraade
+        xc = x0 + (np.arange(self.nx) + 0.5) * (x1 - x0) / self.nx
+        yc = y0 + (np.arange(self.ny) + 0.5) * (y1 - y0) / self.ny
+        return xc, yc
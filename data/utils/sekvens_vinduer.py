@@ -0,0 +1,132 @@
+# data/utils/sekvens_vinduer.py
+"""
+Tidsvinduer omkring udløsende events - fx "events i de 20 sekunder før et mål".
+
+Tidligere lavede hver side sin egen range-join i Snowflake (mål x events) plus en
+LISTAGG over hele OPTA_QUALIFIERS. Her sorteres kampenes events én gang efter tid
+(TidsIndeks), og vinduerne skæres ud med np.searchsorted på tidsstempel-arrayet:
+  - alle kampe ligger i ét sorteret nøgle-array (kamp-nr * spænd + ms siden kampstart)
+  - et vindue er to searchsorted-opslag pr. udløser, klippet til udløserens kamp
+Vindueslængde, hold og udløser (mål, skud, store chancer ...) vælges ved opslaget,
+så et nyt vindue i UI'et ikke kræver en ny query.
+"""
+import numpy as np
+import pandas as pd
+
+from data.utils.event_kaeder import EventKaede, TID_KOLONNER, EVENT_ID_KOLONNER, HOLD_KOLONNER, _kolonne
+from data.utils.qualifier_index import qualifier_index
+
+MAAL = (16,)
+SKUD = (13, 14, 15, 16)
+STORE_CHANCER_QUALIFIER = 214
+NAT_MS = np.iinfo(np.int64).min
+
+
+def _millisekunder(s: pd.Series) -> np.ndarray:
+    """Tidsstempler som int64 millisekunder (NaT -> NAT_MS); tidszoner normaliseres til UTC."""
+    t = pd.to_datetime(s, errors='coerce')
+    if t.dt.tz is not None:
+        t = t.dt.tz_convert(None)
+    return t.to_numpy(dtype='datetime64[ms]').astype(np.int64)
+
+
+class TidsIndeks:
+    """
+    Kampenes events sorteret efter (kamp, tid, event-id) med et søgbart nøgle-array.
+    df: events for én eller flere kampe. Rækker uden gyldigt tidsstempel udelades.
+    """
+
+    def __init__(self, df: pd.DataFrame, tid_col=None, hold_col=None, type_col=None):
+        self.tid_col = tid_col or _kolonne(df, TID_KOLONNER)
+        if self.tid_col is None:
+            raise KeyError("Event-framen har ingen tidsstempel-kolonne (EVENT_TIMESTAMP)")
+        self.hold_col = hold_col or _kolonne(df, HOLD_KOLONNER)
+        self.type_col = type_col or _kolonne(df, ('EVENT_TYPEID', 'event_typeid'))
+
+        ms = _millisekunder(df[self.tid_col])
+        gyldig = ms != NAT_MS
+        df = df[gyldig].assign(_tid_ms=ms[gyldig])
+        orden = ['_tid_ms'] + [c for c in (_kolonne(df, EVENT_ID_KOLONNER),) if c is not None]
+        kaede = EventKaede(df, orden=orden, hold_col=self.hold_col)
+        ms = kaede.df['_tid_ms'].to_numpy()
+        self.df = kaede.df.drop(columns='_tid_ms')
+
+        start = kaede.kaede_start().to_numpy()
+        self._gruppe = np.cumsum(start) - 1
+        self._starter = np.flatnonzero(start)
+        self._slutter = np.append(self._starter[1:], len(self.df))
+
+        rel = ms - ms[self._starter][self._gruppe] if len(ms) else ms
+        spaend = int(rel.max()) + 1 if len(rel) else 1
+        self._noegle = self._gruppe.astype(np.int64) * spaend + rel
+
+    def __len__(self):
+        return len(self.df)
+
+    def udloesere(self, typer=MAAL, hold=None, qualifier=None, maske=None) -> np.ndarray:
+        """
+        Positioner (i self.df) for udløsende events.
+        typer: event-typer (MAAL, SKUD ...), hold: kun dette holds events,
+        qualifier: kræv mindst én af disse qualifiers (fx 214 = stor chance),
+        maske: ekstra bool-maske i self.df's rækkefølge.
+        """
+        ok = np.ones(len(self.df), dtype=bool)
+        if typer is not None:
+            ok &= pd.to_numeric(self.df[self.type_col], errors='coerce').isin(list(typer)).to_numpy()
+        if hold is not None:
+            ok &= self._hold_maske(hold)
+        if qualifier is not None:
+            ok &= qualifier_index(self.df).any_of(qualifier).to_numpy()
+        if maske is not None:
+            ok &= np.asarray(maske, dtype=bool)
+        return np.flatnonzero(ok)
+
+    def _hold_maske(self, hold) -> np.ndarray:
+        return (self.df[self.hold_col].astype(str).str.lower() == str(hold).strip().lower()).to_numpy()
+
+    def vinduer(self, udloesere, sekunder=20, efter=0, hold=None, maks_events=None, udloeser_kolonner=None):
+        """
+        Events fra `sekunder` før til `efter` sekunder efter hver udløser (begge ender med).
+        udloesere: positioner fra udloesere() eller en bool-maske i self.df's rækkefølge.
+        hold: behold kun dette holds events i vinduerne.
+        maks_events: behold kun de sidste n events pr. vindue.
+        udloeser_kolonner: {ny kolonne: kolonne på udløseren}, fx {'GOAL_TIME': 'EVENT_TIMESTAMP'}.
+        Returnerer events med kolonnen VINDUE_NR (0, 1, ... i udløser-rækkefølge).
+        """
+        pos = np.asarray(udloesere)
+        if pos.dtype == bool:
+            pos = np.flatnonzero(pos)
+        if len(pos) == 0:
+            return self.df.iloc[0:0].assign(VINDUE_NR=pd.Series(dtype='int64'))
+
+        g = self._gruppe[pos]
+        lo = np.searchsorted(self._noegle, self._noegle[pos] - int(sekunder * 1000), side='left')
+        hi = np.searchsorted(self._noegle, self._noegle[pos] + int(efter * 1000), side='right')
+        lo = np.maximum(lo, self._starter[g])
+        hi = np.minimum(hi, self._slutter[g])
+
+        laengder = hi - lo
+        vindue_nr = np.repeat(np.arange(len(pos)), laengder)
+        offset = np.arange(laengder.sum()) - np.repeat(np.cumsum(laengder) - laengder, laengder)
+        raekker = np.repeat(lo, laengder) + offset
+
+        ud = self.df.iloc[raekker].reset_index(drop=True)
+        ud['VINDUE_NR'] = vindue_nr
+        for ny, kilde in (udloeser_kolonner or {}).items():
+            ud[ny] = self.df[kilde].iloc[pos].to_numpy()[vindue_nr]
+
+        if hold is not None:
+            ud = ud[self._hold_maske(hold)[raekker]]
+        if maks_events is not None:
+            ud = ud[ud.groupby('VINDUE_NR').cumcount(ascending=False) < maks_events]
+        return ud.reset_index(drop=True)
+
+
+def maal_sekvenser(indeks: TidsIndeks, hold, sekunder=20, udloeser_kolonner=None) -> pd.DataFrame:
+    """Holdets events i de `sekunder` før hvert af holdets mål - som den gamle range-join i SQL."""
+    return indeks.vinduer(
+        indeks.udloesere(MAAL, hold=hold),
+        sekunder=sekunder,
+        hold=hold,
+        udloeser_kolonner=udloeser_kolonner,
+    )
@@ -0,0 +1,8 @@
+import os
+import sys
+import warnings
+
+# Testene importerer app-modulerne direkte (data.*, utils.*) fra repoets rod
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("MPLBACKEND", "Agg")
+warnings.filterwarnings("ignore", message=".*No runtime found.*")
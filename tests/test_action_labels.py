@@ -0,0 +1,42 @@
+"""Den vektoriserede get_action_labels skal give præcis samme labels som rækkefunktionen get_action_label."""
+import numpy as np
+import pandas as pd
+
+from data.utils.mapping import get_action_label, get_action_labels, OPTA_EVENT_TYPES
+
+# Alle qualifiers rækkefunktionen kigger på, plus et par den ignorerer
+QUALIFIERS = [1, 2, 4, 9, 14, 15, 21, 107, 138, 155, 195, 196, 210, 214, 321]
+# Kerne-events (også dem uden egen regel) og events der filtreres fra
+TYPER = [int(t) for t in OPTA_EVENT_TYPES if t.isdigit()] + [5, 27, 55, 99]
+
+
+def _events(n=20000, seed=3):
+    rng = np.random.default_rng(seed)
+    qualifiers = [
+        ",".join(str(q) for q in rng.choice(QUALIFIERS, rng.integers(0, 5), replace=False)) or None
+        for _ in range(n)
+    ]
+    df = pd.DataFrame({"EVENT_TYPEID": rng.choice(TYPER, n), "QUALIFIERS": qualifiers})
+    df["qual_list"] = df["QUALIFIERS"].fillna("").str.split(",")
+    return df
+
+
+def _forventet(df):
+    return df.apply(get_action_label, axis=1).astype(object)
+
+
+def test_samme_labels_som_raekkefunktionen():
+    df = _events()
+    pd.testing.assert_series_equal(get_action_labels(df), _forventet(df), check_names=False)
+
+
+def test_samme_labels_med_event_typer_som_strenge():
+    df = _events(n=5000, seed=4)
+    df["EVENT_TYPEID"] = df["EVENT_TYPEID"].astype(str)
+    pd.testing.assert_series_equal(get_action_labels(df), _forventet(df), check_names=False)
+
+
+def test_uden_qual_list_bruges_kun_event_typen():
+    # Rækkefunktionen læser kun qual_list - uden den ignoreres QUALIFIERS begge steder
+    df = _events(n=5000, seed=5).drop(columns=["qual_list"])
+    pd.testing.assert_series_equal(get_action_labels(df), _forventet(df), check_names=False)
@@ -0,0 +1,74 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from data import analyse_load
+
+# Den tidligere ForwardPassesPivot fra opta_team_stats, kørt på de samme rækker
+FORWARD_PASSES_SQL = """
+    WITH ForwardPassesPivot AS (
+        SELECT 
+            MATCH_OPTAUUID, EVENT_CONTESTANT_OPTAUUID,
+            COUNT(CASE WHEN EVENT_TYPEID = 1 AND EVENT_OUTCOME = 1 AND LEAD_X > (EVENT_X + 10) THEN 1 END) AS FORWARD_PASSES
+        FROM (
+            SELECT 
+                MATCH_OPTAUUID, EVENT_CONTESTANT_OPTAUUID, EVENT_TYPEID, EVENT_OUTCOME, EVENT_X,
+                LEAD(EVENT_X) OVER (PARTITION BY MATCH_OPTAUUID, EVENT_CONTESTANT_OPTAUUID ORDER BY EVENT_TIMESTAMP, EVENT_EVENTID) as LEAD_X
+            FROM OPTA_EVENTS
+            WHERE EVENT_TYPEID = 1
+        )
+        GROUP BY 1, 2
+    )
+    SELECT 
+        b.*,
+        fp_h.FORWARD_PASSES AS HOME_FORWARD_PASSES,
+        fp_a.FORWARD_PASSES AS AWAY_FORWARD_PASSES
+    FROM MatchBase b
+    LEFT JOIN ForwardPassesPivot fp_h ON b.MATCH_OPTAUUID = fp_h.MATCH_OPTAUUID AND b.CONTESTANTHOME_OPTAUUID = fp_h.EVENT_CONTESTANT_OPTAUUID
+    LEFT JOIN ForwardPassesPivot fp_a ON b.MATCH_OPTAUUID = fp_a.MATCH_OPTAUUID AND b.CONTESTANTAWAY_OPTAUUID = fp_a.EVENT_CONTESTANT_OPTAUUID
+"""
+
+
+def _kampe_og_events(seed=3):
+    rng = np.random.default_rng(seed)
+    kampe = pd.DataFrame({
+        "MATCH_OPTAUUID": [f"k{i}" for i in range(12)],
+        "CONTESTANTHOME_OPTAUUID": [f"h{i % 5}" for i in range(12)],
+        "CONTESTANTAWAY_OPTAUUID": [f"h{(i + 2) % 5}" for i in range(12)],
+        "HOME_FORMATION": "4-3-3",
+        "AWAY_FORMATION": "3-5-2",
+    })
+    raekker = []
+    for kamp in kampe.itertuples():
+        # Sidste kamp: udeholdet har ingen pasninger, så dets tal skal være tomt
+        hold = [kamp.CONTESTANTHOME_OPTAUUID] if kamp.Index == 11 else [kamp.CONTESTANTHOME_OPTAUUID, kamp.CONTESTANTAWAY_OPTAUUID]
+        n = 300
+        raekker.append(pd.DataFrame({
+            "MATCH_OPTAUUID": kamp.MATCH_OPTAUUID,
+            "EVENT_CONTESTANT_OPTAUUID": rng.choice(hold, n),
+            "EVENT_TYPEID": rng.choice([1, 1, 1, 4, 5, 13], n),
+            "EVENT_OUTCOME": rng.integers(0, 2, n),
+            "LOCATIONX": rng.uniform(0, 100, n).round(1),
+            # Få forskellige tidsstempler, så event-id afgør rækkefølgen ved lighed
+            "EVENT_TIMESTAMP": [f"2026-08-01 12:{m:02d}:00" for m in rng.integers(0, 20, n)],
+            "EVENT_EVENTID": rng.permutation(n),
+        }))
+    return kampe, pd.concat(raekker, ignore_index=True)
+
+
+def test_fremadrettede_pasninger_som_lead_i_sql():
+    kampe, events = _kampe_og_events()
+    with sqlite3.connect(":memory:") as db:
+        kampe.to_sql("MatchBase", db, index=False)
+        events.rename(columns={"LOCATIONX": "EVENT_X"}).to_sql("OPTA_EVENTS", db, index=False)
+        forventet = pd.read_sql(FORWARD_PASSES_SQL, db)
+
+    lokal = analyse_load._tilfoej_fremadrettede(kampe, analyse_load.byg_fremadrettede_pasninger(events))
+
+    assert list(lokal.columns) == [
+        "MATCH_OPTAUUID", "CONTESTANTHOME_OPTAUUID", "CONTESTANTAWAY_OPTAUUID",
+        "HOME_FORMATION", "HOME_FORWARD_PASSES", "AWAY_FORMATION", "AWAY_FORWARD_PASSES",
+    ]
+    assert lokal["AWAY_FORWARD_PASSES"].isna().sum() == 1
+    pd.testing.assert_frame_equal(lokal[forventet.columns], forventet, check_dtype=False)
@@ -0,0 +1,143 @@
+"""
+_byg_event_stats (flag + én groupby().agg()) sammenlignet med baseline-versionen
+fra tools/players/player_actions.py (rækkevis _get_quals/har_qualifier i
+groupby().apply()). Tidsmåling: PYTHONPATH=. python tests/test_event_stats.py
+"""
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from data import spiller_load
+from data.utils.event_dtyper import komprimer_events
+
+TYPER = [1, 1, 1, 3, 4, 5, 7, 8, 12, 13, 16, 17, 18, 19, 49, 55]
+QUALIFIERS = [2, 4, 29, 31, 33, 155, 210, 211, 285, 286, 464, 465, 467]
+
+
+def _events(n=20000, seed=7):
+    rng = np.random.default_rng(seed)
+    spiller = rng.choice([f"p{i}" for i in range(120)], n)
+    df = pd.DataFrame({
+        "player_optauuid": spiller,
+        "visningsnavn": [f"Spiller {s}" for s in spiller],
+        "match_optauuid": rng.choice([f"k{i}" for i in range(40)], n),
+        "event_typeid": rng.choice(TYPER, n),
+        "outcome": rng.integers(0, 2, n),
+        "event_timestamp_str": "2026-08-01 12:00:00",
+        "qualifiers": [
+            ",".join(str(q) for q in rng.choice(QUALIFIERS, rng.integers(0, 4), replace=False)) or None
+            for _ in range(n)
+        ],
+    })
+    return spiller_load._forbered_events(df)
+
+
+# --- BASELINE (kopieret uændret fra tools/players/player_actions.py og data/utils/mapping.py) ---
+def har_qualifier(event_typeid, qualifiers_list, target_event_id, target_qual_ids):
+    """
+    Tjekker om en hændelse matcher en specifik event type samt indeholder én eller flere angivne qualifiers.
+    """
+    if str(event_typeid) != str(target_event_id):
+        return False
+        
+    if not qualifiers_list:
+        return False
+        
+    if isinstance(target_qual_ids, (int, str)):
+        target_list = [str(target_qual_ids)]
+    else:
+        target_list = [str(q) for q in target_qual_ids]
+        
+    ql_str = [str(q).strip() for q in qualifiers_list]
+    
+    return any(tq in ql_str for tq in target_list)
+
+
+def _get_quals(r):
+    ql = r.get('qual_list', [])
+    if isinstance(ql, list):
+        return [str(q).strip() for q in ql]
+    return [str(q).strip() for q in str(ql).split(',')]
+
+
+def count_kamp_qual(df_group, eid, qids):
+    return df_group.apply(lambda r: har_qualifier(r['event_typeid'], r.get('qual_list', []), eid, qids), axis=1).sum()
+
+
+def _byg_event_stats_baseline(df_events: pd.DataFrame) -> pd.DataFrame:
+    return df_events.groupby(['player_optauuid', 'visningsnavn']).apply(lambda x: pd.Series({
+        'Kampe': x['match_optauuid'].nunique() if 'match_optauuid' in x.columns else 1,
+        'Aktioner': len(x),
+        'Gule_kort': count_kamp_qual(x, 17, 31),
+        'Roede_kort': count_kamp_qual(x, 17, 33),
+        'Indskiftet': (x['event_typeid'] == 19).sum(),
+        'Udskiftet': (x['event_typeid'] == 18).sum(),
+        'Pasninger': x['Pasninger_Total'].sum() if 'Pasninger_Total' in x.columns else 0,
+        'Pasninger_Succes': x['Pasninger_Succes'].sum() if 'Pasninger_Succes' in x.columns else 0,
+        'Stikninger': count_kamp_qual(x, 1, 4),
+        'Indlæg': count_kamp_qual(x, 1, [2, 155]),
+        'Afslutninger': x['event_typeid'].isin([13, 14, 15, 16]).sum(),
+        'Erobringer': x['event_typeid'].isin([7, 8, 12, 49]).sum(),
+        'Driblinger': (x['event_typeid'] == 3).sum(),
+        'Driblinger_Succes': x.apply(lambda r: 1 if str(r['event_typeid']) == "3" and "211" not in _get_quals(r) else 0, axis=1).sum(),
+        'Gennembrud_Overtake': x.apply(lambda r: 1 if str(r['event_typeid']) == "3" and "465" in _get_quals(r) else 0, axis=1).sum(),
+        'Rum_Driblinger_Space': x.apply(lambda r: 1 if str(r['event_typeid']) == "3" and "464" in _get_quals(r) else 0, axis=1).sum(),
+        'Offensive_Dueller': x.apply(lambda r: 1 if "286" in _get_quals(r) else 0, axis=1).sum(),
+        'Defensive_Dueller': x.apply(lambda r: 1 if "285" in _get_quals(r) else 0, axis=1).sum(),
+        'Defensive_1v1_Stoppet': x.apply(lambda r: 1 if "467" in _get_quals(r) else 0, axis=1).sum(),
+        'Chancer_skabt': x.apply(lambda r: 1 if '210' in _get_quals(r) else 0, axis=1).sum(),
+        'Key_Passes': x.apply(lambda r: 1 if '210' in _get_quals(r) else 0, axis=1).sum(),
+        'Tacklinger': (x['event_typeid'] == 7).sum(),
+        'Clearinger': (x['event_typeid'] == 12).sum(),
+        'Blokeringer': (x['event_typeid'] == 55).sum(),
+        'Interceptioner': (x['event_typeid'] == 5).sum(),
+        'Frispark_imod': (x['event_typeid'] == 4).sum()
+    })).reset_index().drop_duplicates(subset=['player_optauuid']).set_index('player_optauuid')
+# --- SLUT BASELINE ---
+
+
+def _byg_event_stats_foer(df_events):
+    """Baseline-versionen på de events, den kendte: ukomprimerede object-kolonner."""
+    kategorier = df_events.select_dtypes('category').columns
+    df_events = df_events.astype({k: object for k in kategorier})
+    # Baseline giver pandas' FutureWarning om grupperingskolonner i apply
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", FutureWarning)
+        return _byg_event_stats_baseline(df_events)
+
+
+def _sammenlign(df):
+    ny = spiller_load._byg_event_stats(df)
+    gammel = _byg_event_stats_foer(df)
+    assert list(ny.columns) == ['visningsnavn'] + spiller_load.EVENT_STATS_KOLONNER
+    pd.testing.assert_frame_equal(ny.sort_index(), gammel[ny.columns].sort_index(), check_dtype=False)
+
+
+def test_samme_tal_som_foer():
+    _sammenlign(_events())
+
+
+def test_samme_tal_som_foer_med_komprimerede_events():
+    _sammenlign(komprimer_events(_events()))
+
+
+def test_samme_tal_som_foer_uden_kampkolonne():
+    _sammenlign(_events(n=2000).drop(columns=["match_optauuid"]))
+
+
+def _tid(funktion, df, gentagelser=5):
+    bedste = float("inf")
+    for _ in range(gentagelser):
+        start = time.perf_counter()
+        funktion(df)
+        bedste = min(bedste, time.perf_counter() - start)
+    return bedste
+
+
+if __name__ == "__main__":
+    for n in (20000, 200000):
+        df = _events(n)
+        foer, efter = _tid(_byg_event_stats_foer, df), _tid(spiller_load._byg_event_stats, df)
+        print(f"{n:>7} events: før {foer * 1000:7.1f} ms  efter {efter * 1000:7.1f} ms  ({foer / efter:.1f}x)")
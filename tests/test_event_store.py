@@ -0,0 +1,97 @@
+import os
+import threading
+import time
+
+import pandas as pd
+
+from data import event_store
+from data.event_store import EventStore
+
+
+def _events(match_ids):
+    return pd.DataFrame({
+        "MATCH_OPTAUUID": [m for m in match_ids for _ in range(3)],
+        "EVENT_TYPEID": [1, 2, 3] * len(match_ids),
+    })
+
+
+def _aeldes(store, m, sekunder):
+    sti = store._sti(m)
+    t = time.time() - sekunder
+    os.utime(sti, (t, t))
+
+
+def test_kommende_kampe_hentes_ikke_igen(tmp_path):
+    store = EventStore("t", base_dir=str(tmp_path))
+    status = {"spillet": "Played", "kommende": "Fixture"}
+    hentet = []
+
+    def hent(ids):
+        hentet.append(list(ids))
+        return _events([m for m in ids if m == "spillet"])
+
+    assert store.opdater(status, hent) == 2
+    _aeldes(store, "kommende", event_store.UAFSLUTTET_TTL + 60)
+    assert store.mangler(status) == []
+    assert store.opdater(status, hent) == 0
+    assert len(hentet) == 1
+
+
+def test_statusskift_og_igangvaerende_kampe_hentes(tmp_path):
+    store = EventStore("t", base_dir=str(tmp_path))
+    store.opdater({"a": "Fixture", "b": "Playing"}, lambda ids: _events([m for m in ids if m == "b"]))
+
+    # Uændret status: kampen i gang hentes først igen, når filen er ældre end TTL
+    assert store.mangler({"a": "Fixture", "b": "Playing"}) == []
+    _aeldes(store, "b", event_store.UAFSLUTTET_TTL + 60)
+    assert store.mangler({"a": "Fixture", "b": "Playing"}) == ["b"]
+
+    # Statusskift hentes altid
+    assert store.mangler({"a": "Playing", "b": "Playing"}) == ["a", "b"]
+    assert store.mangler({"a": "Fixture", "b": "Playing", "c": "Fixture"}) == ["b", "c"]
+
+
+def test_batchvis_med_null_kolonne_i_foerste_gruppe(tmp_path):
+    store = EventStore("t", base_dir=str(tmp_path))
+    # END_X/QUALIFIERS er kun null i første gruppe (Arrow-typen null), EVENT_X skifter int -> float
+    b1 = pd.DataFrame({
+        "MATCH_OPTAUUID": ["a", "a"], "EVENT_X": [1, 2], "END_X": [None, None], "QUALIFIERS": [None, None],
+    })
+    b2 = pd.DataFrame({
+        "MATCH_OPTAUUID": ["b", "a"], "EVENT_X": [1.5, 3.0], "END_X": ["50.1", "3"], "QUALIFIERS": ["1,2", None],
+    })
+    store.gem_batchvis(iter([b1, b2]), {"a": "Played", "b": "Played", "c": "Fixture"})
+
+    df = store.laes(["a", "b", "c"])
+    assert df["MATCH_OPTAUUID"].tolist() == ["a", "a", "a", "b"]
+    assert df["EVENT_X"].tolist() == [1.0, 2.0, 3.0, 1.5]
+    assert df["END_X"].tolist() == [None, None, "3", "50.1"]
+    assert df["QUALIFIERS"].tolist()[-1] == "1,2"
+    assert store.mangler({"a": "Played", "b": "Played", "c": "Fixture"}) == []
+
+
+def test_samtidige_gem_mister_ingen_kampe(tmp_path):
+    # Hver tråd har sin egen EventStore på samme mappe, som i liga_spillere._event_lager
+    n_traade, kampe_pr_traad = 8, 10
+    start = threading.Barrier(n_traade)
+
+    def skriv(t):
+        store = EventStore("t", base_dir=str(tmp_path))
+        start.wait()
+        for i in range(kampe_pr_traad):
+            m = f"k{t}_{i}"
+            store.gem(_events([m]), {m: "Played"})
+            # samme kamp fra alle tråde, så temp-filerne ville ramme hinanden
+            store.gem(_events(["faelles"]), {"faelles": "Played"})
+
+    traade = [threading.Thread(target=skriv, args=(t,)) for t in range(n_traade)]
+    for t in traade:
+        t.start()
+    for t in traade:
+        t.join()
+
+    store = EventStore("t", base_dir=str(tmp_path))
+    manifest = store.manifest()
+    assert len(manifest) == n_traade * kampe_pr_traad + 1
+    assert len(store.laes()) == 3 * len(manifest)
+    assert not [f for f in os.listdir(store.dir) if f.endswith(".tmp")]
@@ -0,0 +1,95 @@
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from PIL import Image
+
+from utils.figur_cache import FigurCache, fingeraftryk
+
+FARVE = "#cc0000"
+
+
+class _Kald:
+    """Kald-log uden for fingeraftrykket (kun simple globale værdier hashes)."""
+
+    def __init__(self):
+        self.titler = []
+
+
+KALD = _Kald()
+
+
+def _punkt_stoerrelse():
+    return 12
+
+
+def _tegn(df, titel="", logo=None):
+    KALD.titler.append(titel)
+    fig, ax = plt.subplots(figsize=(2, 2))
+    ax.scatter(df["x"], df["y"], c=FARVE, s=_punkt_stoerrelse())
+    ax.set_title(titel)
+    return fig
+
+
+def _tom(df):
+    KALD.titler.append("tom")
+    return None
+
+
+def _df(seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({"x": rng.uniform(0, 100, 50), "y": rng.uniform(0, 100, 50)})
+
+
+def test_fingeraftryk_ens_for_ens_indhold():
+    logo = Image.new("RGBA", (4, 4), (200, 0, 0, 255))
+    a = fingeraftryk(_tegn, (_df(),), {"titel": "HIF", "logo": logo, "hold": {"h1", "h2"}})
+    # Nye objekter med samme indhold (og en set i en anden rækkefølge) giver samme nøgle
+    b = fingeraftryk(_tegn, (_df(),), {"titel": "HIF", "logo": logo.copy(), "hold": {"h2", "h1"}})
+    assert a == b
+
+
+def test_fingeraftryk_skifter_med_data_argumenter_konstanter_og_hjaelpere(monkeypatch):
+    df = _df()
+    grund = fingeraftryk(_tegn, (df,), {"titel": "HIF"})
+    aendret = df.copy()
+    aendret.loc[3, "x"] += 0.1
+    varianter = [
+        fingeraftryk(_tegn, (aendret,), {"titel": "HIF"}),
+        fingeraftryk(_tegn, (df[["y", "x"]],), {"titel": "HIF"}),
+        fingeraftryk(_tegn, (df.astype("float32"),), {"titel": "HIF"}),
+        fingeraftryk(_tegn, (df,), {"titel": "AaB"}),
+        fingeraftryk(_tom, (df,), {"titel": "HIF"}),
+    ]
+    monkeypatch.setitem(globals(), "FARVE", "#003399")
+    varianter.append(fingeraftryk(_tegn, (df,), {"titel": "HIF"}))
+    monkeypatch.setitem(globals(), "FARVE", "#cc0000")
+    monkeypatch.setitem(globals(), "_punkt_stoerrelse", lambda: 30)
+    varianter.append(fingeraftryk(_tegn, (df,), {"titel": "HIF"}))
+    assert len({grund, *varianter}) == len(varianter) + 1
+
+
+def test_render_hit_miss_og_disk(tmp_path):
+    KALD.titler.clear()
+    cache = FigurCache(cache_dir=str(tmp_path))
+    png = cache.render(_tegn, _df(), titel="HIF")
+    assert png.startswith(b"\x89PNG") and KALD.titler == ["HIF"]
+
+    assert cache.render(_tegn, _df(), titel="HIF") == png
+    assert KALD.titler == ["HIF"]
+
+    cache.render(_tegn, _df(), titel="AaB")
+    cache.render(_tegn, _df(), titel="HIF", dpi=100)
+    assert KALD.titler == ["HIF", "AaB", "HIF"]
+
+    # En ny proces (ny instans, tom hukommelse) finder figuren på disken
+    assert FigurCache(cache_dir=str(tmp_path)).render(_tegn, _df(), titel="HIF") == png
+    assert KALD.titler == ["HIF", "AaB", "HIF"]
+    assert not [f for f in tmp_path.iterdir() if f.name.endswith(".tmp")]
+
+
+def test_render_husker_at_der_intet_var_at_tegne():
+    KALD.titler.clear()
+    cache = FigurCache(cache_dir=None)
+    assert cache.render(_tom, _df()) is None
+    assert cache.render(_tom, _df()) is None
+    assert KALD.titler == ["tom"]
@@ -0,0 +1,77 @@
+import re
+
+import pandas as pd
+
+from data import data_load
+from data.data_load import ResultCache, CachedConnection, hent_kolonner
+
+TABEL = pd.DataFrame({
+    "MATCH_OPTAUUID": ["k1", "k2"],
+    "WEEK": [1, 2],
+    "MATCH_STATUS": ["Played", "Fixture"],
+    "VENUE_LONGNAME": ["Hvidovre Stadion", "Ukendt"],
+})
+
+
+class TabelForbindelse:
+    """Falsk forbindelse over TABEL; husker hvilke kolonner hver query bad om."""
+
+    def __init__(self):
+        self.tabel = TABEL.copy()
+        self.hentet = []
+
+    def query(self, sql, params=None, **kwargs):
+        kol = re.match(r"SELECT (.*?) FROM", sql).group(1)
+        if kol == "*":
+            return self.tabel.iloc[0:0]
+        kol = [k.strip() for k in kol.split(",")]
+        self.hentet.append(kol)
+        return self.tabel[kol].copy()
+
+
+def _conn(tmp_path):
+    raw = TabelForbindelse()
+    return CachedConnection(raw, ResultCache(cache_dir=str(tmp_path))), raw
+
+
+def test_manglende_kolonner_udelades(tmp_path):
+    conn, raw = _conn(tmp_path)
+    df = hent_kolonner(conn, "OPTA_MATCHINFO", ["MATCH_OPTAUUID", "WEEK", "MATCH_LOCALTIME"], "1=1")
+    assert list(df.columns) == ["MATCH_OPTAUUID", "WEEK"]
+    # Sidernes fallback virker: kl. '' og ikke kl. None
+    assert df.iloc[0].get("MATCH_LOCALTIME", "") == ""
+    assert raw.hentet == [["MATCH_OPTAUUID", "WEEK"]]
+
+
+def test_delmaengde_slaas_op_i_cachen(tmp_path):
+    conn, raw = _conn(tmp_path)
+    hent_kolonner(conn, "OPTA_MATCHINFO", ["MATCH_OPTAUUID", "WEEK", "MATCH_STATUS"], "1=1")
+    df = hent_kolonner(conn, "OPTA_MATCHINFO", ["MATCH_OPTAUUID", "MATCH_STATUS"], "1=1")
+    assert len(raw.hentet) == 1
+    assert df["MATCH_STATUS"].tolist() == ["Played", "Fixture"]
+
+
+def test_ny_kolonne_henter_alle_kolonner_fra_samme_hentning(tmp_path):
+    conn, raw = _conn(tmp_path)
+    hent_kolonner(conn, "OPTA_MATCHINFO", ["MATCH_OPTAUUID", "MATCH_STATUS"], "1=1")
+    raw.tabel.loc[1, "MATCH_STATUS"] = "Played"
+
+    df = hent_kolonner(conn, "OPTA_MATCHINFO", ["MATCH_OPTAUUID", "WEEK", "MATCH_STATUS"], "1=1")
+    # Den cachede MATCH_STATUS blandes ikke med den nye WEEK - begge hentes igen
+    assert raw.hentet[-1] == ["MATCH_OPTAUUID", "WEEK", "MATCH_STATUS"]
+    assert df["MATCH_STATUS"].tolist() == ["Played", "Played"]
+
+    # Begge sider kan nu slås op uden nye queries, og den forrige hentning er ryddet væk
+    hent_kolonner(conn, "OPTA_MATCHINFO", ["MATCH_OPTAUUID", "MATCH_STATUS"], "1=1")
+    hent_kolonner(conn, "OPTA_MATCHINFO", ["MATCH_OPTAUUID", "WEEK"], "1=1")
+    assert len(raw.hentet) == 2
+    kolonnefiler = [f.name for f in tmp_path.iterdir() if f.name.endswith(("__WEEK.parquet", "__MATCH_STATUS.parquet"))]
+    assert len(kolonnefiler) == 2
+
+
+def test_foraeldet_hentning_hentes_igen(tmp_path, monkeypatch):
+    conn, raw = _conn(tmp_path)
+    hent_kolonner(conn, "OPTA_MATCHINFO", ["MATCH_OPTAUUID", "WEEK"], "1=1")
+    monkeypatch.setattr(data_load, "_ttl_for_tabel", lambda tabel: -1)
+    hent_kolonner(conn, "OPTA_MATCHINFO", ["MATCH_OPTAUUID", "WEEK"], "1=1")
+    assert len(raw.hentet) == 2
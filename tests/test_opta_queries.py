@@ -0,0 +1,25 @@
+from data.sql.opta_queries import get_opta_queries, HIF_UUID
+
+
+def _udfyld(sql, params):
+    # Connectoren (paramstyle pyformat) fletter parametrene ind med %-formatering
+    return sql % {k: f"'{v}'" for k, v in params.items()}
+
+
+def test_id_er_bindes_som_parametre():
+    for hif_only in (False, True):
+        queries = get_opta_queries("NordicBet Liga", "2025/2026", hif_only=hif_only)
+        for navn, q in queries.items():
+            if q is None:
+                continue
+            sql, params = q
+            assert sql.startswith(f"/* {navn} v1 */")
+            assert HIF_UUID not in sql and "2mb332vncy4450vu14paj8844" not in sql
+            tekst = _udfyld(sql, params)
+            assert "%(" not in tekst
+
+
+def test_fysisk_query_kun_for_valgt_kamp():
+    assert get_opta_queries("NordicBet Liga", "2025/2026")["opta_physical_stats"] is None
+    sql, params = get_opta_queries("NordicBet Liga", "2025/2026", match_uuid=" abc ")["opta_physical_stats"]
+    assert "MATCH_SSIID = %(match_id)s" in sql and params == {"match_id": "abc"}
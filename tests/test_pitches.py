@@ -0,0 +1,24 @@
+import threading
+
+from utils.pitches import BaneSkabelon
+
+
+def test_samtidige_raster_i_forskellige_dpi_faar_hver_sin_stoerrelse():
+    # Skabelonen deles mellem tråde via lru_cache; hver dpi skal caches med sin egen størrelse
+    skabelon = BaneSkabelon(pitch_type='opta', figsize=(4, 3))
+    dpier = [50, 72, 100, 150] * 4
+    start = threading.Barrier(len(dpier))
+
+    def tegn(dpi):
+        start.wait()
+        skabelon.raster(dpi)
+
+    traade = [threading.Thread(target=tegn, args=(dpi,)) for dpi in dpier]
+    for t in traade:
+        t.start()
+    for t in traade:
+        t.join()
+
+    for dpi in set(dpier):
+        hoejde, bredde = skabelon.raster(dpi).shape[:2]
+        assert (bredde, hoejde) == (round(4 * dpi), round(3 * dpi))
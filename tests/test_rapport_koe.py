@@ -0,0 +1,57 @@
+import time
+
+import pytest
+
+from utils.rapport_koe import RapportKoe, FAERDIG, FEJL
+
+
+# Byggefunktionerne skal ligge på modulniveau - workeren importerer dem ('spawn')
+def _byg(hold, saeson, fremskridt):
+    fremskridt(0.5, "Halvvejs")
+    return f"%PDF {hold} {saeson}".encode("utf-8")
+
+
+def _byg_fejl(fremskridt):
+    raise ValueError("ingen data")
+
+
+def _vent(job, timeout=60):
+    slut = time.monotonic() + timeout
+    while job.aktiv and time.monotonic() < slut:
+        time.sleep(0.05)
+    return job
+
+
+@pytest.fixture
+def koe(tmp_path):
+    koe = RapportKoe(cache_dir=str(tmp_path))
+    yield koe
+    if koe._pool is not None:
+        koe._pool.shutdown(wait=True)
+
+
+def test_rapport_rundtur_via_worker_og_disk(koe, tmp_path):
+    job = _vent(koe.bestil("hvidovre-2026", _byg, "Hvidovre", "2026/2027"))
+    assert job.tilstand == FAERDIG
+    assert job.data == b"%PDF Hvidovre 2026/2027"
+    assert (job.andel, job.tekst) == (1.0, "Færdig")
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["hvidovre-2026.pdf"]
+
+    # Samme nøgle igen er et opslag - der bestilles ikke et nyt job
+    assert koe.bestil("hvidovre-2026", _byg, "Hvidovre", "2026/2027") is job
+
+    # Efter en genstart (ny kø på samme mappe) hentes rapporten fra disken uden en worker
+    ny = RapportKoe(cache_dir=str(tmp_path))
+    fra_disk = ny.job("hvidovre-2026")
+    assert fra_disk.tilstand == FAERDIG and fra_disk.data == job.data
+    assert ny.job("ukendt") is None and ny._pool is None
+
+
+def test_fejlet_rapport_kan_bestilles_igen(koe, tmp_path):
+    job = _vent(koe.bestil("fejl", _byg_fejl))
+    assert job.tilstand == FEJL and "ValueError: ingen data" in job.fejl
+    assert not list(tmp_path.iterdir())
+
+    igen = koe.bestil("fejl", _byg_fejl)
+    assert igen is not job
+    assert _vent(igen).tilstand == FEJL
@@ -0,0 +1,41 @@
+import pandas as pd
+
+from data.data_load import ResultCache, CachedConnection
+
+
+class TaelleForbindelse:
+    """Falsk forbindelse, der tæller hvor mange queries der når 'Snowflake'."""
+
+    def __init__(self):
+        self.kald = 0
+
+    def query(self, sql, params=None, **kwargs):
+        self.kald += 1
+        return pd.DataFrame({"A": [self.kald], "P": [repr(params)]})
+
+
+SQL = "SELECT A FROM KLUB_HVIDOVREIF.AXIS.OPTA_MATCHINFO WHERE MATCH_OPTAUUID IN (%s)"
+
+
+def test_invalider_parameteriseret_query_rammer_kun_den_ene(tmp_path):
+    cache = ResultCache(cache_dir=str(tmp_path))
+    raw = TaelleForbindelse()
+    conn = CachedConnection(raw, cache)
+
+    conn.query(SQL, params=("a",))
+    conn.query(SQL, params=("b",))
+    conn.query(SQL, params=("a",))
+    assert raw.kald == 2
+
+    assert conn.invalider(sql=SQL, params=("a",)) == 1
+    conn.query(SQL, params=("a",))
+    conn.query(SQL, params=("b",))
+    assert raw.kald == 3  # kun 'a' blev hentet igen
+
+
+def test_invalider_uden_params_rammer_ikke_parameteriserede(tmp_path):
+    cache = ResultCache(cache_dir=str(tmp_path))
+    conn = CachedConnection(TaelleForbindelse(), cache)
+    conn.query(SQL, params=("a",))
+    assert conn.invalider(sql=SQL) == 0
+    assert conn.invalider(sql=SQL, params=("a",)) == 1
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.utils.rum_gitter import RumGitter
+
+
+def _events(seed=4):
+    rng = np.random.default_rng(seed)
+    n = 20000
+    # Opta-koordinater har én decimal, så mange punkter ligger præcis på cellekanterne
+    df = pd.DataFrame({
+        "x": rng.uniform(-5, 105, n).round(1),
+        "y": rng.uniform(-5, 105, n).round(1),
+        "hold": rng.choice(["h1", "h2", "h3"], n),
+        "kamp": rng.choice([f"k{i}" for i in range(10)], n),
+    })
+    df.loc[rng.choice(n, 50, replace=False), "x"] = np.nan
+    df.loc[:3, ["x", "y"]] = [[0, 0], [100, 100], [29.0, 57.0], [100, 0]]
+    return df
+
+
+def _histogram2d(df, bins, omraade):
+    H, _, _ = np.histogram2d(df["y"], df["x"], bins=[bins[1], bins[0]], range=[omraade[1], omraade[0]])
+    return H
+
+
+@pytest.mark.parametrize("bins", [(100, 100), (105, 68), (50, 34), (7, 3)])
+def test_sum_som_histogram2d(bins):
+    df = _events()
+    omraade = ((0.0, 100.0), (0.0, 100.0))
+    gitter = RumGitter(df, "x", "y", ["hold", "kamp"], bins=bins, omraade=omraade)
+
+    np.testing.assert_array_equal(gitter.sum(), _histogram2d(df, bins, omraade))
+    udsnit = df[(df["hold"] == "h2") & df["kamp"].isin(["k1", "k4", "k7"])]
+    np.testing.assert_array_equal(gitter.sum(hold="h2", kamp=["k1", "k4", "k7"]), _histogram2d(udsnit, bins, omraade))
+    assert gitter.antal(hold="h2", kamp=["k1", "k4", "k7"]) == _histogram2d(udsnit, bins, omraade).sum()
+
+
+def test_sum_som_histogram2d_i_meter():
+    df = _events().assign(x=lambda d: d["x"] * 1.05, y=lambda d: d["y"] * 0.68)
+    omraade = ((0.0, 105.0), (0.0, 68.0))
+    gitter = RumGitter(df, "x", "y", ["hold"], bins=(105, 68), omraade=omraade)
+    np.testing.assert_array_equal(gitter.sum(hold="h1"), _histogram2d(df[df["hold"] == "h1"], (105, 68), omraade))
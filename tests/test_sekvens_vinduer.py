@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+from data.utils.sekvens_vinduer import TidsIndeks, MAAL
+
+
+def _events(seed=9):
+    rng = np.random.default_rng(seed)
+    raekker = []
+    for k in range(5):
+        n = 400
+        # Hele sekunder giver mange events præcis på vindueskanten; et par får millisekunder
+        sekunder = rng.integers(0, 900, n) + np.where(rng.random(n) < 0.1, rng.integers(1, 999, n) / 1000, 0)
+        tid = pd.Timestamp("2026-08-01 15:00:00") + pd.to_timedelta(sekunder, unit="s")
+        raekker.append(pd.DataFrame({
+            "EVENT_OPTAUUID": [f"k{k}_e{i}" for i in range(n)],
+            "MATCH_OPTAUUID": f"k{k}",
+            "EVENT_EVENTID": rng.permutation(n),
+            "EVENT_TIMESTAMP": tid,
+            "EVENT_TYPEID": rng.choice([1, 1, 1, 4, 13, 16], n),
+            "EVENT_CONTESTANT_OPTAUUID": rng.choice(["h1", "h2"], n),
+        }))
+    df = pd.concat(raekker, ignore_index=True)
+    df.loc[rng.choice(len(df), 20, replace=False), "EVENT_TIMESTAMP"] = pd.NaT
+    return df.sample(frac=1, random_state=1).reset_index(drop=True)
+
+
+def _brute_force(df, typer, sekunder, efter=0, hold=None, maks_events=None):
+    """Hvert mål mod alle kampens events - én sammenligning pr. par, som en range-join."""
+    df = df[df["EVENT_TIMESTAMP"].notna()].sort_values(
+        ["MATCH_OPTAUUID", "EVENT_TIMESTAMP", "EVENT_EVENTID"], kind="mergesort"
+    )
+    udloesere = df[df["EVENT_TYPEID"].isin(typer)]
+    if hold is not None:
+        udloesere = udloesere[udloesere["EVENT_CONTESTANT_OPTAUUID"] == hold]
+    vinduer = []
+    for nr, u in enumerate(udloesere.itertuples()):
+        i_vindue = (
+            (df["MATCH_OPTAUUID"] == u.MATCH_OPTAUUID)
+            & (df["EVENT_TIMESTAMP"] >= u.EVENT_TIMESTAMP - pd.Timedelta(seconds=sekunder))
+            & (df["EVENT_TIMESTAMP"] <= u.EVENT_TIMESTAMP + pd.Timedelta(seconds=efter))
+        )
+        if hold is not None:
+            i_vindue &= df["EVENT_CONTESTANT_OPTAUUID"] == hold
+        vindue = df[i_vindue].assign(VINDUE_NR=nr, MAAL_ID=u.EVENT_OPTAUUID)
+        if maks_events is not None:
+            vindue = vindue.tail(maks_events)
+        vinduer.append(vindue)
+    return pd.concat(vinduer, ignore_index=True)
+
+
+def _sammenlign(df, typer=MAAL, hold=None, **kw):
+    indeks = TidsIndeks(df)
+    ny = indeks.vinduer(indeks.udloesere(typer, hold=hold), hold=hold,
+                        udloeser_kolonner={"MAAL_ID": "EVENT_OPTAUUID"}, **kw)
+    forventet = _brute_force(df, typer, hold=hold, **kw)
+    assert len(forventet) > 0
+    pd.testing.assert_frame_equal(ny, forventet[ny.columns], check_dtype=False)
+
+
+def test_vinduer_foer_maal_som_brute_force():
+    _sammenlign(_events(), sekunder=20)
+
+
+def test_vinduer_med_hold_efter_og_maks_events_som_brute_force():
+    df = _events()
+    _sammenlign(df, hold="h1", sekunder=20)
+    _sammenlign(df, typer=(13, 16), sekunder=7.5, efter=3, maks_events=4)
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from data.utils.event_kaeder import EventKaede
+from tools.standarder import setpieces, stpieces
+
+KAEDE_KOLONNER = ['EVENT_OPTAUUID', 'MATCH_OPTAUUID', 'EVENT_EVENTID', 'TEAM_UUID', 'EVENT_TYPEID', 'PLAYER_UUID', 'PLAYER_NAME']
+
+
+def _tilfoej_naeste_events_foer(df):
+    """Versionen før opdelingen: hele ligaens events i én frame, filtreret efter kæden."""
+    kaede = EventKaede(df, partition=['MATCH_OPTAUUID'], orden=['EVENT_EVENTID'])
+    df = kaede.df.assign(
+        P1_UUID=kaede.naeste('PLAYER_UUID'),
+        P1_NAME=kaede.naeste('PLAYER_NAME'),
+        P1_TEAM=kaede.naeste('TEAM_UUID'),
+        P1_TYPE=kaede.naeste('EVENT_TYPEID'),
+        P2_TYPE=kaede.naeste('EVENT_TYPEID', 2),
+        P3_TYPE=kaede.naeste('EVENT_TYPEID', 3),
+    )
+    return df[df['TYPE_NAVN'].notna()].reset_index(drop=True)
+
+
+def _events(n=5000, seed=11):
+    rng = np.random.default_rng(seed)
+    spiller = rng.choice([f"p{i}" for i in range(30)], n)
+    return pd.DataFrame({
+        'EVENT_OPTAUUID': [f"e{i}" for i in range(n)],
+        'MATCH_OPTAUUID': rng.choice([f"k{i}" for i in range(8)], n),
+        # Gentagne event-id'er inden for en kamp, som når begge hold tæller fra 1
+        'EVENT_EVENTID': rng.integers(0, 400, n),
+        'TEAM_UUID': rng.choice(["h1", "h2"], n),
+        'EVENT_TYPEID': rng.choice([1, 1, 3, 5, 6, 13, 15, 16], n),
+        'PLAYER_UUID': spiller,
+        'PLAYER_NAME': [f"Spiller {s}" for s in spiller],
+        'EVENT_X': rng.uniform(0, 100, n),
+        'TYPE_NAVN': rng.choice(['Hjørnespark', 'Frispark', 'Indkast', None, None, None, None, None, None], n),
+    })
+
+
+def test_naeste_events_som_med_hele_ligaen():
+    df = _events()
+    forventet = _tilfoej_naeste_events_foer(df)
+    standard = df[df['TYPE_NAVN'].notna()].sample(frac=1, random_state=0)
+    for modul in (setpieces, stpieces):
+        ny = modul.tilfoej_naeste_events(standard, df[KAEDE_KOLONNER])
+        pd.testing.assert_frame_equal(ny, forventet[ny.columns])
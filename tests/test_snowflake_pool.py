@@ -0,0 +1,54 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from data import data_load
+from data.analyse_load import MAX_PARALLELLE_QUERIES
+from data.data_load import SnowflakePool, PooledConnection, PoolTimeout
+
+
+class LangsomForbindelse:
+    """Falsk snowflake.connector-forbindelse, hvor hver query tager `varighed` sekunder."""
+
+    def __init__(self, varighed):
+        self.varighed = varighed
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=None, **kwargs):
+        time.sleep(self.varighed)
+
+    def fetch_pandas_all(self):
+        return pd.DataFrame({"A": [1]})
+
+    def close(self):
+        pass
+
+    def is_closed(self):
+        return False
+
+
+def test_poolen_rummer_en_sides_parallelle_queries():
+    assert data_load.POOL_STOERRELSE >= MAX_PARALLELLE_QUERIES
+
+
+def test_fuld_pool_giver_koe_og_ikke_fejl():
+    # 2 pladser, 6 parallelle queries og en checkout-timeout kortere end den samlede ventetid
+    pool = SnowflakePool(lambda: LangsomForbindelse(0.15), stoerrelse=2, checkout_timeout=0.2)
+    conn = PooledConnection(pool)
+    with ThreadPoolExecutor(max_workers=6) as ex:
+        resultater = list(ex.map(lambda _: conn.query("SELECT 1"), range(6)))
+    assert all(len(df) == 1 for df in resultater)
+
+
+def test_pool_timeout_efter_alle_forsoeg():
+    pool = SnowflakePool(lambda: LangsomForbindelse(0), stoerrelse=1, checkout_timeout=0.05)
+    optaget = pool.udlaan()
+    try:
+        with pytest.raises(PoolTimeout):
+            PooledConnection(pool).query("SELECT 1")
+    finally:
+        pool.aflever(optaget)
@@ -0,0 +1,125 @@
+"""SQL- og pandas-motoren i data/spiller_load.py skal give samme liga- og trup-stats."""
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data import spiller_load
+from data.sql.liga_spillere import _anvend_player_mapping, _rens_events, _sql_spiller_aggregater
+
+HOLD = ["holda", "holdb", "holdc"]
+TYPER = [1, 1, 1, 1, 3, 4, 5, 7, 8, 12, 13, 15, 16, 17, 18, 19, 44, 49, 55, 61]
+QUALIFIERS = [2, 4, 6, 29, 31, 33, 155, 210, 211, 285, 286, 464, 465, 467]
+NAVNE_MAP = {"s0": "Spiller Nul"}
+
+
+def _raa_events(n=4000, seed=1):
+    """Rå events med samme kolonner som _sql_events returnerer."""
+    rng = np.random.default_rng(seed)
+    spillere = [f"s{i}" for i in range(30)]
+    spiller = rng.choice(spillere, n)
+    kamp = rng.integers(0, 12, n)
+    # s0-s4 skifter hold efter 8. kamp (en spiller har kun ét hold pr. kamp)
+    hold = [
+        HOLD[(int(s[1:]) + (int(s[1:]) < 5 and k >= 8)) % len(HOLD)]
+        for s, k in zip(spiller, kamp)
+    ]
+    qualifiers = [
+        ",".join(str(q) for q in sorted(rng.choice(QUALIFIERS, rng.integers(0, 4), replace=False)))
+        for _ in range(n)
+    ]
+    end_x = np.where(rng.random(n) < 0.3, None, rng.uniform(0, 100, n).round(1).astype(str))
+    return pd.DataFrame({
+        "EVENT_X": rng.uniform(0, 100, n).round(1),
+        "EVENT_Y": rng.uniform(0, 100, n).round(1),
+        "EVENT_TYPEID": rng.choice(TYPER, n),
+        "MATCH_OPTAUUID": [f"k{k}" for k in kamp],
+        "MATCH_NAME": [f"Navn {s}" for s in spiller],
+        "FIRST_NAME": [f"F{s}" for s in spiller],
+        "SHORT_LAST_NAME": [f"E{s}" for s in spiller],
+        "MATCHLENGTHMIN": 95,
+        "PLAYER_OPTAUUID": spiller,
+        "OUTCOME": rng.integers(0, 2, n),
+        "HOLD_OPTAUUID": hold,
+        "EVENT_TIMESTAMP_STR": pd.Timestamp("2026-08-01")
+            + pd.to_timedelta(rng.integers(0, 10**6, n), unit="s"),
+        "QUALIFIERS": [q or None for q in qualifiers],
+        "END_X": end_x,
+        "END_Y": None,
+    }).assign(EVENT_TIMESTAMP_STR=lambda d: d["EVENT_TIMESTAMP_STR"].dt.strftime("%Y-%m-%d %H:%M:%S"))
+
+
+def _expected(df_raa):
+    par = df_raa[["MATCH_OPTAUUID", "PLAYER_OPTAUUID", "HOLD_OPTAUUID"]].drop_duplicates()
+    par.columns = par.columns.str.lower()
+    rng = np.random.default_rng(2)
+    return par.assign(xg=rng.uniform(0, 1, len(par)), xa=rng.uniform(0, 1, len(par)), minutes=rng.integers(1, 91, len(par)))
+
+
+@pytest.fixture
+def motorer(monkeypatch):
+    df_raa = _raa_events()
+    df_expected = _expected(df_raa)
+
+    def hent_liga_aggregater(conn, db_navn, liga_ids, navne_map, kategorier=None):
+        # Motorens aggregat-SQL køres på en SQLite-kopi af eventene (TRY_CAST -> CAST)
+        with sqlite3.connect(":memory:") as db:
+            df_raa.to_sql("Events", db, index=False)
+            sql = (
+                "WITH EventsNum AS (SELECT ev.*, CAST(ev.END_X AS REAL) AS END_X_NUM FROM Events ev)"
+                + _sql_spiller_aggregater("EventsNum", kategorier)
+            )
+            df_agg = pd.read_sql_query(sql, db)
+        return df_expected.copy(), _anvend_player_mapping(df_agg, navne_map)
+
+    def hent_events_batchvis(conn, db_navn, liga_ids, navne_map, kampe_pr_batch=40):
+        kampe = sorted(df_raa["MATCH_OPTAUUID"].unique())
+        for i in range(0, len(kampe), 5):
+            yield _rens_events(df_raa[df_raa["MATCH_OPTAUUID"].isin(kampe[i:i + 5])].copy(), navne_map)
+
+    monkeypatch.setattr(spiller_load, "hent_liga_aggregater", hent_liga_aggregater)
+    monkeypatch.setattr(spiller_load, "hent_events_batchvis", hent_events_batchvis)
+    monkeypatch.setattr(spiller_load, "hent_expected", lambda conn, db_navn, liga_ids: df_expected.copy())
+    monkeypatch.setattr(spiller_load, "hent_hold_events", lambda conn, db_navn, hold, liga_ids, navne_map: _rens_events(
+        df_raa[df_raa["HOLD_OPTAUUID"] == hold].copy(), navne_map
+    ))
+    return spiller_load._liga_stats_sql(None, NAVNE_MAP), spiller_load._liga_stats_pandas(None, NAVNE_MAP)
+
+
+def _sammenlign(sql, pandas_):
+    kolonner = sorted(sql.columns)
+    assert kolonner == sorted(pandas_.columns)
+    a = sql[kolonner].sort_index()
+    b = pandas_[kolonner].sort_index()
+    pd.testing.assert_frame_equal(a, b, check_dtype=False, check_index_type=False, check_names=False)
+
+
+def test_liga_stats_ens_for_begge_motorer(motorer):
+    sql, pandas_ = motorer
+    assert len(sql["liga"]) == 30
+    _sammenlign(sql["liga"], pandas_["liga"])
+    assert sql["liga"].loc["s0", "visningsnavn"] == "Spiller Nul"
+
+
+def test_hold_stats_ens_for_begge_motorer(motorer):
+    sql, pandas_ = motorer
+    assert set(sql["hold_stats"]) == set(pandas_["hold_stats"]) == set(HOLD)
+    for hold in HOLD:
+        _sammenlign(sql["hold_stats"][hold], pandas_["hold_stats"][hold])
+
+
+def test_motorerne_gemmer_ingen_events(motorer):
+    for liga in motorer:
+        assert set(liga) == {"liga", "hold_stats", "expected", "motor"}
+
+
+def test_holdets_events_hentes_ens_paa_begge_veje(motorer):
+    sql = spiller_load._hold_events_sql(None, "holdb", NAVNE_MAP)
+    pandas_ = spiller_load._hold_events_pandas(None, "holdb", NAVNE_MAP)
+    assert len(pandas_) == len(sql) > 0
+    assert set(pandas_["hold_optauuid"].astype(str)) == {"holdb"}
+    noegle = ["match_optauuid", "player_optauuid", "event_timestamp_str", "event_typeid", "Action_Label"]
+    a = sql[noegle].astype(str).sort_values(noegle).reset_index(drop=True)
+    b = pandas_[noegle].astype(str).sort_values(noegle).reset_index(drop=True)
+    pd.testing.assert_frame_equal(a, b)
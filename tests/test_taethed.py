@@ -0,0 +1,57 @@
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+from mplsoccer import Pitch, VerticalPitch
+from scipy.stats import gaussian_kde
+
+from utils.taethed import binned_kde, kde_fra_gitter, kdeplot
+
+
+def _punkter(seed=0):
+    rng = np.random.default_rng(seed)
+    x = np.concatenate([rng.normal(70, 8, 600), rng.normal(30, 12, 400)])
+    y = np.concatenate([rng.normal(40, 10, 600), rng.normal(60, 6, 400)])
+    return x, y, rng.uniform(0.2, 3, len(x))
+
+
+def _gaussian_kde_paa(x, y, xx, yy, vaegte=None):
+    X, Y = np.meshgrid(xx, yy)
+    return gaussian_kde(np.vstack([x, y]), weights=vaegte)(np.vstack([X.ravel(), Y.ravel()])).reshape(X.shape)
+
+
+@pytest.mark.parametrize("med_vaegte", [False, True])
+def test_binned_kde_som_gaussian_kde(med_vaegte):
+    x, y, w = _punkter()
+    vaegte = w if med_vaegte else None
+    xx, yy, Z = binned_kde(x, y, clip=((0, 100), (0, 100)), vaegte=vaegte)
+    ref = _gaussian_kde_paa(x, y, xx, yy, vaegte)
+    assert np.abs(Z - ref).max() < 0.01 * ref.max()
+
+
+def test_kde_fra_gitter_som_gaussian_kde():
+    x, y, _ = _punkter()
+    kx = ky = np.linspace(0, 100, 51)
+    H, _, _ = np.histogram2d(y, x, bins=[ky, kx])
+    xc, yc = (kx[:-1] + kx[1:]) / 2, (ky[:-1] + ky[1:]) / 2
+    Z = kde_fra_gitter(H, xc, yc)
+    ref = _gaussian_kde_paa(x, y, xc, yc)
+    # Gitteret kender kun cellecentrene, så kovariansen er lidt grovere end fra punkterne
+    assert np.abs(Z - ref).max() < 0.05 * ref.max()
+    assert Z.sum() * 2 * 2 == pytest.approx(ref.sum() * 2 * 2, rel=0.01)
+
+
+@pytest.mark.parametrize("klasse", [Pitch, VerticalPitch])
+def test_kdeplot_niveauer_som_seaborn(klasse):
+    x, y, _ = _punkter()
+    pitch = klasse(pitch_type='opta')
+    fig, ax = pitch.draw()
+    try:
+        ny = kdeplot(pitch, x, y, ax=ax, fill=True, levels=8, thresh=0.1)
+        kdeplot(pitch, x, y, ax=ax, fill=True, levels=8, thresh=0.1, motor='seaborn')
+        seaborn = ax.collections[-1]
+    finally:
+        plt.close(fig)
+    np.testing.assert_allclose(ny.levels, seaborn.levels, rtol=0.01)
+    # Niveauerne er ens uanset akse-rækkefølge - det øverste område skal også ligge samme sted
+    top = [np.concatenate(cs.allsegs[-1]).mean(axis=0) for cs in (ny, seaborn)]
+    np.testing.assert_allclose(top[0], top[1], atol=1.5)
@@ -3,37 +3,29 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import plotly.express as px
-from mplsoccer import Pitch, VerticalPitch
+from utils.pitches import ny_bane
+from utils.taethed import kdeplot
+from utils.figur_cache import vis_figur
 from data.data_load import _get_snowflake_conn
 from data.utils.team_mapping import TEAMS
-import requests
-from PIL import Image
-from io import BytesIO
 
 # --- IMPORT FRA DIN MAPPING.PY ---
 from data.utils.mapping import (
     OPTA_EVENT_TYPES, 
     OPTA_QUALIFIERS,
-    get_action_label
+    get_action_labels
 )
+from data.utils.qualifier_index import qualifier_index
+from data.utils.sekvens_vinduer import TidsIndeks, maal_sekvenser
+from utils.assets import get_logo_img, logo_url
 
 # --- 1. KONFIGURATION (OPDATERET 2026) ---
 DB = "KLUB_HVIDOVREIF.AXIS"
+SEKVENS_SEKUNDER = 20  # Standardlængde på mål-sekvenser (t4)
 # Liga-ID'er for Superliga, NordicBet, 2. div, 3. div og Pokalen
 LIGA_IDS = "('dyjr458hcmrcy87fsabfsy87o', 'e5p78j2r7v8h3u9s5k0l2m4n6', 'f6q89k3s8w9i4v0t6l1m3n5o7', '335', '328', '329', '43319', '331')"
 
 # --- 2. HJÆLPEFUNKTIONER ---
-@st.cache_data(ttl=3600)
-def get_logo_img(opta_uuid):
-    """Henter klublogo fra din TEAMS mapping eller via URL"""
-    if not opta_uuid: return None
-    url = next((info['logo'] for name, info in TEAMS.items() if info.get('opta_uuid') == opta_uuid), None)
-    if not url: return None
-    try:
-        response = requests.get(url, timeout=5)
-        return Image.open(BytesIO(response.content))
-    except: return None
-
 def draw_match_row(date, h_name, h_uuid, score, a_name, a_uuid, res_char):
     """Tegner en række i kampoversigten med logoer og farvet resultat-badge"""
     bg_color = "#2e7d32" if res_char == "W" else ("#757575" if res_char == "D" else "#c62828")
@@ -45,12 +37,12 @@ def draw_match_row(date, h_name, h_uuid, score, a_name, a_uuid, res_char):
     with cols[1]: 
         st.markdown(f"<div style='{flex_style} justify-content: flex-end; font-size:13px; font-weight:600; text-align:right;'>{h_name[:12]}</div>", unsafe_allow_html=True)
     with cols[2]:
-        logo_h = next((info['logo'] for name, info in TEAMS.items() if info.get('opta_uuid') == h_uuid), "")
+        logo_h = logo_url(h_uuid) or ""
         if logo_h: st.image(logo_h, width=18)
     with cols[3]: 
         st.markdown(f"<div style='{flex_style} justify-content: center;'><div style='background:#f0f2f6; border-radius:3px; width: 100%; text-align:center; font-size:12px; font-weight:800; padding:2px 0;'>{score}</div></div>", unsafe_allow_html=True)
     with cols[4]:
-        logo_a = next((info['logo'] for name, info in TEAMS.items() if info.get('opta_uuid') == a_uuid), "")
+        logo_a = logo_url(a_uuid) or ""
         if logo_a: st.image(logo_a, width=18)
     with cols[5]: 
         st.markdown(f"<div style='{flex_style} justify-content: flex-start; font-size:13px; font-weight:600; text-align:left;'>{a_name[:12]}</div>", unsafe_allow_html=True)
@@ -175,17 +167,33 @@ def hent_detaljeret_analyse(df_fjende):
         'felt_snit': round(felt_snit, 1)
     }
 
+def plot_maal_sekvens(tge, scoring_team_logo, opp_team_logo, date_str, score_str, min_str):
+    """Målsekvensen på en hel bane: pile mellem aktionerne og spillernavne ved hver aktion"""
+    p, f, ax = ny_bane(pitch_type='opta', pitch_color='#ffffff', line_color='grey', figsize=(10, 7))
+
+    draw_match_info_box(ax, scoring_team_logo, opp_team_logo, date_str, score_str, min_str)
+
+    for i in range(len(tge)-1):
+        p.arrows(tge.iloc[i]['EVENT_X'], tge.iloc[i]['EVENT_Y'], tge.iloc[i+1]['EVENT_X'], tge.iloc[i+1]['EVENT_Y'], width=1, color='black', alpha=0.15, ax=ax)
+
+    for _, r in tge.iterrows():
+        is_goal = str(r['EVENT_TYPEID']) == "16"
+        ax.scatter(r['EVENT_X'], r['EVENT_Y'], color='red' if is_goal else 'black', s=100, edgecolors='white', zorder=10)
+        ax.text(r['EVENT_X'], r['EVENT_Y']+2.5, r['PLAYER_NAME'], fontsize=7, ha='center', fontweight='bold', bbox=dict(facecolor='white', alpha=0.6, edgecolor='none', pad=1), zorder=11)
+    return f
+
+PITCH_KOLONNER = ['EVENT_TYPEID', 'EVENT_X', 'EVENT_Y']  # det plot_custom_pitch bruger af df
+SEKVENS_KOLONNER = PITCH_KOLONNER + ['PLAYER_NAME']
+
 def plot_custom_pitch(df, event_ids, title, zone='full', cmap='Reds', logo=None):
     """Genererer banerplot (KDE/Heatmap)"""
     plot_data = df[df['EVENT_TYPEID'].astype(str).isin([str(i) for i in event_ids])].copy()
-    pitch = VerticalPitch(pitch_type='opta', pitch_color='#ffffff', line_color='#BDBDBD')
-    fig, ax = pitch.draw(figsize=(5, 7))
+    ylim = {'up': (0, 55), 'down': (45, 100)}.get(zone)
+    pitch, fig, ax = ny_bane(lodret=True, pitch_type='opta', pitch_color='#ffffff', line_color='#BDBDBD', figsize=(5, 7), ylim=ylim)
     
     if zone == 'up': 
-        ax.set_ylim(0, 55)
         logo_pos, text_y = [0.04, 0.03, 0.08, 0.08], 0.05
     elif zone == 'down': 
-        ax.set_ylim(45, 100)
         logo_pos, text_y = [0.04, 0.90, 0.08, 0.08], 0.97
     else: 
         logo_pos, text_y = [0.04, 0.90, 0.08, 0.08], 0.97
@@ -196,7 +204,7 @@ def plot_custom_pitch(df, event_ids, title, zone='full', cmap='Reds', logo=None)
     ax.text(0.94, text_y, title, transform=ax.transAxes, fontsize=6, fontweight='bold', ha='right', va='top')
     
     if not plot_data.empty: 
-        pitch.kdeplot(plot_data.EVENT_X, plot_data.EVENT_Y, ax=ax, cmap=cmap, fill=True, alpha=0.5, levels=100)
+        kdeplot(pitch, plot_data.EVENT_X, plot_data.EVENT_Y, ax=ax, cmap=cmap, fill=True, alpha=0.5, levels=100)
     return fig
 
 # --- 3. HOVEDFUNKTION ---
@@ -220,6 +228,9 @@ def vis_side(dp=None):
     valgt_uuid = team_map[valgt_hold]
     hold_logo = get_logo_img(valgt_uuid)
 
+    df_all_events = pd.DataFrame()
+    seq_indeks = None
+
     with st.spinner("Henter data..."):
         # SQL for seneste 10 kampe (Metadata)
         sql_res = f"""
@@ -257,10 +268,10 @@ def vis_side(dp=None):
             
             if df_all_h is not None and not df_all_h.empty:
                 df_all_h['qual_list'] = df_all_h['QUALIFIERS'].fillna('').str.split(',')
-                df_all_h['Action_Label'] = df_all_h.apply(get_action_label, axis=1)
+                df_all_h['Action_Label'] = get_action_labels(df_all_h)
                 df_all_h = df_all_h.dropna(subset=['Action_Label'])
 
-            # --- SQL: MÅL-SEKVENSER MED JOIN PÅ PLAYERS FOR FULDE NAVNE ---
+            # --- SQL: HOLDETS EVENTS I KAMPE MED MÅL (vinduerne skæres ud lokalt i t4) ---
             sql_seq = f"""
             WITH SeasonMatches AS (
                 SELECT MATCH_OPTAUUID, CONTESTANTHOME_NAME, CONTESTANTAWAY_NAME, 
@@ -269,39 +280,36 @@ def vis_side(dp=None):
                 FROM {DB}.OPTA_MATCHINFO 
                 WHERE TOURNAMENTCALENDAR_OPTAUUID IN {LIGA_IDS}
             ),
-            TargetGoals AS (
-                SELECT MATCH_OPTAUUID, EVENT_TIMESTAMP as G_TIME, EVENT_TIMEMIN as G_MIN 
+            GoalMatches AS (
+                SELECT DISTINCT MATCH_OPTAUUID
                 FROM {DB}.OPTA_EVENTS 
                 WHERE EVENT_TYPEID = 16 AND EVENT_CONTESTANT_OPTAUUID = '{valgt_uuid}'
                 AND MATCH_OPTAUUID IN (SELECT MATCH_OPTAUUID FROM SeasonMatches)
             )
             SELECT e.EVENT_X, e.EVENT_Y, e.EVENT_TYPEID, 
                    TRIM(p.FIRST_NAME) || ' ' || TRIM(p.LAST_NAME) as PLAYER_NAME, 
-                   e.EVENT_TIMESTAMP, e.MATCH_OPTAUUID,
+                   e.EVENT_TIMESTAMP, e.EVENT_TIMEMIN, e.EVENT_EVENTID, e.MATCH_OPTAUUID,
+                   e.EVENT_CONTESTANT_OPTAUUID,
                    m.MATCH_LOCALDATE, m.CONTESTANTHOME_NAME, m.CONTESTANTAWAY_NAME, 
                    m.CONTESTANTHOME_OPTAUUID, m.CONTESTANTAWAY_OPTAUUID,
                    m.TOTAL_HOME_SCORE, m.TOTAL_AWAY_SCORE,
-                   tg.G_TIME as GOAL_TIME, tg.G_MIN as GOAL_MIN,
                    LISTAGG(q.QUALIFIER_QID, ',') WITHIN GROUP (ORDER BY q.QUALIFIER_QID) as QUALIFIERS
             FROM {DB}.OPTA_EVENTS e
             JOIN (SELECT DISTINCT PLAYER_OPTAUUID, FIRST_NAME, LAST_NAME FROM {DB}.OPTA_PLAYERS WHERE FIRST_NAME IS NOT NULL) p 
                 ON e.PLAYER_OPTAUUID = p.PLAYER_OPTAUUID
             JOIN SeasonMatches m ON e.MATCH_OPTAUUID = m.MATCH_OPTAUUID
-            INNER JOIN TargetGoals tg ON e.MATCH_OPTAUUID = tg.MATCH_OPTAUUID
-                AND e.EVENT_TIMESTAMP >= DATEADD(second, -20, tg.G_TIME)
-                AND e.EVENT_TIMESTAMP <= tg.G_TIME
             LEFT JOIN {DB}.OPTA_QUALIFIERS q ON e.EVENT_OPTAUUID = q.EVENT_OPTAUUID
             WHERE e.EVENT_CONTESTANT_OPTAUUID = '{valgt_uuid}'
-            GROUP BY 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15
+            AND e.MATCH_OPTAUUID IN (SELECT MATCH_OPTAUUID FROM GoalMatches)
+            GROUP BY 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15, 16
             """
             
             try: 
-                df_all_events = conn.query(sql_seq)
-                if df_all_events is not None and not df_all_events.empty:
-                    df_all_events['qual_list'] = df_all_events['QUALIFIERS'].fillna('').str.split(',')
+                df_seq = conn.query(sql_seq)
+                if df_seq is not None and not df_seq.empty:
+                    seq_indeks = TidsIndeks(df_seq)
             except Exception as e:
                 st.error(f"Fejl i SQL: {e}")
-                df_all_events = pd.DataFrame()
         else:
             st.error("Ingen data fundet for det valgte hold.")
             return
@@ -439,7 +447,8 @@ def vis_side(dp=None):
         total_act = len(df_f)
 
         with c_left:
-            st.pyplot(plot_custom_pitch(df_f, df_f['EVENT_TYPEID'].unique().tolist() if v_med == "Touches in Box" else ids, tit, zone=zn, cmap=cm, logo=hold_logo))
+            # Render-cachen genbruger PNG'en, så længe data, valg og logo er uændrede
+            vis_figur(plot_custom_pitch, df_f[PITCH_KOLONNER], df_f['EVENT_TYPEID'].unique().tolist() if v_med == "Touches in Box" else ids, tit, zone=zn, cmap=cm, logo=hold_logo)
 
         with c_right:
             if v_med == "Touches in Box":
@@ -519,8 +528,7 @@ def vis_side(dp=None):
         total_act = len(df_f)
 
         with c_left:
-            fig = plot_custom_pitch(df_f, ids, tit, zone=zn, cmap=cm, logo=hold_logo)
-            st.pyplot(fig)
+            vis_figur(plot_custom_pitch, df_f[PITCH_KOLONNER], ids, tit, zone=zn, cmap=cm, logo=hold_logo)
 
         with c_right:
             acc_pct = (df_f['OUTCOME'].sum() / total_act * 100) if total_act > 0 else 0
@@ -557,6 +565,14 @@ def vis_side(dp=None):
                 st.info("Ingen data fundet for dette område.")
                 
     with t4:
+        sekunder = st.slider("Sekunder før mål", 5, 60, SEKVENS_SEKUNDER, step=5, key="sekvens_sekunder")
+        if seq_indeks is not None:
+            df_all_events = maal_sekvenser(
+                seq_indeks, valgt_uuid, sekunder,
+                udloeser_kolonner={'GOAL_TIME': 'EVENT_TIMESTAMP', 'GOAL_MIN': 'EVENT_TIMEMIN'},
+            )
+            df_all_events['qual_list'] = df_all_events['QUALIFIERS'].fillna('').str.split(',')
+
         if not df_all_events.empty:
             gl = df_all_events.drop_duplicates(['MATCH_OPTAUUID', 'GOAL_TIME']).sort_values(['MATCH_LOCALDATE', 'GOAL_MIN'], ascending=[False, True])
             
@@ -576,28 +592,11 @@ def vis_side(dp=None):
             tge = df_all_events[(df_all_events['MATCH_OPTAUUID'] == sd['match_id']) & (df_all_events['GOAL_TIME'] == sd['goal_ts'])].sort_values('EVENT_TIMESTAMP').copy()
     
             p_c, l_c = st.columns([2.5, 1])
-            p = Pitch(pitch_type='opta', pitch_color='#ffffff', line_color='grey')
-            f, ax = p.draw(figsize=(10, 7))
-            
-            draw_match_info_box(ax, hold_logo, get_logo_img(sd['opp_uuid']), sd['date'], sd['score_str'], sd['min'])
-    
-            for i in range(len(tge)-1):
-                p.arrows(tge.iloc[i]['EVENT_X'], tge.iloc[i]['EVENT_Y'], tge.iloc[i+1]['EVENT_X'], tge.iloc[i+1]['EVENT_Y'], width=1, color='black', alpha=0.15, ax=ax)
-            
-            for _, r in tge.iterrows():
-                is_goal = str(r['EVENT_TYPEID']) == "16"
-                ax.scatter(r['EVENT_X'], r['EVENT_Y'], color='red' if is_goal else 'black', s=100, edgecolors='white', zorder=10)
-                ax.text(r['EVENT_X'], r['EVENT_Y']+2.5, r['PLAYER_NAME'], fontsize=7, ha='center', fontweight='bold', bbox=dict(facecolor='white', alpha=0.6, edgecolor='none', pad=1), zorder=11)
-            
-            p_c.pyplot(f)
-    
-            def get_final_label_t4(row):
-                if str(row['EVENT_TYPEID']) == "16" and "9" in row['qual_list']:
-                    return "STRAFFESPARK"
-                label = get_action_label(row)
-                return label if label else "Opbygning"
+            with p_c:
+                vis_figur(plot_maal_sekvens, tge[SEKVENS_KOLONNER], hold_logo, get_logo_img(sd['opp_uuid']), sd['date'], sd['score_str'], sd['min'])
     
-            tge['Aktion'] = tge.apply(get_final_label_t4, axis=1)
+            straffe = (tge['EVENT_TYPEID'].astype(str) == "16") & qualifier_index(tge).has_qualifier(9)
+            tge['Aktion'] = get_action_labels(tge).fillna("Opbygning").mask(straffe, "STRAFFESPARK")
             
             l_c.write("**Målsekvens:**")
             l_c.dataframe(tge[['PLAYER_NAME', 'Aktion']].iloc[::-1].rename(columns={'PLAYER_NAME': 'Spiller'}), hide_index=True, use_container_width=True)
@@ -607,8 +606,9 @@ def vis_side(dp=None):
     with t5:
         if not df_all_events.empty:
             df_mål_stats = df_all_events.copy()
-            df_mål_stats['is_cross'] = df_mål_stats['qual_list'].apply(lambda x: '2' in x)
-            df_mål_stats['is_shot_assist'] = df_mål_stats['qual_list'].apply(lambda x: '210' in x or '209' in x)
+            qi = qualifier_index(df_mål_stats)
+            df_mål_stats['is_cross'] = qi.has_qualifier(2)
+            df_mål_stats['is_shot_assist'] = qi.any_of([210, 209])
             df_mål_stats['is_shot'] = df_mål_stats['EVENT_TYPEID'].isin([13, 14, 15])
             df_mål_stats['is_goal'] = df_mål_stats['EVENT_TYPEID'] == 16
 
@@ -5,6 +5,7 @@ from matplotlib.patches import Rectangle
 from mplsoccer import VerticalPitch
 import streamlit as st
 import matplotlib.colors as mcolors
+from utils.zoner import tildel_zoner, OPTA
 
 # --- KONSTANTER ---
 ZONE_BOUNDARIES = {
@@ -23,12 +24,6 @@ ZONE_BOUNDARIES = {
     "Zone 8": {"y_min": 0.0, "y_max": 70.0, "x_min": 0.0, "x_max": 100.0}
 }
 
-def find_zone(val_x, val_y):
-    for zone, b in ZONE_BOUNDARIES.items():
-        if b["x_min"] <= val_x <= b["x_max"] and b["y_min"] <= val_y <= b["y_max"]:
-            return zone
-    return "Udenfor"
-
 def vis_side(df_events, df_spillere, hold_map):
     HIF_ID = 38331
     HIF_RED = '#d31313' # Opdateret til den samme røde som før
@@ -77,7 +72,7 @@ def vis_side(df_events, df_spillere, hold_map):
     df_plot['LOCATIONX'] = pd.to_numeric(df_plot['LOCATIONX'], errors='coerce')
     df_plot['LOCATIONY'] = pd.to_numeric(df_plot['LOCATIONY'], errors='coerce')
     df_plot = df_plot.dropna(subset=['LOCATIONX', 'LOCATIONY'])
-    df_plot['ZONE_ID'] = df_plot.apply(lambda row: find_zone(row['LOCATIONY'], row['LOCATIONX']), axis=1)
+    df_plot['ZONE_ID'] = tildel_zoner(df_plot, 'LOCATIONX', 'LOCATIONY', ZONE_BOUNDARIES, system=OPTA, data_system=OPTA, fallback="Udenfor")
 
     total_shots = len(df_plot)
     with c3:
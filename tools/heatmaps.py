@@ -1,13 +1,34 @@
 import streamlit as st
 import matplotlib.pyplot as plt
-import seaborn as sns
 from mplsoccer import VerticalPitch
 import numpy as np
+from data.utils.rum_gitter import RumGitter
+from utils.taethed import kde_fra_gitter, tegn_taethed
 
-# --- CACHING AF SELVE FIGUREN ---
-# Vi bruger tuple for hold_ids, da lister ikke kan caches direkte
+GITTER_NOEGLER = ['TEAM_WYID', 'PLAYER_WYID', 'MATCH_WYID', 'KATEGORI']
+
+
+# --- 1. AGGREGERING ---
+# Rådata tælles ind i et 100x100-gitter pr. hold/spiller/kamp/kategori én gang;
+# filterskift summerer bare gitrene (ingen sampling, ingen ny KDE på punkterne)
+@st.cache_resource(show_spinner="Heatmap-gitre bygges...")
+def byg_heatmap_gitter(df_events):
+    df = df_events.assign(KATEGORI=df_events['PRIMARYTYPE'].astype(str).str.lower())
+    noegler = [c for c in GITTER_NOEGLER if c in df.columns]
+    # Lodret bane: plot-x er banens bredde (LOCATIONY), plot-y er længden (LOCATIONX)
+    return RumGitter(df, 'LOCATIONY', 'LOCATIONX', noegler)
+
+
+def _tegn_heatmap(ax, gitter, H):
+    xc, yc = gitter.centre()
+    Z = kde_fra_gitter(H, xc, yc)
+    tegn_taethed(ax, xc, yc, Z, levels=15, thresh=0.05, fill=True, cmap='YlOrRd', alpha=0.7, zorder=1)
+
+
+# --- 2. CACHING AF SELVE FIGUREN ---
+# Gitteret hashes ikke (_gitter); gitter_id og filtrene er cache-nøglen
 @st.cache_data(show_spinner="Heatmaps genereres...")
-def generate_cached_heatmaps(df_p, cols_slider, hold_ids_tuple, hold_map):
+def generate_cached_heatmaps(_gitter, gitter_id, cols_slider, hold_ids_tuple, hold_map, kategorier, kampe=None):
     BG_WHITE = '#ffffff'
     # Beregn rækker baseret på antal hold og valgte kolonner
     num_hold = len(hold_ids_tuple)
@@ -34,18 +55,16 @@ def generate_cached_heatmaps(df_p, cols_slider, hold_ids_tuple, hold_map):
         linewidth=0.8
     )
 
+    filtre = {'KATEGORI': list(kategorier)}
+    if kampe is not None and 'MATCH_WYID' in _gitter.noegler:
+        filtre['MATCH_WYID'] = list(kampe)
+
     for i, tid in enumerate(hold_ids_tuple):
         ax = axes_flat[i]
         
-        # Filtrer data for det specifikke hold
-        hold_df_full = df_p[df_p['TEAM_WYID'] == tid].copy().dropna(subset=['LOCATIONX', 'LOCATIONY'])
-        total_passes = len(hold_df_full)
-        
-        # SPEED BOOST: Sample data hvis der er ekstremt mange rækker
-        if total_passes > 3000:
-            hold_df_draw = hold_df_full.sample(n=3000, random_state=42)
-        else:
-            hold_df_draw = hold_df_full
+        # Holdets gitter for det valgte udsnit - summen af de forhåndstalte gitre
+        H = _gitter.sum(TEAM_WYID=tid, **filtre)
+        total_passes = int(H.sum())
 
         pitch.draw(ax=ax)
 
@@ -56,18 +75,7 @@ def generate_cached_heatmaps(df_p, cols_slider, hold_ids_tuple, hold_map):
 
         # Tegn Heatmap hvis der er data nok
         if total_passes > 5:
-            sns.kdeplot(
-                x=hold_df_draw['LOCATIONY'], 
-                y=hold_df_draw['LOCATIONX'], 
-                ax=ax,
-                fill=True, 
-                thresh=0.05, 
-                levels=15, 
-                cmap='YlOrRd', 
-                alpha=0.7, 
-                zorder=1,
-                clip=((0, 100), (0, 100)) # Holder det inden for banen
-            )
+            _tegn_heatmap(ax, _gitter, H)
 
     # Skjul resterende tomme plots
     for j in range(i + 1, len(axes_flat)):
@@ -91,18 +99,27 @@ def vis_side(df_events, hold_map=None):
     # 2. DATAPRÆPARERING
     # Sørg for kolonnenavne er rigtige
     df_events.columns = [c.upper() for c in df_events.columns]
-    
-    # Filtrer kun pasninger (PRIMARYTYPE skal indeholde 'pass')
-    df_p = df_events[df_events['PRIMARYTYPE'].str.lower().str.contains('pass', na=False)].copy()
+    gitter = byg_heatmap_gitter(df_events)
+    grupper = gitter.grupper
 
-    if df_p.empty:
+    # Kun pasninger (PRIMARYTYPE skal indeholde 'pass')
+    kategorier = sorted(k for k in grupper['KATEGORI'].unique() if 'pass' in k)
+    grupper = grupper[grupper['KATEGORI'].isin(kategorier)]
+
+    if grupper.empty:
         st.warning("Der blev ikke fundet nogen 'pass' events i de indlæste data.")
         return
 
+    kampe = None
+    if 'MATCH_WYID' in grupper.columns:
+        alle_kampe = sorted(grupper['MATCH_WYID'].dropna().unique().tolist())
+        valgte = st.sidebar.multiselect("Kampe (tom = alle)", alle_kampe)
+        kampe = tuple(valgte) if valgte else None
+
     # Sorter hold efter navn
     # Vi mapper ID til navn først for at kunne sortere alfabetisk
     temp_hold_list = []
-    unique_ids = df_p['TEAM_WYID'].unique()
+    unique_ids = grupper['TEAM_WYID'].unique()
     for tid in unique_ids:
         t_name = hold_map.get(str(tid), f"ID: {tid}")
         temp_hold_list.append({'ID': tid, 'NAME': t_name})
@@ -112,7 +129,9 @@ def vis_side(df_events, hold_map=None):
 
     # 3. GENERER OG VIS
     # Vi sender hold_ids som en tuple til cachen
-    fig = generate_cached_heatmaps(df_p, cols_slider, tuple(hold_ids), hold_map)
+    fig = generate_cached_heatmaps(
+        gitter, gitter.fingeraftryk, cols_slider, tuple(hold_ids), hold_map, tuple(kategorier), kampe
+    )
     
     st.pyplot(fig, use_container_width=True)
     
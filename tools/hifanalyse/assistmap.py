@@ -4,7 +4,8 @@ import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.colors as mcolors
 from matplotlib.patches import Rectangle
-from mplsoccer import Pitch, VerticalPitch
+from utils.pitches import ny_bane
+from utils.zoner import tildel_zoner
 
 # HIF Identitet
 HIF_RED = '#cc0000'
@@ -31,7 +32,7 @@ def vis_side(dp):
         return
 
     # --- 2. DINE ZONE DEFINITIONER (METER FRA PITCH_ANALYSIS.PY) ---
-    PITCH_L, PITCH_W = 105, 68
+    PITCH_W = 68
     C_MIN, C_MAX = (PITCH_W - 18.32)/2, (PITCH_W + 18.32)/2
     W_INNER_MIN, W_INNER_MAX = (PITCH_W - 40.2)/2, (PITCH_W + 40.2)/2
 
@@ -51,16 +52,9 @@ def vis_side(dp):
         "Zone 8":  {"y": (0, 75.0),     "x": (0, PITCH_W)}
     }
 
-    def map_to_zone(r):
-        xm, ym = r['PASS_START_Y'] * (PITCH_W/100), r['PASS_START_X'] * (PITCH_L/100)
-        for z, b in ZONE_BOUNDS.items():
-            if b["y"][0] <= ym <= b["y"][1] and b["x"][0] <= xm <= b["x"][1]:
-                return z
-        return "Zone 8"
-
     df_assists['is_assist'] = (df_assists['NEXT_EVENT_TYPE'] == 16).astype(int)
     df_assists['is_key_pass'] = df_assists['NEXT_EVENT_TYPE'].isin([13, 14, 15]).astype(int)
-    df_assists['Zone'] = df_assists.apply(map_to_zone, axis=1)
+    df_assists['Zone'] = tildel_zoner(df_assists, 'PASS_START_X', 'PASS_START_Y', ZONE_BOUNDS)
 
     tab1, tab2, tab3 = st.tabs(["ASSIST-OVERSIGT", "ASSIST-MAP", "ASSIST-ZONER"])
 
@@ -85,8 +79,7 @@ def vis_side(dp):
             st.markdown(f'<div class="stat-box"><div class="stat-label"><span class="icon-circle" style="background-color: {HIF_GOLD};"></span>Goal Assists</div><div class="stat-value">{df_f["is_assist"].sum()}</div></div>', unsafe_allow_html=True)
             st.markdown(f'<div class="stat-box" style="border-left-color: #888888"><div class="stat-label"><span class="icon-circle" style="background-color: #888888;"></span>Shot Assists</div><div class="stat-value">{df_f["is_key_pass"].sum()}</div></div>', unsafe_allow_html=True)
         with col_viz_a:
-            pitch = Pitch(pitch_type='opta', pitch_color='white', line_color='#cccccc')
-            fig, ax = pitch.draw(figsize=(8, 6))
+            pitch, fig, ax = ny_bane(pitch_type='opta', pitch_color='white', line_color='#cccccc', figsize=(8, 6))
             df_gs = df_f[df_f['is_assist'] == 1]; df_kp = df_f[df_f['is_key_pass'] == 1]
             pitch.arrows(df_kp.PASS_START_X, df_kp.PASS_START_Y, df_kp.SHOT_X, df_kp.SHOT_Y, color='#888888', alpha=0.3, width=1.5, ax=ax)
             pitch.arrows(df_gs.PASS_START_X, df_gs.PASS_START_Y, df_gs.SHOT_X, df_gs.SHOT_Y, color=HIF_GOLD, alpha=0.9, width=2, ax=ax)
@@ -126,9 +119,8 @@ def vis_side(dp):
             max_val = max([v['count'] for v in zone_stats.values()]) if total_goals > 0 else 1
             cmap = plt.cm.YlOrRd 
 
-            pitch_z = VerticalPitch(half=True, pitch_type='custom', pitch_length=105, pitch_width=68, line_color='grey')
-            fig_z, ax_z = pitch_z.draw(figsize=(8, 10))
-            ax_z.set_ylim(50, 105)
+            pitch_z, fig_z, ax_z = ny_bane(lodret=True, half=True, pitch_type='custom', pitch_length=105, pitch_width=68,
+                                           line_color='grey', figsize=(8, 10), ylim=(50, 105))
 
             for name, bounds in ZONE_BOUNDS.items():
                 if bounds["y"][1] <= 50: continue
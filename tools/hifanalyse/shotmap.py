@@ -1,8 +1,11 @@
 import streamlit as st
 import pandas as pd
-from mplsoccer import VerticalPitch, Pitch
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
+from data.analyse_load import byg_sekvens_map, SEKVENS_SEKUNDER
+from utils.pitches import get_boundaries, ny_bane
+from utils.zoner import tildel_zoner
+from utils.figur_cache import vis_figur
 
 # --- KONSTANTER ---
 HIF_RED = '#cc0000'
@@ -19,6 +22,54 @@ OPTA_MAP_DK = {
     107: "Restart"
 }
 
+SKUD_KOLONNER = ['EVENT_X', 'EVENT_Y', 'EVENT_TYPEID']
+
+# --- FIGURER (tegnes via render-cachen - kun ved nye data/valg) ---
+def tegn_skudkort(d_v, dz=False):
+    """Skud på en halv bane; mål er fyldte. dz=True markerer Danger Zone."""
+    pitch, fig, ax = ny_bane(lodret=True, half=True, pitch_type='opta', line_color='#cccccc', figsize=(5, 7))
+    if dz:
+        ax.add_patch(patches.Rectangle((37, 88.5), 26, 11.5, color=DZ_COLOR, alpha=0.15))
+        colors = (d_v['EVENT_TYPEID'] == 16).map({True: HIF_RED, False: 'white'})
+        pitch.scatter(d_v['EVENT_X'], d_v['EVENT_Y'], s=20, c=colors, edgecolors=HIF_RED, ax=ax)
+    else:
+        colors = (d_v['EVENT_TYPEID'] == 16).map({True: HIF_RED, False: 'white'})
+        pitch.scatter(d_v['EVENT_X'], d_v['EVENT_Y'], s=20, c=colors, edgecolors=HIF_RED, linewidth=1, ax=ax)
+    return fig
+
+def tegn_zonekort(zone_antal, boundaries, is_m):
+    """Zonerne farvet efter antal (zone_antal: {zone: antal})."""
+    pitch, fig, ax = ny_bane(lodret=True, half=True, pitch_type='custom', pitch_length=105, pitch_width=68,
+                             line_color='grey', figsize=(8, 10), ylim=(55, 105))
+    max_v = max([v for k, v in zone_antal.items() if k != "Zone 8"] + [0]) or 1
+    cmap = plt.cm.YlOrRd if is_m else plt.cm.Blues
+    for name, b in boundaries.items():
+        if b["y_max"] <= 55: continue
+        y_min_draw = max(b["y_min"], 55)
+        cnt = zone_antal[name]
+        face = cmap(cnt/max_v) if cnt > 0 else '#f9f9f9'
+        ax.add_patch(patches.Rectangle((b["x_min"], y_min_draw), b["x_max"]-b["x_min"], b["y_max"]-y_min_draw, facecolor=face, alpha=0.7, edgecolor='black', ls='--'))
+        if cnt > 0:
+            ax.text(b["x_min"]+(b["x_max"]-b["x_min"])/2, y_min_draw+(b["y_max"]-y_min_draw)/2, f"{cnt}", ha='center', va='center', fontsize=8, fontweight='bold')
+    return fig
+
+def tegn_sekvens(hif_seq, col_x, col_y, assist, flip):
+    """HIF's aktioner i målsekvensen med pile imellem; målscorer rød, assist blå."""
+    pitch, fig, ax = ny_bane(pitch_type='opta', pitch_color='white', line_color='#cccccc', figsize=(9, 6))
+    prev = None
+    for i, r in hif_seq.iterrows():
+        cx, cy = (100 - r[col_x] if flip else r[col_x]), (100 - r[col_y] if flip else r[col_y])
+        if prev:
+            ax.annotate('', xy=(cx, cy), xytext=(prev[0], prev[1]),
+                        arrowprops=dict(arrowstyle='->', color='#ccc', lw=1.5, alpha=0.4, shrinkA=5, shrinkB=5))
+
+        p_name = r['PLAYER_NAME'].split()[-1] if pd.notnull(r['PLAYER_NAME']) else ""
+        dot_col = HIF_RED if r['EVENT_TYPEID'] == 16 else (ASSIST_BLUE if p_name == assist else '#aaaaaa')
+        pitch.scatter(cx, cy, s=180, color=dot_col, edgecolors='white', ax=ax, zorder=5)
+        ax.text(cx, cy + 2.5, p_name, fontsize=8, ha='center', fontweight='bold')
+        prev = (cx, cy)
+    return fig
+
 def vis_side(dp):
     st.markdown("""
         <style>
@@ -45,35 +96,9 @@ def vis_side(dp):
         df_skud = df_raw.copy()
 
     # --- 2. ZONE DEFINITIONER ---
-    P_L, P_W = 105.0, 68.0
-    X_MID_L, X_MID_R = (P_W - 18.32) / 2, (P_W + 18.32) / 2
-    X_INN_L, X_INN_R = (P_W - 40.2) / 2, (P_W + 40.2) / 2
-    Y_GOAL, Y_6YD, Y_PK, Y_18YD, Y_MID = 105.0, 99.5, 94.0, 88.5, 75.0
+    ZONE_BOUNDARIES = get_boundaries()
 
-    ZONE_BOUNDARIES = {
-        "Zone 1": {"y_min": Y_6YD, "y_max": Y_GOAL, "x_min": X_MID_L, "x_max": X_MID_R},
-        "Zone 2": {"y_min": Y_PK, "y_max": Y_6YD, "x_min": X_MID_L, "x_max": X_MID_R},
-        "Zone 3": {"y_min": Y_18YD, "y_max": Y_PK, "x_min": X_MID_L, "x_max": X_MID_R},
-        "Zone 4A": {"y_min": Y_6YD, "y_max": Y_GOAL, "x_min": X_MID_R, "x_max": X_INN_R},
-        "Zone 4B": {"y_min": Y_6YD, "y_max": Y_GOAL, "x_min": X_INN_L, "x_max": X_MID_L},
-        "Zone 5A": {"y_min": Y_18YD, "y_max": Y_6YD, "x_min": X_MID_R, "x_max": X_INN_R},
-        "Zone 5B": {"y_min": Y_18YD, "y_max": Y_6YD, "x_min": X_INN_L, "x_max": X_MID_L},
-        "Zone 6A": {"y_min": Y_18YD, "y_max": Y_GOAL, "x_min": X_INN_R, "x_max": P_W},
-        "Zone 6B": {"y_min": Y_18YD, "y_max": Y_GOAL, "x_min": 0, "x_max": X_INN_L},
-        "Zone 7C": {"y_min": Y_MID, "y_max": Y_18YD, "x_min": 0, "x_max": X_MID_L},
-        "Zone 7B": {"y_min": Y_MID, "y_max": Y_18YD, "x_min": X_MID_L, "x_max": X_MID_R},
-        "Zone 7A": {"y_min": Y_MID, "y_max": Y_18YD, "x_min": X_MID_R, "x_max": P_W},
-        "Zone 8":  {"y_min": 0, "y_max": Y_MID, "x_min": 0, "x_max": P_W}
-    }
-
-    def map_to_zone(r):
-        mx, my = r['EVENT_X'] * (P_L / 100), r['EVENT_Y'] * (P_W / 100)
-        for z, b in ZONE_BOUNDARIES.items():
-            if b["y_min"] <= mx <= b["y_max"] and b["x_min"] <= my <= b["x_max"]:
-                return z
-        return "Zone 8"
-
-    df_skud['Zone'] = df_skud.apply(map_to_zone, axis=1)
+    df_skud['Zone'] = tildel_zoner(df_skud, 'EVENT_X', 'EVENT_Y', ZONE_BOUNDARIES)
     df_skud['IS_DZ_GEO'] = (df_skud['EVENT_X'] >= 88.5) & (df_skud['EVENT_Y'] >= 37.0) & (df_skud['EVENT_Y'] <= 63.0)
 
     tabs = st.tabs(["SPILLEROVERSIGT", "AFSLUTNINGER", "DZ-AFSLUTNINGER", "AFSLUTNINGSZONER", "MÅLZONER", "SEKVENSER"])
@@ -146,11 +171,7 @@ def vis_side(dp):
             st.markdown(f'<div class="stat-box"><div class="stat-label">Mål</div><div class="stat-value">{m_cnt}</div></div>', unsafe_allow_html=True)
             st.markdown(f'<div class="stat-box" style="border-left-color:{HIF_GOLD}"><div class="stat-label">Konvertering</div><div class="stat-value">{konv:.2f}%</div></div>', unsafe_allow_html=True)
         with c1:
-            pitch = VerticalPitch(half=True, pitch_type='opta', line_color='#cccccc')
-            fig, ax = pitch.draw(figsize=(5, 7))
-            colors = (d_v['EVENT_TYPEID'] == 16).map({True: HIF_RED, False: 'white'})
-            pitch.scatter(d_v['EVENT_X'], d_v['EVENT_Y'], s=20, c=colors, edgecolors=HIF_RED, linewidth=1, ax=ax)
-            st.pyplot(fig)
+            vis_figur(tegn_skudkort, d_v[SKUD_KOLONNER])
 
     # --- TAB 3: DZ ---
     with tabs[2]:
@@ -163,12 +184,7 @@ def vis_side(dp):
             st.markdown(f'<div class="stat-box"><div class="stat-label">DZ Skud</div><div class="stat-value">{len(dz_d)}</div></div>', unsafe_allow_html=True)
             st.markdown(f'<div class="stat-box"><div class="stat-label">DZ Mål</div><div class="stat-value">{m_dz}</div></div>', unsafe_allow_html=True)
         with c1:
-            pitch = VerticalPitch(half=True, pitch_type='opta', line_color='#cccccc')
-            fig, ax = pitch.draw(figsize=(5, 7))
-            ax.add_patch(patches.Rectangle((37, 88.5), 26, 11.5, color=DZ_COLOR, alpha=0.15))
-            colors = (dz_d['EVENT_TYPEID'] == 16).map({True: HIF_RED, False: 'white'})
-            pitch.scatter(dz_d['EVENT_X'], dz_d['EVENT_Y'], s=20, c=colors, edgecolors=HIF_RED, ax=ax)
-            st.pyplot(fig)
+            vis_figur(tegn_skudkort, dz_d[SKUD_KOLONNER], dz=True)
 
     # --- ZONER FUNKTION ---
     def zone_plot_enhanced(data, is_m):
@@ -187,20 +203,7 @@ def vis_side(dp):
             st.dataframe(z_df, hide_index=True, use_container_width=True)
 
         with col_viz:
-            pitch = VerticalPitch(half=True, pitch_type='custom', pitch_length=105, pitch_width=68, line_color='grey')
-            fig, ax = pitch.draw(figsize=(8, 10))
-            ax.set_ylim(55, 105)
-            max_v = max([v['cnt'] for k, v in zone_stats.items() if k != "Zone 8"]) if total_count > 0 else 1
-            cmap = plt.cm.YlOrRd if is_m else plt.cm.Blues
-            for name, b in ZONE_BOUNDARIES.items():
-                if b["y_max"] <= 55: continue
-                y_min_draw = max(b["y_min"], 55)
-                stats = zone_stats[name]
-                face = cmap(stats['cnt']/max_v) if stats['cnt'] > 0 else '#f9f9f9'
-                ax.add_patch(patches.Rectangle((b["x_min"], y_min_draw), b["x_max"]-b["x_min"], b["y_max"]-y_min_draw, facecolor=face, alpha=0.7, edgecolor='black', ls='--'))
-                if stats['cnt'] > 0:
-                    ax.text(b["x_min"]+(b["x_max"]-b["x_min"])/2, y_min_draw+(b["y_max"]-y_min_draw)/2, f"{stats['cnt']}", ha='center', va='center', fontsize=8, fontweight='bold')
-            st.pyplot(fig)
+            vis_figur(tegn_zonekort, {k: v['cnt'] for k, v in zone_stats.items()}, ZONE_BOUNDARIES, is_m)
 
     with tabs[3]: zone_plot_enhanced(df_skud, False)
     with tabs[4]: zone_plot_enhanced(df_skud[df_skud['EVENT_TYPEID'] == 16], True)
@@ -218,6 +221,13 @@ def vis_side(dp):
         """, unsafe_allow_html=True)
 
         df_raw = dp.get('opta', {}).get('opta_sequence_map', pd.DataFrame())
+        df_seq_events = dp.get('opta', {}).get('sequence_events', pd.DataFrame())
+        if not df_seq_events.empty:
+            # Vinduet skæres ud lokalt af de rå events - en ny længde kræver ingen ny query
+            sekunder = st.slider("Sekunder før mål", 5, 60, SEKVENS_SEKUNDER, step=5, key="shotmap_sekvens_sekunder")
+            if sekunder != SEKVENS_SEKUNDER:
+                hold = HIF_UUID if dp.get('config', {}).get('hif_only') else None
+                df_raw = byg_sekvens_map(df_seq_events, dp.get('matches_info'), sekunder, hold=hold)
         if df_raw.empty:
             st.info("Ingen sekvens-data fundet for denne kamp.")
             return
@@ -259,24 +269,8 @@ def vis_side(dp):
                 st.table(hif_seq['Spiller'].value_counts().reset_index().rename(columns={'index': 'Spiller', 'Spiller': 'Aktioner'}))
 
         with col_main:
-            pitch = Pitch(pitch_type='opta', pitch_color='white', line_color='#cccccc')
-            fig, ax = pitch.draw(figsize=(9, 6))
             flip = True if sel_row[col_x] < 50 else False
-            
-            prev = None
-            for i, r in hif_seq.iterrows():
-                cx, cy = (100 - r[col_x] if flip else r[col_x]), (100 - r[col_y] if flip else r[col_y])
-                if prev:
-                    ax.annotate('', xy=(cx, cy), xytext=(prev[0], prev[1]),
-                                arrowprops=dict(arrowstyle='->', color='#ccc', lw=1.5, alpha=0.4, shrinkA=5, shrinkB=5))
-                
-                p_name = r['PLAYER_NAME'].split()[-1] if pd.notnull(r['PLAYER_NAME']) else ""
-                dot_col = HIF_RED if r['EVENT_TYPEID'] == 16 else (ASSIST_BLUE if p_name == assist else '#aaaaaa')
-                pitch.scatter(cx, cy, s=180, color=dot_col, edgecolors='white', ax=ax, zorder=5)
-                ax.text(cx, cy + 2.5, p_name, fontsize=8, ha='center', fontweight='bold')
-                prev = (cx, cy)
-            
-            st.pyplot(fig, bbox_inches='tight', pad_inches=0)
+            vis_figur(tegn_sekvens, hif_seq[[col_x, col_y, 'PLAYER_NAME', 'EVENT_TYPEID']], col_x, col_y, assist, flip, savefig={'pad_inches': 0})
 
             # Sekvens-oversigt tekst-flow
             steps = []
@@ -3,11 +3,10 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from scipy import stats
-from PIL import Image
-import requests
 from io import BytesIO
 from matplotlib.offsetbox import OffsetImage, AnnotationBbox
 from data.data_load import _get_snowflake_conn
+from utils.assets import logo_fra_url
 
 # --- 1. DATA OPSÆTNING ---
 METRIC_PAIRS = {
@@ -28,13 +27,6 @@ METRIC_PAIRS = {
     ]
 }
 
-def get_logo(url):
-    try:
-        response = requests.get(url, timeout=5)
-        return Image.open(BytesIO(response.content)).convert("RGBA")
-    except:
-        return None
-
 def fetch_data():
     conn = _get_snowflake_conn()
     query = """
@@ -140,7 +132,7 @@ def vis_side(*args, **kwargs):
         ax.bar(angles, [100] * num_vars, width=width, color='none', edgecolor='white', linewidth=0.6, alpha=0.2, zorder=1)
         ax.bar(angles, values, width=width, bottom=0, color=plot_colors, alpha=0.9, edgecolor='white', linewidth=1.2, zorder=3)
 
-        logo_img = get_logo(logo_url)
+        logo_img = logo_fra_url(logo_url, rgba=True)
         if logo_img:
             ax.add_artist(AnnotationBbox(OffsetImage(logo_img, zoom=0.6), (0, 0), frameon=False, zorder=10))
 
@@ -2,8 +2,6 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
-import requests
-import base64
 
 # --- IMPORT DYNAMISKE KONSTANTER OG MAPPINGS ---
 from data.utils.team_mapping import (
@@ -14,20 +12,16 @@ from data.utils.team_mapping import (
     COMPETITION_NAME as DEFAULT_COMP,
     TOURNAMENTCALENDAR_NAME as DEFAULT_SEASON
 )
-from data.data_load import _get_snowflake_conn
+from data.data_load import _get_snowflake_conn, hent_kolonner
+from utils.assets import get_base64_image
 
 # --- 1. HJÆLPEFUNKTIONER ---
 
-@st.cache_data(ttl=86400)
-def get_base64_image(url):
-    try:
-        response = requests.get(url, timeout=5)
-        if response.status_code == 200:
-            encoded_str = base64.b64encode(response.content).decode("utf-8")
-            return f"data:image/png;base64,{encoded_str}"
-    except: 
-        return url
-    return url
+# Kolonner fra OPTA_MATCHINFO som ligatabellen (calculate_split_table) bruger
+TABEL_KOLONNER = [
+    'MATCH_OPTAUUID', 'MATCH_DATE_FULL', 'MATCH_STATUS',
+    'CONTESTANTHOME_OPTAUUID', 'CONTESTANTAWAY_OPTAUUID', 'TOTAL_HOME_SCORE', 'TOTAL_AWAY_SCORE',
+]
 
 @st.cache_data(ttl=3600)
 def load_data(periode, start, split, slut, calendar_uuid, wyid):
@@ -43,11 +37,10 @@ def load_data(periode, start, split, slut, calendar_uuid, wyid):
 
     df_opta = pd.DataFrame()
     if calendar_uuid:
-        df_opta = conn.query(f"""
-            SELECT * FROM {db}.OPTA_MATCHINFO 
-            WHERE TOURNAMENTCALENDAR_OPTAUUID = '{calendar_uuid}'
-            AND MATCH_DATE_FULL {filter_sql}
-        """)
+        df_opta = hent_kolonner(
+            conn, "OPTA_MATCHINFO", TABEL_KOLONNER,
+            f"TOURNAMENTCALENDAR_OPTAUUID = '{calendar_uuid}' AND MATCH_DATE_FULL {filter_sql}",
+        )
     
     df_wy = pd.DataFrame()
     if wyid:
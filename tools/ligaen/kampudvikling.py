@@ -1,8 +1,6 @@
-import base64
 import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
-import requests
 import streamlit as st
 
 # --- IMPORT DYNAMISKE KONSTANTER OG MAPPINGS ---
@@ -15,24 +13,11 @@ from data.utils.team_mapping import (
     SEASONS,
     TEAMS,
 )
+from utils.assets import get_base64_image
 
 # --- 1. HJÆLPEFUNKTIONER ---
 
 
-@st.cache_data(ttl=86400)
-def get_base64_image(url):
-  try:
-    if not url:
-      return ""
-    response = requests.get(url, timeout=5)
-    if response.status_code == 200:
-      encoded_str = base64.b64encode(response.content).decode("utf-8")
-      return f"data:image/png;base64,{encoded_str}"
-  except:
-    return url
-  return url
-
-
 def safe_int(val):
   """Sikker konvertering af værdier til int, der håndterer NaN og None."""
   try:
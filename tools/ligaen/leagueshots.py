@@ -7,9 +7,8 @@ from data.utils.team_mapping import TEAMS, TEAM_COLORS, SEASONS, COMPETITIONS
 from data.data_load import _get_snowflake_conn
 from data.players.player_mapping import player_mapping
 from utils.pitches import get_pitch, get_boundaries
-from PIL import Image
-import requests
-from io import BytesIO
+from utils.zoner import zone_gitter, konverter, OPTA, METER
+from utils.assets import logo_fra_url
 
 # --- KONFIGURATION (Hvidovre-app værdier) ---
 HIF_RED = '#cc0000'
@@ -17,6 +16,7 @@ DB = "KLUB_HVIDOVREIF.AXIS"
 
 # --- ZONE DEFINITIONER ---
 ZONE_BOUNDARIES = get_boundaries()
+ZONE_GITTER = zone_gitter(ZONE_BOUNDARIES)
 
 @st.cache_data(ttl=3600)
 def load_league_data(liga_uuid):
@@ -27,7 +27,8 @@ def load_league_data(liga_uuid):
     
     sql = f"""
         SELECT 
-            e.*, 
+            e.MATCH_OPTAUUID, e.EVENT_OPTAUUID, e.EVENT_TYPEID, e.EVENT_X, e.EVENT_Y,
+            e.PLAYER_OPTAUUID, e.EVENT_CONTESTANT_OPTAUUID,
             TRIM(l.FIRST_NAME) || ' ' || TRIM(l.LAST_NAME) as FULL_PLAYER_NAME,
             q.QUALIFIER_VALUE as XG_RAW 
         FROM {DB}.OPTA_EVENTS e 
@@ -102,20 +103,6 @@ def resolve_player_names(df, conn=None):
 
     return df
 
-@st.cache_data(ttl=3600)
-def get_logo_img(url):
-    try: return Image.open(BytesIO(requests.get(url, timeout=5).content))
-    except: return None
-
-def to_metric(val, total_m):
-    return val * (total_m / 100)
-
-def map_to_zone(r):
-    mx, my = to_metric(r['EVENT_X'], 105), to_metric(r['EVENT_Y'], 68)
-    for z, b in ZONE_BOUNDARIES.items():
-        if b["y_min"] <= mx <= b["y_max"] and b["x_min"] <= my <= b["x_max"]: return z
-    return "Zone 8"
-
 def draw_logo_on_pitch(ax, logo_img):
     if logo_img:
         ax_logo = ax.inset_axes([0.02, 0.89, 0.12, 0.10], transform=ax.transAxes)
@@ -187,9 +174,8 @@ def vis_side(dp=None):
         st.warning(f"Der er ingen data at vise for {t_sel} i den valgte turnering.")
         return
 
-    df_team['X_M'] = df_team['EVENT_X'].apply(lambda x: to_metric(x, 105))
-    df_team['Y_M'] = df_team['EVENT_Y'].apply(lambda y: to_metric(y, 68))
-    df_team['Zone'] = df_team.apply(map_to_zone, axis=1)
+    df_team['X_M'], df_team['Y_M'] = konverter(df_team['EVENT_X'], df_team['EVENT_Y'], OPTA, METER)
+    df_team['Zone'] = ZONE_GITTER.tildel(df_team['X_M'], df_team['Y_M'])
     
     df_team['IS_DZ'] = (df_team['X_M'] >= 88.5) & (df_team['Y_M'] >= 25.16) & (df_team['Y_M'] <= 42.84)
 
@@ -243,7 +229,7 @@ def vis_side(dp=None):
         st.markdown("<div style='margin-top: 15px;'></div>", unsafe_allow_html=True)
         c1, c2 = st.columns([2, 1])
         t_color = TEAM_COLORS.get(t_sel, {}).get('primary', HIF_RED)
-        t_logo = get_logo_img(TEAMS.get(t_sel, {}).get('logo'))
+        t_logo = logo_fra_url(TEAMS.get(t_sel, {}).get('logo'))
         with c2:
             p_sel = st.selectbox("Filtrer spiller", ["Alle spillere"] + sorted(df_team['PLAYER_NAME'].unique()))
             d_v = df_team if p_sel == "Alle spillere" else df_team[df_team['PLAYER_NAME'] == p_sel]
@@ -264,7 +250,7 @@ def vis_side(dp=None):
         c1, c2 = st.columns([2, 1])
         dz_d = df_team[df_team['IS_DZ']]
         t_color = TEAM_COLORS.get(t_sel, {}).get('primary', HIF_RED)
-        t_logo = get_logo_img(TEAMS.get(t_sel, {}).get('logo'))
+        t_logo = logo_fra_url(TEAMS.get(t_sel, {}).get('logo'))
         with c2:
             s_dz, m_dz = len(dz_d), len(dz_d[dz_d["EVENT_TYPEID"]==16])
             st.markdown(f'<div class="stat-box"><div class="stat-label">DZ Skud</div><div class="stat-value">{s_dz}</div></div>', unsafe_allow_html=True)
@@ -284,7 +270,7 @@ def vis_side(dp=None):
             plot_df = df_team[df_team['EVENT_TYPEID'] == 16] if is_goal else df_team
             total_count = len(plot_df)
             t_color = TEAM_COLORS.get(t_sel, {}).get('primary', HIF_RED)
-            t_logo = get_logo_img(TEAMS.get(t_sel, {}).get('logo'))
+            t_logo = logo_fra_url(TEAMS.get(t_sel, {}).get('logo'))
             
             with c2:
                 st.write(f"**Zone-stats ({'Mål' if is_goal else 'Skud'})**")
@@ -5,13 +5,19 @@ from mplsoccer import Pitch
 # --- CENTRAL DATA & MAPPING ---
 from data.data_load import _get_snowflake_conn
 from data.utils.team_mapping import TEAMS, SEASON_LEAGUE_MAPPER, SEASONS, COMPETITIONS, COMPETITION_NAME
-from data.utils.mapping import OPTA_EVENT_TYPES, OPTA_QUALIFIERS, get_action_label, har_qualifier
+from data.utils.mapping import OPTA_EVENT_TYPES, OPTA_QUALIFIERS, get_action_labels, har_qualifier
 from data.players.player_mapping import player_mapping  
 from utils.helpers import get_logo_img
+from data.utils.sekvens_vinduer import TidsIndeks, MAAL
 
 # Snowflake database sti
 DB = "KLUB_HVIDOVREIF.AXIS"
 
+# Målsekvenser: søgevindue for clearing/interception, vindue uden erobring og maks. antal events
+SEKVENS_SEKUNDER = 40
+SEKVENS_FALLBACK = 15
+SEKVENS_MAKS_EVENTS = 12
+
 def oversæt_qualifiers(qual_str):
     if not qual_str or pd.isna(qual_str):
         return ""
@@ -36,6 +42,53 @@ def draw_match_info_box(ax, scoring_team_logo, opp_team_logo, date_str, score_st
         ax_l2.imshow(opp_team_logo); ax_l2.axis('off')
     ax.text(0.03, 0.07, f"{date_str} | Stilling: {score_str} ({min_str}. min)", transform=ax.transAxes, fontsize=6, color='#444444', va='top')
 
+def byg_maal_sekvenser(indeks, valgt_uuid, sekunder=SEKVENS_SEKUNDER):
+    """
+    Holdets målsekvenser ud fra kampenes events (begge hold):
+      - sekvensen starter ved første clearing/interception (12/7) højst `sekunder` før målet,
+        ellers SEKVENS_FALLBACK sekunder før
+      - kun de sidste SEKVENS_MAKS_EVENTS events beholdes
+      - modstanderens koordinater spejles, og stillingen efter målet tælles op pr. kamp
+    """
+    df = indeks.vinduer(
+        indeks.udloesere(MAAL, hold=valgt_uuid),
+        sekunder=max(sekunder, SEKVENS_FALLBACK),
+        udloeser_kolonner={
+            'GOAL_TIMESTAMP': 'EVENT_TIMESTAMP',
+            'GOAL_EVENT_OPTAUUID': 'EVENT_OPTAUUID',
+            'GOAL_MIN': 'EVENT_MINUTE',
+        },
+    )
+    if df.empty:
+        return df
+
+    tid = pd.to_datetime(df['EVENT_TIMESTAMP'])
+    maal_tid = pd.to_datetime(df['GOAL_TIMESTAMP'])
+    erobring = tid.where(df['EVENT_TYPEID'].isin([7, 12]) & (tid >= maal_tid - pd.Timedelta(seconds=sekunder)))
+    start = erobring.groupby(df['VINDUE_NR']).transform('min')
+    start = start.fillna(maal_tid - pd.Timedelta(seconds=SEKVENS_FALLBACK))
+    df = df[tid >= start]
+    df = df[df.groupby('VINDUE_NR').cumcount(ascending=False) < SEKVENS_MAKS_EVENTS].copy()
+
+    eget_hold = df['EVENT_CONTESTANT_OPTAUUID'] == valgt_uuid
+    df['RAW_X'] = df['EVENT_X'].where(eget_hold, 100.0 - df['EVENT_X'])
+    df['RAW_Y'] = df['EVENT_Y'].where(eget_hold, 100.0 - df['EVENT_Y'])
+
+    # Løbende stilling: alle mål i kampen (begge hold) talt op i tidsrækkefølge
+    maal = indeks.df[indeks.df['EVENT_TYPEID'] == 16]
+    kamp = maal['MATCH_OPTAUUID']
+    hjemme = (maal['EVENT_CONTESTANT_OPTAUUID'] == maal['CONTESTANTHOME_OPTAUUID']).astype(int)
+    ude = (maal['EVENT_CONTESTANT_OPTAUUID'] == maal['CONTESTANTAWAY_OPTAUUID']).astype(int)
+    stilling = pd.DataFrame({
+        'GOAL_HOME_SCORE': hjemme.groupby(kamp).cumsum(),
+        'GOAL_AWAY_SCORE': ude.groupby(kamp).cumsum(),
+    }).set_axis(maal['EVENT_OPTAUUID'].to_numpy())
+    stilling = stilling[~stilling.index.duplicated()]
+    for col in ['GOAL_HOME_SCORE', 'GOAL_AWAY_SCORE']:
+        df[col] = df['GOAL_EVENT_OPTAUUID'].map(stilling[col]).fillna(0).astype(int)
+
+    return df.sort_values('EVENT_TIMESTAMP', kind='mergesort').reset_index(drop=True)
+
 def vis_side(dp=None):
     conn = _get_snowflake_conn()
     if not conn:
@@ -95,7 +148,14 @@ def vis_side(dp=None):
 
     st.caption("Gennemgang af holdets målsekvenser (startende efter clearing eller interception).")
 
-    # --- SQL HENTNING AF MÅLSEKVENSER (KUN EFTER CLEARING (12) ELLER INTERCEPTION (7)) ---
+    sekunder = col_spacer_top.slider(
+        "Sekunder før mål", 10, 60, SEKVENS_SEKUNDER, step=5, key="sekvens_sekunder",
+        help="Hvor langt før målet der søges efter clearing/interception.",
+    )
+
+    # --- SQL HENTNING AF KAMP-EVENTS (KUN KAMPE HVOR HOLDET HAR SCORET) ---
+    # Vinduerne før målene og den løbende stilling beregnes lokalt (byg_maal_sekvenser),
+    # så en ny vindueslængde ikke kræver en ny query.
     sql_seq = f"""
         WITH SeasonMatches AS (
             SELECT MATCH_OPTAUUID, CONTESTANTHOME_NAME, CONTESTANTAWAY_NAME, 
@@ -104,108 +164,25 @@ def vis_side(dp=None):
             FROM {DB}.OPTA_MATCHINFO 
             WHERE TOURNAMENTCALENDAR_OPTAUUID IN {liga_ids_sql}
         ),
-        TargetGoals AS (
-            SELECT MATCH_OPTAUUID, EVENT_TIMESTAMP as G_TIME, EVENT_TIMEMIN as G_MIN, SEQUENCEID, EVENT_OPTAUUID as G_EVENT_UUID
+        GoalMatches AS (
+            SELECT DISTINCT MATCH_OPTAUUID
             FROM {DB}.OPTA_EVENTS 
             WHERE EVENT_TYPEID = 16 AND EVENT_CONTESTANT_OPTAUUID = '{valgt_uuid}'
             AND MATCH_OPTAUUID IN (SELECT MATCH_OPTAUUID FROM SeasonMatches)
-        ),
-        BaseMatchEvents AS (
-            SELECT 
-                e.*,
-                tg.G_TIME as GOAL_TIMESTAMP,
-                tg.SEQUENCEID as TARGET_SEQUENCEID,
-                tg.G_MIN as GOAL_MIN,
-                tg.G_EVENT_UUID,
-                m.MATCH_LOCALDATE,
-                m.CONTESTANTHOME_NAME,
-                m.CONTESTANTAWAY_NAME,
-                m.CONTESTANTHOME_OPTAUUID,
-                m.CONTESTANTAWAY_OPTAUUID,
-                m.TOTAL_HOME_SCORE,
-                m.TOTAL_AWAY_SCORE
-            FROM {DB}.OPTA_EVENTS e
-            JOIN TargetGoals tg 
-                ON e.MATCH_OPTAUUID = tg.MATCH_OPTAUUID
-            JOIN SeasonMatches m 
-                ON e.MATCH_OPTAUUID = m.MATCH_OPTAUUID
-            WHERE e.EVENT_TIMESTAMP <= tg.G_TIME
-              AND e.EVENT_TIMESTAMP >= DATEADD('millisecond', -45000, tg.G_TIME)
-        ),
-        RecoveryCheck AS (
-            SELECT MATCH_OPTAUUID, GOAL_TIMESTAMP, MIN(EVENT_TIMESTAMP) AS MIN_RECOVERY_TIME
-            FROM BaseMatchEvents
-            WHERE EVENT_TYPEID IN (7, 12)  -- 7 = Interception, 12 = Clearance
-              AND EVENT_TIMESTAMP >= DATEADD('millisecond', -40000, GOAL_TIMESTAMP)
-            GROUP BY MATCH_OPTAUUID, GOAL_TIMESTAMP
-        ),
-        DynamicWindowEvents AS (
-            SELECT 
-                b.*,
-                COALESCE(r.MIN_RECOVERY_TIME, DATEADD('millisecond', -15000, b.GOAL_TIMESTAMP)) AS EFFECTIVE_START_TIME
-            FROM BaseMatchEvents b
-            LEFT JOIN RecoveryCheck r 
-                ON b.MATCH_OPTAUUID = r.MATCH_OPTAUUID AND b.GOAL_TIMESTAMP = r.GOAL_TIMESTAMP
-        ),
-        FilteredTimeEvents AS (
-            SELECT *
-            FROM DynamicWindowEvents
-            WHERE EVENT_TIMESTAMP >= EFFECTIVE_START_TIME
-        ),
-        RankedMatchEvents AS (
-            SELECT 
-                *,
-                ROW_NUMBER() OVER (
-                    PARTITION BY MATCH_OPTAUUID, GOAL_TIMESTAMP 
-                    ORDER BY EVENT_TIMESTAMP DESC
-                ) as rn
-            FROM FilteredTimeEvents
-        ),
-        FinalSelectedEvents AS (
-            SELECT *
-            FROM RankedMatchEvents
-            WHERE rn <= 12
-        ),
-        EventQualifiers AS (
-            SELECT 
-                EVENT_OPTAUUID,
-                LISTAGG(QUALIFIER_QID, ',') AS QUALIFIER_LIST
-            FROM {DB}.OPTA_QUALIFIERS
-            GROUP BY EVENT_OPTAUUID
-        ),
-        MatchRunningScores AS (
-            SELECT 
-                e.MATCH_OPTAUUID,
-                e.EVENT_OPTAUUID as GOAL_EVENT_OPTAUUID,
-                SUM(CASE WHEN e.EVENT_CONTESTANT_OPTAUUID = m.CONTESTANTHOME_OPTAUUID THEN 1 ELSE 0 END) 
-                    OVER (PARTITION BY e.MATCH_OPTAUUID ORDER BY e.EVENT_TIMESTAMP ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW) AS CURRENT_HOME_SCORE,
-                SUM(CASE WHEN e.EVENT_CONTESTANT_OPTAUUID = m.CONTESTANTAWAY_OPTAUUID THEN 1 ELSE 0 END) 
-                    OVER (PARTITION BY e.MATCH_OPTAUUID ORDER BY e.EVENT_TIMESTAMP ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW) AS CURRENT_AWAY_SCORE
-            FROM {DB}.OPTA_EVENTS e
-            JOIN {DB}.OPTA_MATCHINFO m ON e.MATCH_OPTAUUID = m.MATCH_OPTAUUID
-            WHERE e.EVENT_TYPEID = 16
         )
         SELECT 
+            e.EVENT_OPTAUUID,
             e.MATCH_OPTAUUID,
             e.SEQUENCEID,
             e.EVENT_TIMESTAMP,
+            e.EVENT_EVENTID,
             e.EVENT_TIMEMIN AS EVENT_MINUTE,
             e.PLAYER_OPTAUUID,
             e.PLAYER_NAME,
             e.EVENT_CONTESTANT_OPTAUUID,
             e.EVENT_TYPEID,
-            CASE 
-                WHEN e.EVENT_CONTESTANT_OPTAUUID = '{valgt_uuid}' THEN e.EVENT_X 
-                ELSE (100.0 - e.EVENT_X) 
-            END as RAW_X,
-            CASE 
-                WHEN e.EVENT_CONTESTANT_OPTAUUID = '{valgt_uuid}' THEN e.EVENT_Y 
-                ELSE (100.0 - e.EVENT_Y) 
-            END as RAW_Y,
-            e.GOAL_TIMESTAMP,
-            e.G_EVENT_UUID AS GOAL_EVENT_OPTAUUID,
-            e.GOAL_MIN,
-            q.QUALIFIER_LIST,
+            e.EVENT_X,
+            e.EVENT_Y,
             m.CONTESTANTHOME_NAME,
             m.CONTESTANTAWAY_NAME,
             m.CONTESTANTHOME_OPTAUUID,
@@ -213,26 +190,29 @@ def vis_side(dp=None):
             m.MATCH_LOCALDATE,
             m.TOTAL_HOME_SCORE AS FINAL_HOME_SCORE,
             m.TOTAL_AWAY_SCORE AS FINAL_AWAY_SCORE,
-            COALESCE(rs.CURRENT_HOME_SCORE, 0) AS GOAL_HOME_SCORE,
-            COALESCE(rs.CURRENT_AWAY_SCORE, 0) AS GOAL_AWAY_SCORE
-        FROM FinalSelectedEvents e
-        LEFT JOIN EventQualifiers q 
-            ON e.EVENT_OPTAUUID = q.EVENT_OPTAUUID
-        LEFT JOIN {DB}.OPTA_MATCHINFO m 
+            LISTAGG(q.QUALIFIER_QID, ',') AS QUALIFIER_LIST
+        FROM {DB}.OPTA_EVENTS e
+        JOIN SeasonMatches m 
             ON e.MATCH_OPTAUUID = m.MATCH_OPTAUUID
-        LEFT JOIN MatchRunningScores rs 
-            ON e.G_EVENT_UUID = rs.GOAL_EVENT_OPTAUUID
-        ORDER BY e.EVENT_TIMESTAMP ASC;
+        LEFT JOIN {DB}.OPTA_QUALIFIERS q 
+            ON e.EVENT_OPTAUUID = q.EVENT_OPTAUUID
+        WHERE e.MATCH_OPTAUUID IN (SELECT MATCH_OPTAUUID FROM GoalMatches)
+        GROUP BY 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15, 16, 17, 18, 19
     """
 
     with st.spinner("Henter målsekvenser fra Snowflake..."):
         try:
-            df_all = conn.query(sql_seq)
+            df_kamp_events = conn.query(sql_seq)
         except Exception as e:
             st.error(f"Fejl ved udførsel af SQL: {e}")
             st.stop()
 
-    if df_all is None or df_all.empty:
+    df_all = pd.DataFrame()
+    if df_kamp_events is not None and not df_kamp_events.empty:
+        df_kamp_events.columns = [c.upper() for c in df_kamp_events.columns]
+        df_all = byg_maal_sekvenser(TidsIndeks(df_kamp_events), valgt_uuid, sekunder)
+
+    if df_all.empty:
         st.warning(f"Ingen målsekvenser fundet for {valgt_hold_navn} i sæson {valgt_saeson} baseret på clearing/interception.")
         return
 
@@ -254,7 +234,7 @@ def vis_side(dp=None):
 
     df_all['PLAYER_NAME'] = df_all.apply(map_spiller_navn, axis=1)
 
-    df_all['AKTION'] = df_all.apply(get_action_label, axis=1)
+    df_all['AKTION'] = get_action_labels(df_all)
     df_all['DETALJER'] = df_all['QUALIFIER_LIST'].apply(oversæt_qualifiers)
 
     maal_df = df_all[df_all['EVENT_TYPEID'].astype(str) == '16'].drop_duplicates(subset=['MATCH_OPTAUUID', 'GOAL_TIMESTAMP']).copy()
@@ -381,13 +361,10 @@ def vis_side(dp=None):
     with col_tabel:
         st.markdown("##### Aktioner i sekvensen")
         
-        def get_final_label_t4(row):
-            if 'AKTION' in row and pd.notna(row['AKTION']) and row['AKTION'] != "":
-                return row['AKTION']
-            label = get_action_label(row)
-            return label if label else "Opbygning"
-
-        tge['Aktion'] = tge.apply(get_final_label_t4, axis=1)
+        aktion = get_action_labels(tge).fillna("Opbygning")
+        if 'AKTION' in tge.columns:
+            aktion = tge['AKTION'].where(tge['AKTION'].notna() & (tge['AKTION'] != ""), aktion)
+        tge['Aktion'] = aktion
         
         vis_cols = ['sekvens_nr', 'PLAYER_NAME', 'Aktion']
         tabel_df = tge[vis_cols].rename(columns={
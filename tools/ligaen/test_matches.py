@@ -3,6 +3,7 @@ import pandas as pd
 import numpy as np
 from data.utils.team_mapping import TEAMS, TEAM_COLORS, SEASONS, SEASON_LEAGUE_MAPPER
 from data.data_load import _get_snowflake_conn
+from utils.assets import forvarm_assets, logo_fra_url
 
 def vis_side(dp=None):
     conn = _get_snowflake_conn()
@@ -36,6 +37,7 @@ def vis_side(dp=None):
         st.session_state["season_select_main"] = list(SEASONS.keys())[0]
 
     valgt_saeson = st.session_state["season_select_main"]
+    forvarm_assets(valgt_saeson)
 
     # Generer hold ud fra den valgte sæson og den faste liga (1. Division)
     aktuelle_hold_navne = SEASON_LEAGUE_MAPPER.get(valgt_saeson, {}).get(LIGA_NAVN, [])
@@ -242,12 +244,12 @@ def vis_side(dp=None):
                     c1.markdown(f"<div style='text-align:right; font-weight:bold; padding-top:8px;'>{h_n}</div>", unsafe_allow_html=True)
                     
                     h_logo = TEAMS.get(h_n, {}).get('logo', '')
-                    if h_logo: c2.image(h_logo, width=35)
+                    if h_logo: c2.image(logo_fra_url(h_logo) or h_logo, width=35)
                     
                     c3.markdown(f"<div style='text-align:center;'><span class='score-pill'>{int(row['TOTAL_HOME_SCORE'])} - {int(row['TOTAL_AWAY_SCORE'])}</span></div>", unsafe_allow_html=True)
                     
                     a_logo = TEAMS.get(a_n, {}).get('logo', '')
-                    if a_logo: c4.image(a_logo, width=35)
+                    if a_logo: c4.image(logo_fra_url(a_logo) or a_logo, width=35)
                     
                     c5.markdown(f"<div style='font-weight:bold; padding-top:8px;'>{a_n}</div>", unsafe_allow_html=True)
                     
@@ -279,12 +281,12 @@ def vis_side(dp=None):
                     c1.markdown(f"<div style='text-align:right; font-weight:bold; padding-top:8px;'>{h_n}</div>", unsafe_allow_html=True)
                     
                     h_logo = TEAMS.get(h_n, {}).get('logo', '')
-                    if h_logo: c2.image(h_logo, width=35)
+                    if h_logo: c2.image(logo_fra_url(h_logo) or h_logo, width=35)
                     
                     c3.markdown(f"<div style='text-align:center; padding-top:4px;'><span class='score-pill' style='background:#eee; color:#333; font-size:14px;'>{str(row.get('MATCH_LOCALTIME'))[:5] if pd.notnull(row.get('MATCH_LOCALTIME')) and row.get('MATCH_LOCALTIME') != 'None' else 'TBA'}</span></div>", unsafe_allow_html=True)
                     
                     a_logo = TEAMS.get(a_n, {}).get('logo', '')
-                    if a_logo: c4.image(a_logo, width=35)
+                    if a_logo: c4.image(logo_fra_url(a_logo) or a_logo, width=35)
                     
                     c5.markdown(f"<div style='font-weight:bold; padding-top:8px;'>{a_n}</div>", unsafe_allow_html=True)
 
@@ -12,7 +12,7 @@ from data.utils.team_mapping import (
     COMPETITION_NAME as DEFAULT_COMP,
     TOURNAMENTCALENDAR_NAME as DEFAULT_SEASON
 )
-from data.data_load import _get_snowflake_conn
+from data.data_load import _get_snowflake_conn, hent_kolonner
 
 # --- 1. HJÆLPEFUNKTIONER OG LOOKUPS ---
 
@@ -244,15 +244,19 @@ def render_kamp_boks(kamp):
 
 # --- 4. DATA LOADING ---
 
+LIGA_KOLONNER = [
+    'MATCH_OPTAUUID', 'MATCH_DATE_FULL', 'MATCH_STATUS',
+    'CONTESTANTHOME_OPTAUUID', 'CONTESTANTHOME_NAME', 'CONTESTANTAWAY_OPTAUUID', 'CONTESTANTAWAY_NAME',
+    'TOTAL_HOME_SCORE', 'TOTAL_AWAY_SCORE',
+]
+
 @st.cache_data(ttl=3600)
 def load_liga_data(opta_calendar_uuid):
     if not opta_calendar_uuid:
         return pd.DataFrame()
         
     conn = _get_snowflake_conn()
-    query = f"SELECT * FROM KLUB_HVIDOVREIF.AXIS.OPTA_MATCHINFO WHERE TOURNAMENTCALENDAR_OPTAUUID = '{opta_calendar_uuid}'"
-    df = conn.query(query)
-    df.columns = [c.upper() for c in df.columns]
+    df = hent_kolonner(conn, "OPTA_MATCHINFO", LIGA_KOLONNER, f"TOURNAMENTCALENDAR_OPTAUUID = '{opta_calendar_uuid}'")
     if not df.empty and 'MATCH_DATE_FULL' in df.columns:
         df['MATCH_DATE_FULL'] = pd.to_datetime(df['MATCH_DATE_FULL'])
     return df
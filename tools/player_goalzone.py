@@ -3,9 +3,10 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
 import os
-from mplsoccer import VerticalPitch
+from utils.pitches import ny_bane
 from matplotlib.patches import Rectangle
 import matplotlib.colors as mcolors
+from utils.zoner import tildel_zoner, OPTA
 
 # --- ZONE DEFINITIONER ---
 ZONE_BOUNDARIES = {
@@ -24,12 +25,6 @@ ZONE_BOUNDARIES = {
     "Zone 8": {"y_min": 0.0, "y_max": 70.0, "x_min": 0.0, "x_max": 100.0}
 }
 
-def find_zone(x, y):
-    for zone, b in ZONE_BOUNDARIES.items():
-        if b["x_min"] <= x <= b["x_max"] and b["y_min"] <= y <= b["y_max"]:
-            return zone
-    return "Udenfor"
-    
 def vis_side(df_input, df_spillere, hold_map=None):
     HIF_ID = 38331 
     HIF_RED = '#d31313'
@@ -76,7 +71,7 @@ def vis_side(df_input, df_spillere, hold_map=None):
     df_s = df_s.dropna(subset=['LOCATIONX', 'LOCATIONY'])
     navne_dict = dict(zip(s_df['PLAYER_WYID'], s_df['NAVN']))
     df_s['SPILLER_NAVN'] = df_s['PLAYER_WYID'].map(navne_dict)
-    df_s['ZONE_ID'] = df_s.apply(lambda row: find_zone(row['LOCATIONY'], row['LOCATIONX']), axis=1)
+    df_s['ZONE_ID'] = tildel_zoner(df_s, 'LOCATIONX', 'LOCATIONY', ZONE_BOUNDARIES, system=OPTA, data_system=OPTA, fallback="Udenfor")
 
     # --- 2. LAYOUT ---
     l_ven, l_hoe = st.columns([2, 1])
@@ -100,9 +95,8 @@ def vis_side(df_input, df_spillere, hold_map=None):
         st.metric("Total xG", f"{xg:.2f}")
 
     with l_ven:
-        pitch = VerticalPitch(half=True, pitch_type='wyscout', line_color='#000000', line_alpha=0.5)
-        fig, ax = pitch.draw(figsize=(6, 8))
-        ax.set_ylim(40, 102)
+        pitch, fig, ax = ny_bane(lodret=True, half=True, pitch_type='wyscout', line_color='#000000', line_alpha=0.5,
+                                 figsize=(6, 8), ylim=(40, 102))
 
         zone_counts = df_plot['ZONE_ID'].value_counts()
         max_v = zone_counts.max() if not zone_counts.empty else 1
@@ -2,7 +2,7 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-from mplsoccer import VerticalPitch
+from utils.pitches import ny_bane
 from data.data_load import load_snowflake_query
 
 # --- 0. KONFIGURATION ---
@@ -148,8 +148,8 @@ def vis_side(df_spillere=None, hold_map=None):
         """, unsafe_allow_html=True)
 
     with col_map:
-        pitch = VerticalPitch(half=True, pitch_type='wyscout', line_color='#444444', goal_type='box')
-        fig, ax = pitch.draw(figsize=(8, 10))
+        pitch, fig, ax = ny_bane(lodret=True, half=True, pitch_type='wyscout', line_color='#444444', goal_type='box',
+                                 figsize=(8, 10))
         
         if not df_p.empty:
             for _, row in df_p.iterrows():
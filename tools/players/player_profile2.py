@@ -4,6 +4,7 @@ import plotly.graph_objects as go
 
 from data.utils.spiller_qualifiers import ACTION_CATEGORIES, POSITION_ACTIONS
 from utils.helpers import get_ordinal
+from utils.assets import logo_base64
 
 # ---------------------------------------------------------------------------
 # Konstanter specifikke for Spillerprofil-visningen
@@ -120,11 +121,7 @@ def render_spillerprofil(truppen_stats: pd.DataFrame, truppen_stats_liga: pd.Dat
     with main_col_left:
         logo_html = ""
         if hold_logo is not None:
-            import io
-            import base64
-            buffered = io.BytesIO()
-            hold_logo.save(buffered, format="PNG")
-            img_str = base64.b64encode(buffered.getvalue()).decode()
+            img_str = logo_base64(hold_logo)
             logo_html = f'<img src="data:image/png;base64,{img_str}" style="height: 35px; margin-right: 12px;">'
 
         position_label = POSITION_DA.get(spiller_position, spiller_position)
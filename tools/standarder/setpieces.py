@@ -2,12 +2,9 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import re
-import matplotlib.pyplot as plt
 import plotly.graph_objects as go
-import requests
-from PIL import Image
 from io import BytesIO
-from mplsoccer import Pitch, VerticalPitch
+from PIL import Image as PILImage
 from reportlab.lib.pagesizes import A4
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image as RLImage, Table, TableStyle, PageBreak
 from reportlab.lib.styles import getSampleStyleSheet
@@ -15,6 +12,12 @@ from reportlab.lib.units import mm
 from reportlab.lib import colors
 from data.utils.team_mapping import TEAMS, TEAM_COLORS
 from data.data_load import _get_snowflake_conn
+from data.utils.event_kaeder import EventKaede
+from data.sql.registry import sql_in_liste
+from utils.assets import get_logo_img
+from utils.figur_cache import figur_bytes, vis_figur, fingeraftryk
+from utils.rapport_koe import vis_rapport_job
+from utils.pitches import ny_bane
 
 HIF_RED = '#cc0000'
 HIF_NAVN = "Hvidovre"  # Nøglen i TEAMS-dictet - Hvidovre IF skal altid kunne slås op herfra
@@ -26,45 +29,47 @@ PLAYER_FILE = 'data/players/1div_overskrivning.csv'
 PDF_NEUTRAL_BG = colors.HexColor('#e8e8e8')
 PDF_NEUTRAL_LINE = colors.HexColor('#999999')
 
-@st.cache_data(ttl=3600)
-def get_logo_img(opta_uuid):
-    if not opta_uuid: return None
-    url = next((info['logo'] for name, info in TEAMS.items() if info.get('opta_uuid') == opta_uuid), None)
-    if not url: return None
-    try:
-        response = requests.get(url, timeout=5)
-        return Image.open(BytesIO(response.content))
-    except: return None
-
 def universal_decode(text):
     if not isinstance(text, str): return text
     try: return text.encode('latin1').decode('utf-8')
     except: return text
 
+def tilfoej_naeste_events(df, df_kaede):
+    """
+    P1-P3: de tre næste events i kampen efter EVENT_EVENTID, udledt lokalt med
+    kæde-motoren i stedet for LEAD i Snowflake. df er standardsituationerne,
+    df_kaede de smalle kæde-kolonner for alle events i de samme kampe.
+    """
+    kaede = EventKaede(df_kaede, partition=['MATCH_OPTAUUID'], orden=['EVENT_EVENTID'])
+    naeste = pd.DataFrame({
+        'EVENT_OPTAUUID': kaede.df['EVENT_OPTAUUID'],
+        'P1_UUID': kaede.naeste('PLAYER_UUID'),
+        'P1_NAME': kaede.naeste('PLAYER_NAME'),
+        'P1_TEAM': kaede.naeste('TEAM_UUID'),
+        'P1_TYPE': kaede.naeste('EVENT_TYPEID'),
+        'P2_TYPE': kaede.naeste('EVENT_TYPEID', 2),
+        'P3_TYPE': kaede.naeste('EVENT_TYPEID', 3),
+    })
+    # Standardsituationerne i kædens rækkefølge (kamp, EVENT_EVENTID)
+    return naeste[['EVENT_OPTAUUID']].merge(df, on='EVENT_OPTAUUID').merge(naeste, on='EVENT_OPTAUUID')
+
 @st.cache_data(ttl=3600)
 def load_setpiece_data():
     conn = _get_snowflake_conn()
     if not conn: return pd.DataFrame()
 
+    # Kun standardsituationerne hentes med koordinater og qualifiers. P1-P3 kræver de
+    # mellemliggende events, så for kampe med standardsituationer hentes desuden de
+    # smalle kæde-kolonner for alle events (uden qualifier-join)
+    kaede_kolonner = (
+        "e.EVENT_OPTAUUID, e.MATCH_OPTAUUID, e.EVENT_EVENTID,"
+        " e.EVENT_CONTESTANT_OPTAUUID AS TEAM_UUID,"
+        " e.EVENT_TYPEID,"
+        " TRIM(e.PLAYER_OPTAUUID) AS PLAYER_UUID,"
+        " e.PLAYER_NAME"
+    )
     sql = (
-        "WITH BaseEvents AS ("
-        "    SELECT "
-        "        e.EVENT_OPTAUUID, e.MATCH_OPTAUUID, e.EVENT_EVENTID,"
-        "        e.EVENT_CONTESTANT_OPTAUUID AS TEAM_UUID,"
-        "        e.EVENT_TYPEID,"
-        "        TRIM(e.PLAYER_OPTAUUID) AS PLAYER_UUID,"
-        "        e.PLAYER_NAME,"
-        "        e.EVENT_X, e.EVENT_Y,"
-        "        LEAD(TRIM(e.PLAYER_OPTAUUID), 1) OVER (PARTITION BY e.MATCH_OPTAUUID ORDER BY e.EVENT_EVENTID) AS P1_UUID,"
-        "        LEAD(e.PLAYER_NAME, 1) OVER (PARTITION BY e.MATCH_OPTAUUID ORDER BY e.EVENT_EVENTID) AS P1_NAME,"
-        "        LEAD(e.EVENT_CONTESTANT_OPTAUUID, 1) OVER (PARTITION BY e.MATCH_OPTAUUID ORDER BY e.EVENT_EVENTID) AS P1_TEAM,"
-        "        LEAD(e.EVENT_TYPEID, 1) OVER (PARTITION BY e.MATCH_OPTAUUID ORDER BY e.EVENT_EVENTID) AS P1_TYPE,"
-        "        LEAD(e.EVENT_TYPEID, 2) OVER (PARTITION BY e.MATCH_OPTAUUID ORDER BY e.EVENT_EVENTID) AS P2_TYPE,"
-        "        LEAD(e.EVENT_TYPEID, 3) OVER (PARTITION BY e.MATCH_OPTAUUID ORDER BY e.EVENT_EVENTID) AS P3_TYPE"
-        "    FROM " + DB + ".OPTA_EVENTS e"
-        "    WHERE e.TOURNAMENTCALENDAR_OPTAUUID = '" + LIGA_UUID + "'"
-        "),"
-        "Quals AS ("
+        "WITH Quals AS ("
         "    SELECT "
         "        EVENT_OPTAUUID,"
         "        MAX(CASE WHEN QUALIFIER_QID = 107 THEN 'Indkast'"
@@ -82,16 +87,25 @@ def load_setpiece_data():
         "    WHERE QUALIFIER_QID IN (5, 6, 107, 140, 141, 152, 155, 223, 224, 225, 241)"
         "    GROUP BY EVENT_OPTAUUID"
         ") "
-        "SELECT b.*, q.TYPE_NAVN, q.ENDX, q.ENDY, q.SPARK_TYPE, q.FRISPARK_TYPE, q.LEVERING_TYPE "
-        "FROM BaseEvents b "
-        "JOIN Quals q ON b.EVENT_OPTAUUID = q.EVENT_OPTAUUID "
-        "WHERE q.TYPE_NAVN IS NOT NULL"
+        "SELECT " + kaede_kolonner + ", e.EVENT_X, e.EVENT_Y, q.TYPE_NAVN, q.ENDX, q.ENDY, q.SPARK_TYPE, q.FRISPARK_TYPE, q.LEVERING_TYPE "
+        "FROM " + DB + ".OPTA_EVENTS e "
+        "JOIN Quals q ON e.EVENT_OPTAUUID = q.EVENT_OPTAUUID "
+        "WHERE e.TOURNAMENTCALENDAR_OPTAUUID = '" + LIGA_UUID + "' "
+        "AND q.TYPE_NAVN IS NOT NULL"
     )
 
     try:
         df = conn.query(sql)
         if df is None or df.empty: return pd.DataFrame()
         df.columns = [c.upper() for c in df.columns]
+        df_kaede = conn.query(
+            "SELECT " + kaede_kolonner + " "
+            "FROM " + DB + ".OPTA_EVENTS e "
+            "WHERE e.TOURNAMENTCALENDAR_OPTAUUID = '" + LIGA_UUID + "' "
+            "AND e.MATCH_OPTAUUID IN " + sql_in_liste(df['MATCH_OPTAUUID'])
+        )
+        df_kaede.columns = [c.upper() for c in df_kaede.columns]
+        df = tilfoej_naeste_events(df, df_kaede)
         df['PLAYER_NAME'] = df['PLAYER_NAME'].apply(universal_decode)
         df['P1_NAME'] = df['P1_NAME'].apply(universal_decode)
 
@@ -111,7 +125,7 @@ def load_setpiece_data():
 
         df['MODTAGER'] = df.apply(find_target, axis=1)
         shot_types = [13, 14, 15, 16]
-        df['ER_AFSLUTNING'] = df.apply(lambda x: 1 if x['P1_TYPE'] in shot_types or x['P2_TYPE'] in shot_types or x['P3_TYPE'] in shot_types else 0, axis=1)
+        df['ER_AFSLUTNING'] = df[['P1_TYPE', 'P2_TYPE', 'P3_TYPE']].isin(shot_types).any(axis=1).astype(int)
 
         def get_udfoerelse(row):
             if row['TYPE_NAVN'] == 'Hjørnespark':
@@ -302,14 +316,40 @@ def render_team_label(team_navn, logo_width=16):
     with c_text:
         st.markdown(f"**{team_navn}**")
 
+def tegn_zone_fig(side_df, sp_type, titel, team_logo=None):
+    """
+    Én modtagerzone-figur: hexbin af ENDX/ENDY på en halv (hjørnespark) eller hel bane.
+    Hvis team_logo (PIL-billede) gives, tegnes det i øverste højre hjørne, så det altid
+    er tydeligt hvilket hold billedet viser.
+    """
+    if sp_type == "Hjørnespark":
+        pitch, fig, ax = ny_bane(lodret=True, pitch_type='opta', half=True, pitch_color='white', line_color='#333333',
+                                 linewidth=1.2, figsize=(6, 6))
+        titel_y = 102
+    else:
+        pitch, fig, ax = ny_bane(pitch_type='opta', pitch_color='white', line_color='#333333', linewidth=1.2, figsize=(8, 5.3))
+        titel_y = 103
+
+    pitch.hexbin(side_df['ENDX'], side_df['ENDY'], ax=ax, edgecolors='#ffffff', gridsize=(8, 8), cmap='Reds', alpha=0.8)
+    ax.text(50, titel_y, titel, fontsize=8, fontweight='bold', color='#333333', ha='center')
+
+    # Logo i højre side af billedet - gør det entydigt hvilket hold billedet tilhører
+    if team_logo is not None:
+        try:
+            logo_ax = ax.inset_axes([0.84, 0.84, 0.14, 0.14], transform=ax.transAxes)
+            logo_ax.imshow(team_logo)
+            logo_ax.axis('off')
+        except Exception:
+            pass
+    return fig
+
 def build_zone_figs(df_subset, sp_type, titel_prefix="", team_logo=None):
     """
-    Bygger to matplotlib-figurer med modtagerzoner for en given dødboldtype
-    (Hjørnespark, Frispark eller Indkast) - én for aktioner fra venstre side,
-    én for aktioner fra højre side. Hvis team_logo (PIL-billede) gives,
-    tegnes det i øverste højre hjørne af hver figur, så det altid er
-    tydeligt hvilket hold billedet viser.
-    Figurerne st.pyplot'es IKKE her, så de kan genbruges flere steder.
+    Modtagerzoner for en given dødboldtype (Hjørnespark, Frispark eller Indkast) -
+    én for aktioner fra venstre side, én for aktioner fra højre side.
+    Returnerer {side: (png-bytes eller None, antal)}. Billederne kommer fra
+    render-cachen (utils.figur_cache), så de kun rasteriseres, når data eller logo
+    ændrer sig, og de samme bytes vises i Streamlit (st.image) og lægges i PDF'en.
     """
     df_t = df_subset[df_subset['TYPE_NAVN'] == sp_type].copy()
     for c in ['EVENT_X', 'EVENT_Y', 'ENDX', 'ENDY']:
@@ -324,42 +364,12 @@ def build_zone_figs(df_subset, sp_type, titel_prefix="", team_logo=None):
         if side_df.empty:
             resultat[side_navn] = (None, 0)
             continue
-
-        if sp_type == "Hjørnespark":
-            pitch = VerticalPitch(pitch_type='opta', half=True, pitch_color='white', line_color='#333333', linewidth=1.2)
-            fig, ax = pitch.draw(figsize=(6, 6))
-            titel_y = 102
-        else:
-            pitch = Pitch(pitch_type='opta', pitch_color='white', line_color='#333333', linewidth=1.2)
-            fig, ax = pitch.draw(figsize=(8, 5.3))
-            titel_y = 103
-
-        pitch.hexbin(side_df['ENDX'], side_df['ENDY'], ax=ax, edgecolors='#ffffff', gridsize=(8, 8), cmap='Reds', alpha=0.8)
         titel = f"{titel_prefix}{sp_type} - {side_navn} ({len(side_df)} stk.)".strip()
-        ax.text(50, titel_y, titel, fontsize=8, fontweight='bold', color='#333333', ha='center')
-
-        # Logo i højre side af billedet - gør det entydigt hvilket hold billedet tilhører
-        if team_logo is not None:
-            try:
-                logo_ax = ax.inset_axes([0.84, 0.84, 0.14, 0.14], transform=ax.transAxes)
-                logo_ax.imshow(team_logo)
-                logo_ax.axis('off')
-            except Exception:
-                pass
-
-        resultat[side_navn] = (fig, len(side_df))
+        png = figur_bytes(tegn_zone_fig, side_df[['ENDX', 'ENDY']], sp_type, titel, team_logo=team_logo)
+        resultat[side_navn] = (png, len(side_df))
     return resultat
 
-def build_all_zone_figs(df_subset, titel_prefix="", team_logo=None):
-    """Bygger venstre/højre-zonefigurer for alle tre dødboldtyper på én gang."""
-    return {sp_type: build_zone_figs(df_subset, sp_type, titel_prefix=titel_prefix, team_logo=team_logo) for sp_type in ["Hjørnespark", "Frispark", "Indkast"]}
-
-def close_all_figs(zone_figs_dict):
-    """Lukker alle matplotlib-figurer i et build_all_zone_figs-resultat, for at undgå memory-leaks."""
-    for figs in zone_figs_dict.values():
-        for fig, _ in figs.values():
-            if fig is not None:
-                plt.close(fig)
+ZONE_KOLONNER = ['TYPE_NAVN', 'EVENT_X', 'EVENT_Y', 'ENDX', 'ENDY']  # det build_zone_figs bruger af df
 
 # --- PDF-eksport ---
 
@@ -376,14 +386,12 @@ def pil_to_rlimage(pil_img, width_mm=22):
     ratio = (pil_img.height / pil_img.width) if pil_img.width else 1
     return RLImage(buf, width=width_mm * mm, height=width_mm * ratio * mm)
 
-def fig_to_rlimage(fig, width_mm=150):
-    """Konverterer en matplotlib-figur til et ReportLab-billede, med bevaret højde/bredde-forhold."""
-    buf = BytesIO()
-    fig.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-    buf.seek(0)
-    w_in, h_in = fig.get_size_inches()
-    ratio = (h_in / w_in) if w_in else 1
-    return RLImage(buf, width=width_mm * mm, height=width_mm * ratio * mm)
+def png_to_rlimage(png, width_mm=150):
+    """Konverterer PNG-bytes (fx fra render-cachen) til et ReportLab-billede, med bevaret højde/bredde-forhold."""
+    with PILImage.open(BytesIO(png)) as img:
+        w_px, h_px = img.size
+    ratio = (h_px / w_px) if w_px else 1
+    return RLImage(BytesIO(png), width=width_mm * mm, height=width_mm * ratio * mm)
 
 def _top_tabel(styles, titel, data_dict, kolonne_navn):
     """Bygger en enkelt ReportLab-tabel (neutrale farver) til top 3-tagere eller top 3-modtagere."""
@@ -426,10 +434,10 @@ def _tilfoej_zone_sider(story, styles, zone_figs, sektion_titel, team_navn, offe
         story.append(Spacer(1, 4 * mm))
         figs = zone_figs.get(sp_type, {})
         for side_navn in ["Venstre side", "Højre side"]:
-            fig, antal = figs.get(side_navn, (None, 0))
+            png, antal = figs.get(side_navn, (None, 0))
             story.append(Paragraph(f"{side_navn} ({antal} stk.)", styles['Heading3']))
-            if fig is not None:
-                story.append(fig_to_rlimage(fig, 150))
+            if png is not None:
+                story.append(png_to_rlimage(png, 150))
             else:
                 story.append(Paragraph("Ingen data.", styles['Normal']))
             story.append(Spacer(1, 6 * mm))
@@ -503,6 +511,68 @@ def generate_modstanderrapport_pdf(hif_navn, modstander_navn, off_opsummering, t
     buffer.seek(0)
     return buffer
 
+def byg_modstanderrapport(hif_navn, modstander_navn, off_opsummering, top3_tagere, top3_modtagere, df_off, def_opsummering, df_def, fremskridt=None):
+    """
+    Hele PDF-rapporten som bytes - zonefigurer og reportlab. Køres som baggrundsjob
+    (utils.rapport_koe) i en worker-proces; fremskridt(andel, tekst) melder, hvor langt den er.
+    """
+    fremskridt = fremskridt or (lambda andel, tekst="": None)
+    mod_logo = get_logo_img(TEAMS.get(modstander_navn, {}).get('opta_uuid'))
+    zone_figs = {}
+    trin = [("off", "", df_off), ("def", "Imod dem: ", df_def)]
+    for i, (sektion, prefix, df_s) in enumerate(trin):
+        zone_figs[sektion] = {}
+        for j, sp_type in enumerate(["Hjørnespark", "Frispark", "Indkast"]):
+            fremskridt((i * 3 + j) / 7, f"{'Offensive' if sektion == 'off' else 'Defensive'} zoner: {sp_type.lower()}")
+            zone_figs[sektion][sp_type] = build_zone_figs(df_s, sp_type, titel_prefix=prefix, team_logo=mod_logo)
+    fremskridt(6 / 7, "Samler PDF")
+    buffer = generate_modstanderrapport_pdf(
+        hif_navn, modstander_navn, off_opsummering, top3_tagere, top3_modtagere, zone_figs["off"], def_opsummering, zone_figs["def"]
+    )
+    return buffer.getvalue()
+
+def tegn_setpiece_plot(df_plot, sp_type, side_sel, p_sel, vis_mode, t_sel, t_color, hold_logo, total, pct):
+    """Dødboldsplot for én type: startpunkter, pile og/eller modtagerzoner (hexbin) med logo og nøgletal."""
+    if sp_type == "Hjørnespark":
+        pitch, fig, ax = ny_bane(lodret=True, pitch_type='opta', half=True, pitch_color='white', line_color='#333333',
+                                 linewidth=1.5, figsize=(7, 7))
+
+        ax.text(93.0, 56.0, f"{sp_type.upper()} ({side_sel.upper()})", fontsize=7, fontweight='bold', color='#555555', va='center')
+        spiller_tekst = f"Spiller: {p_sel}" if p_sel != "Alle spillere" else "Alle spillere"
+        stats_line = f"{spiller_tekst} — {total} aktioner ({int(pct)}% succes)"
+        ax.text(93.0, 53.0, stats_line, fontsize=7, color='#666666', va='center')
+
+        if hold_logo:
+            ax.text(93.0, 58.0, t_sel.upper(), fontsize=8, fontweight='bold', color='#222222', va='center')
+            ax_logo = ax.inset_axes([93.0, 56.0, 4.5, 4.5], transform=ax.transData)
+            ax_logo.imshow(hold_logo)
+            ax_logo.axis('off')
+    else:
+        pitch, fig, ax = ny_bane(pitch_type='opta', pitch_color='white', line_color='#333333', linewidth=1.5, figsize=(9, 6))
+        if hold_logo:
+            ax_logo = ax.inset_axes([3.0, 91.0, 6.0, 6.0], transform=ax.transData)
+            ax_logo.imshow(hold_logo)
+            ax_logo.axis('off')
+            ax.text(11.0, 92.0, t_sel.upper(), fontsize=8, fontweight='bold', color='#222222', va='center')
+        ax.text(3.0, 87.0, f"{sp_type.upper()} ({side_sel.upper()})", fontsize=7, fontweight='bold', color='#555555', va='center')
+        spiller_tekst = f"Spiller: {p_sel}" if p_sel != "Alle spillere" else "Alle spillere"
+        stats_line = f"{spiller_tekst} — {total} aktioner ({int(pct)}% succes)"
+        ax.text(3.0, 84.0, stats_line, fontsize=7, color='#666666', va='center')
+
+    x = df_plot['EVENT_X']
+    y = df_plot['EVENT_Y']
+    end_x = df_plot['ENDX']
+    end_y = df_plot['ENDY']
+
+    if not df_plot.dropna(subset=['ENDX', 'ENDY']).empty:
+        if "Zoner" in vis_mode:
+            pitch.hexbin(end_x, end_y, ax=ax, edgecolors='#ffffff', gridsize=(8, 8), cmap='Reds', alpha=0.65)
+        if "Pile" in vis_mode:
+            pitch.arrows(x, y, end_x, end_y, color=t_color, ax=ax, width=1.5, headwidth=3, headlength=3, alpha=0.5)
+            pitch.scatter(x, y, ax=ax, color=t_color, s=25, alpha=0.7)
+
+    return fig
+
 def render_setpiece_analysis(df_team, sp_type, t_sel):
     t_info = next((info for name, info in TEAMS.items() if name == t_sel), None)
     hold_logo = get_logo_img(t_info.get('opta_uuid') if t_info else None)
@@ -544,46 +614,8 @@ def render_setpiece_analysis(df_team, sp_type, t_sel):
     with col_p:
         t_color = TEAM_COLORS.get(t_sel, {}).get('primary', HIF_RED)
 
-        if sp_type == "Hjørnespark":
-            pitch = VerticalPitch(pitch_type='opta', half=True, pitch_color='white', line_color='#333333', linewidth=1.5)
-            fig, ax = pitch.draw(figsize=(7, 7))
-
-            ax.text(93.0, 56.0, f"{sp_type.upper()} ({side_sel.upper()})", fontsize=7, fontweight='bold', color='#555555', va='center')
-            spiller_tekst = f"Spiller: {p_sel}" if p_sel != "Alle spillere" else "Alle spillere"
-            stats_line = f"{spiller_tekst} — {total} aktioner ({int(pct)}% succes)"
-            ax.text(93.0, 53.0, stats_line, fontsize=7, color='#666666', va='center')
-
-            if hold_logo:
-                ax.text(93.0, 58.0, t_sel.upper(), fontsize=8, fontweight='bold', color='#222222', va='center')
-                ax_logo = ax.inset_axes([93.0, 56.0, 4.5, 4.5], transform=ax.transData)
-                ax_logo.imshow(hold_logo)
-                ax_logo.axis('off')
-        else:
-            pitch = Pitch(pitch_type='opta', pitch_color='white', line_color='#333333', linewidth=1.5)
-            fig, ax = pitch.draw(figsize=(9, 6))
-            if hold_logo:
-                ax_logo = ax.inset_axes([3.0, 91.0, 6.0, 6.0], transform=ax.transData)
-                ax_logo.imshow(hold_logo)
-                ax_logo.axis('off')
-                ax.text(11.0, 92.0, t_sel.upper(), fontsize=8, fontweight='bold', color='#222222', va='center')
-            ax.text(3.0, 87.0, f"{sp_type.upper()} ({side_sel.upper()})", fontsize=7, fontweight='bold', color='#555555', va='center')
-            spiller_tekst = f"Spiller: {p_sel}" if p_sel != "Alle spillere" else "Alle spillere"
-            stats_line = f"{spiller_tekst} — {total} aktioner ({int(pct)}% succes)"
-            ax.text(3.0, 84.0, stats_line, fontsize=7, color='#666666', va='center')
-
-        x = df_plot['EVENT_X']
-        y = df_plot['EVENT_Y']
-        end_x = df_plot['ENDX']
-        end_y = df_plot['ENDY']
-
-        if not df_plot.dropna(subset=['ENDX', 'ENDY']).empty:
-            if "Zoner" in vis_mode:
-                pitch.hexbin(end_x, end_y, ax=ax, edgecolors='#ffffff', gridsize=(8, 8), cmap='Reds', alpha=0.65)
-            if "Pile" in vis_mode:
-                pitch.arrows(x, y, end_x, end_y, color=t_color, ax=ax, width=1.5, headwidth=3, headlength=3, alpha=0.5)
-                pitch.scatter(x, y, ax=ax, color=t_color, s=25, alpha=0.7)
-
-        st.pyplot(fig, clear_figure=True)
+        # Render-cachen genbruger billedet, så længe filtre, data og logo er uændrede
+        vis_figur(tegn_setpiece_plot, df_plot[['EVENT_X', 'EVENT_Y', 'ENDX', 'ENDY']], sp_type, side_sel, p_sel, vis_mode, t_sel, t_color, hold_logo, total, pct)
 
     with col_s:
         st.caption("**Top 5-servere**")
@@ -787,22 +819,20 @@ def vis_side():
 
             st.markdown("---")
             st.markdown(f"##### Modtagerzoner ved hjørnespark (kviklook) — {modstander}")
-            off_zone_figs = build_all_zone_figs(df_mod_team, team_logo=modstander_logo)
-            corner_figs = off_zone_figs["Hjørnespark"]
+            corner_figs = build_zone_figs(df_mod_team, "Hjørnespark", team_logo=modstander_logo)
             cz1, cz2 = st.columns(2)
             for col, side_navn in zip([cz1, cz2], ["Venstre side", "Højre side"]):
                 with col:
-                    fig, antal = corner_figs.get(side_navn, (None, 0))
+                    png, antal = corner_figs.get(side_navn, (None, 0))
                     st.markdown(f"**{side_navn}** ({antal} hjørnespark)")
-                    if fig is not None:
-                        st.pyplot(fig, clear_figure=False)
+                    if png is not None:
+                        st.image(png)
                     else:
                         st.caption("Ingen data")
 
             # Defensiv data - hvordan andre hold har angrebet MODSTANDEREN (relevant for HIFs eget angreb)
             df_mod_defensiv = get_defensive_events(df_all, modstander, uuid_to_name)
             def_opsummering = opsummering_linjer(df_mod_defensiv, f"modstandere af {modstander}")
-            def_zone_figs = build_all_zone_figs(df_mod_defensiv, titel_prefix="Imod dem: ", team_logo=modstander_logo)
 
             with st.expander(f"Defensive tendenser hos {modstander} (indgår også i PDF-rapporten)"):
                 render_team_label(modstander)
@@ -825,21 +855,19 @@ def vis_side():
                     key="download_modstanderrapport_md"
                 )
             with col_dl2:
-                pdf_buffer = generate_modstanderrapport_pdf(
-                    HIF_NAVN, modstander, opsummering, top3_tagere, top3_modtagere, off_zone_figs, def_opsummering, def_zone_figs
+                # PDF'en bygges som baggrundsjob - nøglen er hold, sæson og indholdet af data,
+                # så samme rapport kun bygges én gang og derefter hentes med det samme
+                rapport_args = (
+                    HIF_NAVN, modstander, opsummering, top3_tagere, top3_modtagere,
+                    df_mod_team.reindex(columns=ZONE_KOLONNER), def_opsummering, df_mod_defensiv.reindex(columns=ZONE_KOLONNER),
                 )
-                st.download_button(
-                    "Download PDF-rapport",
-                    data=pdf_buffer,
-                    file_name=f"modstanderrapport_{modstander}.pdf",
-                    mime="application/pdf",
-                    key="download_modstanderrapport_pdf"
+                noegle = fingeraftryk("modstanderrapport", LIGA_UUID, byg_modstanderrapport, rapport_args)
+                vis_rapport_job(
+                    noegle, byg_modstanderrapport, *rapport_args,
+                    filnavn=f"modstanderrapport_{modstander}.pdf",
+                    key="modstanderrapport_pdf"
                 )
 
-            # Ryd op i figurerne, nu hvor de er brugt både i Streamlit og PDF'en
-            close_all_figs(off_zone_figs)
-            close_all_figs(def_zone_figs)
-
     # =====================================================================
     # Sammenligning
     # =====================================================================
@@ -908,10 +936,10 @@ def vis_side():
             dz1, dz2 = st.columns(2)
             for col, side_navn in zip([dz1, dz2], ["Venstre side", "Højre side"]):
                 with col:
-                    fig, antal = def_corner_figs.get(side_navn, (None, 0))
+                    png, antal = def_corner_figs.get(side_navn, (None, 0))
                     st.markdown(f"**{side_navn}** ({antal} hjørnespark)")
-                    if fig is not None:
-                        st.pyplot(fig, clear_figure=True)
+                    if png is not None:
+                        st.image(png)
                     else:
                         st.caption("Ingen data")
 
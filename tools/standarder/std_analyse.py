@@ -2,12 +2,10 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-import requests
-from PIL import Image
-from io import BytesIO
 from mplsoccer import Pitch, VerticalPitch
 from data.utils.team_mapping import TEAMS, TEAM_COLORS
 from data.data_load import _get_snowflake_conn
+from utils.assets import logo_fra_url
 
 # --- 1. KONFIGURATION ---
 HIF_RED = '#cc0000'
@@ -16,17 +14,6 @@ LIGA_UUID = "2mb332vncy4450vu14paj8844"
 PLAYER_FILE = 'data/players/1div_overskrivning.csv'
 
 # --- 2. HJÆLPEFUNKTIONER (LOGO & DECODE) ---
-@st.cache_data(ttl=3600)
-def get_logo_img(opta_uuid):
-    """Henter klublogo fra din TEAMS mapping eller via URL"""
-    if not opta_uuid: return None
-    url = next((info['logo'] for name, info in TEAMS.items() if info.get('opta_uuid') == opta_uuid), None)
-    if not url: return None
-    try:
-        response = requests.get(url, timeout=5)
-        return Image.open(BytesIO(response.content))
-    except: return None
-
 def universal_decode(text):
     """Fikser ødelagte tegn fra Norden, Baltikum og Sydeuropa."""
     if not isinstance(text, str): return text
@@ -123,7 +110,7 @@ def get_summary_stats(df, group_col):
 # --- 5. VISUALISERING AF HJØRNESPARK ---
 def render_setpiece_analysis(df_team, sp_type, t_sel):
     t_info = next((info for name, info in TEAMS.items() if name == t_sel), None)
-    hold_logo = get_logo_img(t_info.get('logo') if t_info else None)
+    hold_logo = logo_fra_url(t_info.get('logo') if t_info else None)
 
     f1, f2, f3, f4 = st.columns([1.2, 1.2, 1.2, 1])
     with f1:
@@ -2,57 +2,59 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-import requests
-from PIL import Image
-from io import BytesIO
 from mplsoccer import Pitch, VerticalPitch
 from data.utils.team_mapping import TEAMS, TEAM_COLORS
 from data.data_load import _get_snowflake_conn
+from data.utils.event_kaeder import EventKaede
+from data.sql.registry import sql_in_liste
+from utils.assets import get_logo_img
 
 HIF_RED = '#cc0000'
 DB = "KLUB_HVIDOVREIF.AXIS"
 LIGA_UUID = "2mb332vncy4450vu14paj8844" 
 PLAYER_FILE = 'data/players/1div_overskrivning.csv'
 
-@st.cache_data(ttl=3600)
-def get_logo_img(opta_uuid):
-    if not opta_uuid: return None
-    url = next((info['logo'] for name, info in TEAMS.items() if info.get('opta_uuid') == opta_uuid), None)
-    if not url: return None
-    try:
-        response = requests.get(url, timeout=5)
-        return Image.open(BytesIO(response.content))
-    except: return None
-
 def universal_decode(text):
     if not isinstance(text, str): return text
     try: return text.encode('latin1').decode('utf-8')
     except: return text
 
+def tilfoej_naeste_events(df, df_kaede):
+    """
+    P1-P3: de tre næste events i kampen efter EVENT_EVENTID, udledt lokalt med
+    kæde-motoren i stedet for LEAD i Snowflake. df er standardsituationerne,
+    df_kaede de smalle kæde-kolonner for alle events i de samme kampe.
+    """
+    kaede = EventKaede(df_kaede, partition=['MATCH_OPTAUUID'], orden=['EVENT_EVENTID'])
+    naeste = pd.DataFrame({
+        'EVENT_OPTAUUID': kaede.df['EVENT_OPTAUUID'],
+        'P1_UUID': kaede.naeste('PLAYER_UUID'),
+        'P1_NAME': kaede.naeste('PLAYER_NAME'),
+        'P1_TEAM': kaede.naeste('TEAM_UUID'),
+        'P1_TYPE': kaede.naeste('EVENT_TYPEID'),
+        'P2_TYPE': kaede.naeste('EVENT_TYPEID', 2),
+        'P3_TYPE': kaede.naeste('EVENT_TYPEID', 3),
+    })
+    # Standardsituationerne i kædens rækkefølge (kamp, EVENT_EVENTID)
+    return naeste[['EVENT_OPTAUUID']].merge(df, on='EVENT_OPTAUUID').merge(naeste, on='EVENT_OPTAUUID')
+
 @st.cache_data(ttl=3600)
 def load_setpiece_data():
     conn = _get_snowflake_conn()
     if not conn: return pd.DataFrame()
     
+    # Kun standardsituationerne hentes med koordinater og qualifiers. P1-P3 kræver de
+    # mellemliggende events, så for kampe med standardsituationer hentes desuden de
+    # smalle kæde-kolonner for alle events (uden qualifier-join)
+    kaede_kolonner = (
+        "e.EVENT_OPTAUUID, e.MATCH_OPTAUUID, e.EVENT_EVENTID,"
+        " e.EVENT_CONTESTANT_OPTAUUID AS TEAM_UUID,"
+        " e.EVENT_TYPEID,"
+        " TRIM(e.PLAYER_OPTAUUID) AS PLAYER_UUID,"
+        " e.PLAYER_NAME"
+    )
     sql = (
-        "WITH BaseEvents AS ("
-        "    SELECT "
-        "        e.EVENT_OPTAUUID, e.MATCH_OPTAUUID, e.EVENT_EVENTID,"
-        "        e.EVENT_CONTESTANT_OPTAUUID AS TEAM_UUID,"
-        "        e.EVENT_TYPEID,"
-        "        TRIM(e.PLAYER_OPTAUUID) AS PLAYER_UUID,"
-        "        e.PLAYER_NAME,"
-        "        e.EVENT_X, e.EVENT_Y,"
-        "        LEAD(TRIM(e.PLAYER_OPTAUUID), 1) OVER (PARTITION BY e.MATCH_OPTAUUID ORDER BY e.EVENT_EVENTID) AS P1_UUID,"
-        "        LEAD(e.PLAYER_NAME, 1) OVER (PARTITION BY e.MATCH_OPTAUUID ORDER BY e.EVENT_EVENTID) AS P1_NAME,"
-        "        LEAD(e.EVENT_CONTESTANT_OPTAUUID, 1) OVER (PARTITION BY e.MATCH_OPTAUUID ORDER BY e.EVENT_EVENTID) AS P1_TEAM,"
-        "        LEAD(e.EVENT_TYPEID, 1) OVER (PARTITION BY e.MATCH_OPTAUUID ORDER BY e.EVENT_EVENTID) AS P1_TYPE,"
-        "        LEAD(e.EVENT_TYPEID, 2) OVER (PARTITION BY e.MATCH_OPTAUUID ORDER BY e.EVENT_EVENTID) AS P2_TYPE,"
-        "        LEAD(e.EVENT_TYPEID, 3) OVER (PARTITION BY e.MATCH_OPTAUUID ORDER BY e.EVENT_EVENTID) AS P3_TYPE"
-        "    FROM " + DB + ".OPTA_EVENTS e"
-        "    WHERE e.TOURNAMENTCALENDAR_OPTAUUID = '" + LIGA_UUID + "'"
-        "),"
-        "Quals AS ("
+        "WITH Quals AS ("
         "    SELECT "
         "        EVENT_OPTAUUID,"
         "        MAX(CASE WHEN QUALIFIER_QID = 107 THEN 'Indkast'"
@@ -64,16 +66,25 @@ def load_setpiece_data():
         "    WHERE QUALIFIER_QID IN (5, 6, 107, 140, 141)"
         "    GROUP BY EVENT_OPTAUUID"
         ") "
-        "SELECT b.*, q.TYPE_NAVN, q.ENDX, q.ENDY "
-        "FROM BaseEvents b "
-        "JOIN Quals q ON b.EVENT_OPTAUUID = q.EVENT_OPTAUUID "
-        "WHERE q.TYPE_NAVN IS NOT NULL"
+        "SELECT " + kaede_kolonner + ", e.EVENT_X, e.EVENT_Y, q.TYPE_NAVN, q.ENDX, q.ENDY "
+        "FROM " + DB + ".OPTA_EVENTS e "
+        "JOIN Quals q ON e.EVENT_OPTAUUID = q.EVENT_OPTAUUID "
+        "WHERE e.TOURNAMENTCALENDAR_OPTAUUID = '" + LIGA_UUID + "' "
+        "AND q.TYPE_NAVN IS NOT NULL"
     )
-    
+
     try:
         df = conn.query(sql)
         if df is None or df.empty: return pd.DataFrame()
         df.columns = [c.upper() for c in df.columns]
+        df_kaede = conn.query(
+            "SELECT " + kaede_kolonner + " "
+            "FROM " + DB + ".OPTA_EVENTS e "
+            "WHERE e.TOURNAMENTCALENDAR_OPTAUUID = '" + LIGA_UUID + "' "
+            "AND e.MATCH_OPTAUUID IN " + sql_in_liste(df['MATCH_OPTAUUID'])
+        )
+        df_kaede.columns = [c.upper() for c in df_kaede.columns]
+        df = tilfoej_naeste_events(df, df_kaede)
         df['PLAYER_NAME'] = df['PLAYER_NAME'].apply(universal_decode)
         df['P1_NAME'] = df['P1_NAME'].apply(universal_decode)
         
@@ -93,7 +104,7 @@ def load_setpiece_data():
         
         df['MODTAGER'] = df.apply(find_target, axis=1)
         shot_types = [13, 14, 15, 16]
-        df['ER_AFSLUTNING'] = df.apply(lambda x: 1 if x['P1_TYPE'] in shot_types or x['P2_TYPE'] in shot_types or x['P3_TYPE'] in shot_types else 0, axis=1)
+        df['ER_AFSLUTNING'] = df[['P1_TYPE', 'P2_TYPE', 'P3_TYPE']].isin(shot_types).any(axis=1).astype(int)
         return df
     except Exception as e:
         st.error(f"SQL-fejl: {e}")
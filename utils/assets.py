@@ -0,0 +1,294 @@
+# utils/assets.py
+"""
+Fælles asset-cache for holdlogoer (og andre billeder fra URL'er).
+
+Hver side havde sin egen get_logo_img: lineær søgning i TEAMS efter URL'en, et
+HTTP-kald pr. proces og st.cache_data, der pickler PIL-billedet ved hvert hit.
+Her er der én cache pr. proces:
+  - TEAMS indekseres én gang: hold-id (Opta UUID) -> logo-URL
+  - de rå billedbytes gemmes på disk i .cache/assets, så en genstart ikke henter igen
+  - afkodede PIL-billeder, thumbnails og base64-data-URI'er holdes i hukommelsen
+Efter første opvarmning leveres et logo uden netværk og uden afkodning.
+Billederne deles mellem kald - kopiér (img.copy()) før de ændres.
+
+Forvarmning: forvarm_assets() henter alle logoer i TEAMS og truppens spillerbilleder
+parallelt i en baggrundstråd ved app-start (og ved sæsonskift), så første
+sidevisning ikke betaler ét HTTP-kald pr. hold efter hinanden.
+"""
+import os
+import io
+import base64
+import hashlib
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import requests
+import streamlit as st
+from PIL import Image
+
+from data.utils.team_mapping import TEAMS, SEASON_LEAGUE_MAPPER, TOURNAMENTCALENDAR_NAME
+
+ASSET_DIR = os.path.join(os.getcwd(), ".cache", "assets")
+HTTP_TIMEOUT = 5
+FORVARM_TRAADE = 16
+SPILLER_FOTO_URL = "https://cdn5.wyscout.com/photos/players/public/{}.png"
+
+
+def hold_noegle(opta_uuid):
+    """Normaliseret hold-id; 't'-præfiks og store/små bogstaver ignoreres (som utils.helpers)."""
+    if not opta_uuid:
+        return None
+    return str(opta_uuid).strip().lower().replace('t', '')
+
+
+_LOGO_URLS = None
+
+
+def logo_url(opta_uuid):
+    """Logo-URL for et hold ud fra Opta UUID (TEAMS indekseres ved første kald)."""
+    global _LOGO_URLS
+    if _LOGO_URLS is None:
+        _LOGO_URLS = {
+            hold_noegle(info.get('opta_uuid')): info['logo']
+            for info in TEAMS.values() if info.get('opta_uuid') and info.get('logo')
+        }
+    return _LOGO_URLS.get(hold_noegle(opta_uuid))
+
+
+class AssetCache:
+    """
+    Disk + hukommelse for billeder nøglet på URL.
+    Manglende/fejlede downloads huskes kun i hukommelsen, så de prøves igen efter genstart.
+    cache_dir=None: kun hukommelse (fx på et skrivebeskyttet filsystem).
+    """
+
+    def __init__(self, cache_dir=ASSET_DIR, session=None):
+        self.cache_dir = cache_dir
+        self.session = session or requests.Session()
+        self._lock = threading.Lock()
+        self._bytes = {}
+        self._billeder = {}
+        self._uris = {}
+        self._png = {}  # id(billede) -> (weakref, base64)
+        self._i_gang = {}  # url -> Event, mens en anden tråd henter den
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _sti(self, url):
+        if not self.cache_dir:
+            return None
+        return os.path.join(self.cache_dir, hashlib.sha1(url.encode()).hexdigest() + ".img")
+
+    def _gem(self, sti, data):
+        tmp = f"{sti}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, sti)
+        except OSError:
+            pass
+
+    def _hent(self, url):
+        try:
+            r = self.session.get(url, timeout=HTTP_TIMEOUT)
+            return r.content if r.status_code == 200 and r.content else None
+        except requests.RequestException:
+            return None
+
+    def raa(self, url):
+        """Billedets bytes: hukommelse -> disk -> HTTP (gemmes på disk ved succes)."""
+        if not url:
+            return None
+        if url in self._bytes:
+            return self._bytes[url]
+        # Samme URL hentes kun én gang ad gangen - fx side og forvarmning samtidig
+        with self._lock:
+            vent = self._i_gang.get(url)
+            if vent is None and url not in self._bytes:
+                self._i_gang[url] = threading.Event()
+        if vent is not None:
+            vent.wait(HTTP_TIMEOUT * 2)
+            return self._bytes.get(url)
+        if url in self._bytes:
+            return self._bytes[url]
+        try:
+            data = self._laes_eller_hent(url)
+        finally:
+            with self._lock:
+                self._i_gang.pop(url).set()
+        return data
+
+    def _laes_eller_hent(self, url):
+        sti = self._sti(url)
+        data = None
+        if sti:
+            try:
+                with open(sti, "rb") as f:
+                    data = f.read()
+            except OSError:
+                pass
+        if data is None:
+            data = self._hent(url)
+            if data is not None and sti:
+                self._gem(sti, data)
+        with self._lock:
+            self._bytes[url] = data
+        return data
+
+    def billede(self, url, stoerrelse=None, rgba=False):
+        """
+        Afkodet PIL-billede (delt objekt). stoerrelse=(b, h) giver et thumbnail,
+        der bevarer proportionerne; rgba=True konverterer til RGBA.
+        """
+        noegle = (url, stoerrelse, rgba)
+        if noegle in self._billeder:
+            return self._billeder[noegle]
+        data = self.raa(url)
+        img = None
+        if data is not None:
+            try:
+                img = Image.open(io.BytesIO(data))
+                img.load()
+                if rgba:
+                    img = img.convert("RGBA")
+                if stoerrelse:
+                    img = img.copy()
+                    img.thumbnail(stoerrelse, Image.LANCZOS)
+            except (OSError, ValueError):
+                img = None
+        with self._lock:
+            self._billeder[noegle] = img
+        return img
+
+    def png_base64(self, img):
+        """PNG som base64-streng; huskes for billeder, der lever i cachen."""
+        if img is None:
+            return ""
+        post = self._png.get(id(img))
+        if post is not None and post[0]() is img:
+            return post[1]
+        buf = io.BytesIO()
+        img.save(buf, format="PNG")
+        s = base64.b64encode(buf.getvalue()).decode("utf-8")
+        with self._lock:
+            self._png[id(img)] = (weakref.ref(img, lambda _, n=id(img): self._png.pop(n, None)), s)
+        return s
+
+    def data_uri(self, url, stoerrelse=None):
+        """data:image/png;base64-URI for url; falder tilbage til selve URL'en, hvis den ikke kan hentes."""
+        if not url:
+            return ""
+        noegle = (url, stoerrelse)
+        if noegle not in self._uris:
+            img = self.billede(url, stoerrelse)
+            uri = f"data:image/png;base64,{self.png_base64(img)}" if img is not None else None
+            with self._lock:
+                self._uris[noegle] = uri
+        return self._uris[noegle] or url
+
+    def forvarm(self, urls, data_uri=False, traade=FORVARM_TRAADE):
+        """
+        Henter urls parallelt ind i cachen (disk-hits koster kun en fillæsning).
+        data_uri=True afkoder også og bygger data-URI'en, som logo-siderne bruger.
+        Returnerer antallet af URL'er, der kunne hentes.
+        """
+        urls = list(dict.fromkeys(u for u in urls if u))
+        if not urls:
+            return 0
+        hent = self.data_uri if data_uri else self.raa
+        with ThreadPoolExecutor(max_workers=min(traade, len(urls))) as pool:
+            list(pool.map(hent, urls))
+        return sum(self._bytes.get(u) is not None for u in urls)
+
+
+@st.cache_resource
+def get_asset_cache():
+    try:
+        return AssetCache()
+    except OSError as e:
+        st.warning(f"Disk-cache for logoer deaktiveret: {e}")
+        return AssetCache(cache_dir=None)
+
+
+# --- FORVARMNING ---
+def spiller_foto_url(player_wyid):
+    """Wyscouts offentlige spillerbillede for et Wyscout-id (None hvis id mangler)."""
+    try:
+        return SPILLER_FOTO_URL.format(int(float(player_wyid)))
+    except (TypeError, ValueError):
+        return None
+
+
+def _saesonens_logoer(saeson):
+    """Alle logo-URL'er i TEAMS; sæsonens hold først, så de er klar tidligst."""
+    hold = [h for turnering in SEASON_LEAGUE_MAPPER.get(saeson, {}).values() for h in turnering]
+    navne = list(dict.fromkeys(hold + list(TEAMS)))
+    return [TEAMS[n]['logo'] for n in navne if TEAMS.get(n, {}).get('logo')]
+
+
+def _truppens_fotos():
+    """Spillerbilleder for den aktuelle trup (data/players.csv)."""
+    sti = os.path.join(os.getcwd(), "data", "players.csv")
+    try:
+        df = pd.read_csv(sti, usecols=lambda c: c.upper() in ("PLAYER_WYID", "TEAMNAME"))
+    except (OSError, ValueError):
+        return []
+    df.columns = [c.upper() for c in df.columns]
+    if "TEAMNAME" in df.columns:
+        df = df[df["TEAMNAME"].astype(str).str.contains("Hvidovre", case=False, na=False)]
+    return [u for u in map(spiller_foto_url, df.get("PLAYER_WYID", [])) if u]
+
+
+_FORVARMET = set()
+_FORVARM_LOCK = threading.Lock()
+
+
+def forvarm_assets(saeson=TOURNAMENTCALENDAR_NAME, spiller_urls=None, baggrund=True):
+    """
+    Fylder asset-cachen med logoer og truppens spillerbilleder - én gang pr. proces
+    og sæson. baggrund=True returnerer med det samme (tråden henter videre);
+    siderne venter højst på de logoer, de selv mangler.
+    """
+    with _FORVARM_LOCK:
+        if saeson in _FORVARMET:
+            return None
+        _FORVARMET.add(saeson)
+    cache = get_asset_cache()
+    fotos = _truppens_fotos() if spiller_urls is None else list(spiller_urls)
+
+    def koer():
+        cache.forvarm(_saesonens_logoer(saeson), data_uri=True)
+        cache.forvarm(fotos)
+
+    if not baggrund:
+        return koer()
+    t = threading.Thread(target=koer, name=f"forvarm-{saeson}", daemon=True)
+    t.start()
+    return t
+
+
+# --- GENVEJE BRUGT AF SIDERNE ---
+def get_logo_img(opta_uuid, stoerrelse=None):
+    """Holdets logo som PIL-billede ud fra Opta UUID (None hvis holdet ikke har et)."""
+    url = logo_url(opta_uuid)
+    return get_asset_cache().billede(url, stoerrelse) if url else None
+
+
+def get_logo_data_uri(opta_uuid, stoerrelse=None):
+    return get_asset_cache().data_uri(logo_url(opta_uuid), stoerrelse)
+
+
+def logo_fra_url(url, rgba=False):
+    """PIL-billede for en vilkårlig logo-URL (fx TEAMS[...]['logo'])."""
+    return get_asset_cache().billede(url, rgba=rgba) if url else None
+
+
+def get_base64_image(url):
+    """Data-URI for en billed-URL; tom URL giver '' og fejl giver URL'en selv (som før)."""
+    return get_asset_cache().data_uri(url)
+
+
+def logo_base64(img):
+    """Base64-PNG for et PIL-billede - genbruges for logoer fra cachen."""
+    return get_asset_cache().png_base64(img)
@@ -0,0 +1,252 @@
+# utils/figur_cache.py
+"""
+Render-cache for matplotlib/mplsoccer-figurer.
+
+Siderne byggede hele figuren (bane, KDE, hexbin, logo) og rasteriserede den igen
+ved hvert Streamlit-rerun - også når kun et urelateret widget blev ændret. Her
+adresseres en figur på sit indhold:
+  - tegnefunktionen og alle dens argumenter (DataFrames, arrays, PIL-logoer, stil)
+    hashes til et fingeraftryk; funktionens bytecode indgår, så en kodeændring
+    giver et nyt fingeraftryk
+  - PNG-bytes gemmes i hukommelsen (LRU) og på disk i .cache/figurer
+  - et hit er et opslag + st.image - der oprettes ingen figur
+Tegnefunktionen skal returnere en matplotlib-figur (eller None = intet at vise) og
+må kun afhænge af sine argumenter. Send kun de kolonner, figuren bruger - så
+hashes mindre, og urelaterede kolonner giver ikke nye fingeraftryk.
+"""
+import os
+import io
+import hashlib
+import pickle
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import streamlit as st
+import matplotlib.pyplot as plt
+from matplotlib.colors import Colormap
+from PIL import Image
+
+FIGUR_DIR = os.path.join(os.getcwd(), ".cache", "figurer")
+STANDARD_DPI = 200  # som st.pyplot
+MAKS_I_HUKOMMELSE = 256
+MAKS_PAA_DISK = 2000
+
+
+def _opdater(h, obj):
+    """Føder obj ind i hash-objektet h - rekursivt og uafhængigt af objekt-id'er."""
+    if obj is None or isinstance(obj, (bool, int, float, complex, str, bytes)):
+        h.update(f"{type(obj).__name__}:{obj!r};".encode())
+    elif isinstance(obj, pd.DataFrame):
+        h.update(b"df" + repr((list(obj.columns), [str(t) for t in obj.dtypes])).encode())
+        h.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif isinstance(obj, (pd.Series, pd.Index)):
+        h.update(f"s:{obj.name!r}:{obj.dtype};".encode())
+        h.update(pd.util.hash_pandas_object(obj, index=isinstance(obj, pd.Series)).to_numpy().tobytes())
+    elif isinstance(obj, np.ndarray):
+        h.update(f"a:{obj.dtype}:{obj.shape};".encode())
+        h.update(np.ascontiguousarray(obj).tobytes() if obj.dtype != object else pickle.dumps(obj.tolist()))
+    elif isinstance(obj, np.generic):
+        _opdater(h, obj.item())
+    elif isinstance(obj, Image.Image):
+        h.update(f"img:{obj.mode}:{obj.size};".encode())
+        h.update(obj.tobytes())
+    elif isinstance(obj, Colormap):
+        h.update(f"cmap:{obj.name};".encode())
+    elif isinstance(obj, dict):
+        h.update(f"d{len(obj)}(".encode())
+        for k, v in obj.items():
+            _opdater(h, k)
+            _opdater(h, v)
+        h.update(b")")
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        elementer = sorted(obj, key=repr) if isinstance(obj, (set, frozenset)) else obj
+        h.update(f"{type(obj).__name__}{len(obj)}(".encode())
+        for v in elementer:
+            _opdater(h, v)
+        h.update(b")")
+    elif callable(obj) and hasattr(obj, "__code__"):
+        _opdater_funktion(h, obj)
+    else:
+        # Ukendte objekter: pickle hvis muligt, ellers repr (med id -> i værste fald et miss)
+        try:
+            h.update(pickle.dumps(obj, protocol=4))
+        except Exception:
+            h.update(repr(obj).encode())
+
+
+_SIMPLE = (type(None), bool, int, float, str, bytes, tuple, list, dict, frozenset, set)
+
+
+def _opdater_funktion(h, fn, set_=None):
+    """
+    Funktionens navn, bytecode, konstanter og closure-værdier - plus de globale
+    navne, den bruger: konstanter (farver, zonegrænser ...) hashes som værdier, og
+    egne hjælpefunktioner følges rekursivt, så en ændring i fx kdeplot også giver
+    nye fingeraftryk. Biblioteker (klasser, moduler) indgår kun med navn.
+    """
+    set_ = set() if set_ is None else set_
+    code = fn.__code__
+    h.update(f"fn:{fn.__module__}.{fn.__qualname__};".encode())
+    if code in set_:
+        return
+    set_.add(code)
+    koder = [code]
+    while koder:
+        c = koder.pop()
+        h.update(c.co_code)
+        _opdater(h, tuple(k for k in c.co_consts if not hasattr(k, "co_code")))
+        koder.extend(k for k in c.co_consts if hasattr(k, "co_code"))
+        for navn in c.co_names:
+            if navn not in fn.__globals__:
+                continue
+            v = fn.__globals__[navn]
+            if isinstance(v, _SIMPLE) or isinstance(v, (np.ndarray, pd.DataFrame, pd.Series)):
+                h.update(f"g:{navn}=".encode())
+                _opdater(h, v)
+            elif callable(v) and hasattr(v, "__code__"):
+                _opdater_funktion(h, v, set_)
+    for celle in fn.__closure__ or ():
+        try:
+            v = celle.cell_contents
+        except ValueError:  # closure-variabel, der endnu ikke er sat
+            continue
+        if callable(v) and hasattr(v, "__code__"):
+            _opdater_funktion(h, v, set_)
+        else:
+            _opdater(h, v)
+
+
+def fingeraftryk(*dele) -> str:
+    """Indholdsbaseret nøgle (sha1) for en tegnefunktion og dens input."""
+    h = hashlib.sha1()
+    for d in dele:
+        _opdater(h, d)
+    return h.hexdigest()
+
+
+class FigurCache:
+    """
+    Renderede figurer (bytes) nøglet på fingeraftryk - hukommelse (LRU) + disk.
+    cache_dir=None: kun hukommelse.
+    """
+
+    def __init__(self, cache_dir=FIGUR_DIR, maks_poster=MAKS_I_HUKOMMELSE, maks_filer=MAKS_PAA_DISK):
+        self.cache_dir = cache_dir
+        self.maks_poster = maks_poster
+        self.maks_filer = maks_filer
+        self._lock = threading.Lock()
+        self._poster = OrderedDict()
+        self._skrevet = 0
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _sti(self, noegle, fmt):
+        return os.path.join(self.cache_dir, f"{noegle}.{fmt}") if self.cache_dir else None
+
+    def _husk(self, noegle, data):
+        with self._lock:
+            self._poster[noegle] = data
+            self._poster.move_to_end(noegle)
+            while len(self._poster) > self.maks_poster:
+                self._poster.popitem(last=False)
+
+    def hent(self, noegle, fmt="png"):
+        """Bytes for noegle, eller None hvis figuren ikke er renderet."""
+        with self._lock:
+            data = self._poster.get(noegle)
+            if data is not None:
+                self._poster.move_to_end(noegle)
+                return data
+        sti = self._sti(noegle, fmt)
+        if sti is None:
+            return None
+        try:
+            with open(sti, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        self._husk(noegle, data)
+        return data
+
+    def gem(self, noegle, data, fmt="png"):
+        self._husk(noegle, data)
+        sti = self._sti(noegle, fmt)
+        if sti is None:
+            return
+        tmp = f"{sti}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, sti)
+        except OSError:
+            return
+        self._skrevet += 1
+        if self._skrevet % 100 == 0:
+            self.ryd_disk()
+
+    def ryd_disk(self):
+        """Sletter de ældste filer, når disken har flere end maks_filer figurer."""
+        if not self.cache_dir:
+            return
+        try:
+            filer = [e for e in os.scandir(self.cache_dir) if e.is_file() and not e.name.endswith(".tmp")]
+        except OSError:
+            return
+        if len(filer) <= self.maks_filer:
+            return
+        filer.sort(key=lambda e: e.stat().st_mtime)
+        for e in filer[:len(filer) - self.maks_filer]:
+            try:
+                os.remove(e.path)
+            except OSError:
+                pass
+
+    def render(self, tegn, *args, fmt="png", dpi=STANDARD_DPI, savefig=None, **kwargs):
+        """
+        Bytes for tegn(*args, **kwargs) gemt som fmt ('png' eller 'svg').
+        Figuren bygges kun ved et miss og lukkes straks efter.
+        """
+        savefig = {"bbox_inches": "tight", **(savefig or {})}
+        noegle = fingeraftryk(tegn, args, kwargs, fmt, dpi, savefig)
+        data = self.hent(noegle, fmt)
+        if data is not None:
+            return data or None
+        fig = tegn(*args, **kwargs)
+        if fig is None:
+            data = b""
+        else:
+            buf = io.BytesIO()
+            try:
+                fig.savefig(buf, format=fmt, dpi=dpi, **savefig)
+            finally:
+                plt.close(fig)
+            data = buf.getvalue()
+        self.gem(noegle, data, fmt)
+        return data or None
+
+
+@st.cache_resource
+def get_figur_cache():
+    try:
+        return FigurCache()
+    except OSError as e:
+        st.warning(f"Disk-cache for figurer deaktiveret: {e}")
+        return FigurCache(cache_dir=None)
+
+
+def figur_bytes(tegn, *args, **kwargs):
+    """PNG-bytes for tegn(*args, **kwargs) fra render-cachen (None hvis tegn gav None)."""
+    return get_figur_cache().render(tegn, *args, **kwargs)
+
+
+def vis_figur(tegn, *args, **kwargs):
+    """
+    Drop-in for st.pyplot(tegn(*args, **kwargs)): viser den cachede PNG med st.image
+    (som st.pyplot: dpi 200, bbox_inches='tight', skaleret ned til kolonnens bredde).
+    Returnerer bytes (None hvis der ikke var noget at tegne).
+    """
+    data = figur_bytes(tegn, *args, **kwargs)
+    if data is not None:
+        st.image(data)
+    return data
@@ -1,23 +1,8 @@
-import streamlit as st
-import requests
-from PIL import Image
-from io import BytesIO
-from data.utils.team_mapping import TEAMS, TEAM_COLORS
+from data.utils.team_mapping import TEAM_COLORS
+from utils.assets import get_logo_img
 
-@st.cache_data(ttl=3600)
-def get_logo_img(opta_uuid):
-    """Henter holdets logo baseret på Opta UUID."""
-    if not opta_uuid: 
-        return None
-    uuid_clean = str(opta_uuid).lower().replace('t', '')
-    url = next((info['logo'] for name, info in TEAMS.items() if str(info.get('opta_uuid', '')).lower().replace('t','') == uuid_clean), None)
-    if not url: 
-        return None
-    try:
-        response = requests.get(url, timeout=5)
-        return Image.open(BytesIO(response.content))
-    except: 
-        return None
+# get_logo_img genudstilles herfra, fordi siderne importerer logoet sammen med hjælperne
+__all__ = ["get_logo_img", "get_team_color", "get_ordinal", "oversæt_qualifiers", "draw_player_info_box"]
 
 def get_team_color(team_name, color_type="primary", default="#df003b"):
     """Finder holdets farve fra TEAM_COLORS mappingen."""
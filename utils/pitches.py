@@ -1,5 +1,147 @@
-from mplsoccer import VerticalPitch, Pitch
+from functools import lru_cache
+import threading
+import numpy as np
+import matplotlib.pyplot as plt
 import matplotlib.patches as patches
+from matplotlib.artist import Artist
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.transforms import Bbox
+from mplsoccer import VerticalPitch, Pitch
+
+# --- FORHÅNDSRENDEREDE BANER ---
+# mplsoccer tegner alle linjer, buer og felter forfra for hver figur. En BaneSkabelon
+# tegner en banevariant (hel/halv, lodret/vandret, opta/meter, figurstørrelse,
+# akse-udsnit) én gang og gemmer den rasteriseret pr. dpi. En ny figur får kun en
+# tom akse med samme placering og udsnit; banen blittes ind som ét billede, når
+# figuren tegnes, og datalagene (scatter, pile, zoner, KDE) tegnes ovenpå som normalt.
+
+
+class _Baggrund(Artist):
+    """
+    Den forudrenderede bane som kunstner på aksen. Billedet lægges ved figurens
+    origo i den aktuelle dpi - også når savefig beskærer (bbox_inches='tight'),
+    fordi origo læses fra transFigure ved hver tegning.
+    """
+
+    def __init__(self, skabelon, lag, zorder):
+        super().__init__()
+        self.skabelon = skabelon
+        self.lag = lag
+        self.set_zorder(zorder)
+        self.set_clip_on(False)
+        self.set_in_layout(lag == 'fyld')
+
+    def get_window_extent(self, renderer=None):
+        # Banens egen tight-bbox, så beskæringen bliver som for en mplsoccer-tegnet bane
+        return Bbox(self.skabelon.tight).transformed(self.figure.dpi_scale_trans)
+
+    def draw(self, renderer):
+        if not self.get_visible():
+            return
+        billede = self.skabelon.raster(self.figure.dpi, self.lag)
+        x0, y0 = self.figure.transFigure.transform((0, 0))
+        gc = renderer.new_gc()
+        renderer.draw_image(gc, round(x0), round(y0), billede)
+        gc.restore()
+        self.stale = False
+
+
+class BaneSkabelon:
+    """
+    En banevariant tegnet én gang. lodret: VerticalPitch, ellers Pitch.
+    xlim/ylim: akse-udsnit (fx ylim=(55, 105) for den øverste halvdel), pitch_kw: mplsoccer-argumenter.
+    Linjer med line_zorder >= 2 lægges også som et gennemsigtigt lag over data, som i mplsoccer.
+    """
+
+    def __init__(self, lodret=False, figsize=(10, 7), xlim=None, ylim=None, **pitch_kw):
+        self.klasse = VerticalPitch if lodret else Pitch
+        self.pitch_kw = pitch_kw
+        self.xlim_ind, self.ylim_ind = xlim, ylim
+        self.pitch = self.klasse(**pitch_kw)
+        fig, ax = self._tegn(self.pitch, figsize)
+        fig.canvas.draw()
+        self.figsize = tuple(fig.get_size_inches())
+        self.facecolor = fig.get_facecolor()
+        self.position = ax.get_position().frozen()
+        self.xlim, self.ylim = ax.get_xlim(), ax.get_ylim()
+        self.aspect = ax.get_aspect()
+        self.tight = fig.get_tightbbox(fig.canvas.get_renderer()).get_points()
+        self.linjer_over_data = getattr(self.pitch, 'line_zorder', 0.9) >= 2
+        self._figurer = {'fyld': fig}
+        self._rastre = {}
+        # Skabelonen deles mellem sessionernes tråde (lru_cache), og raster() ændrer
+        # figurens dpi før tegning - set_dpi + draw + gem skal ske under samme lås
+        self._lock = threading.Lock()
+        plt.close(fig)  # figuren beholdes kun til at rasterisere fra
+
+    def _tegn(self, pitch, figsize):
+        fig, ax = pitch.draw(figsize=figsize)
+        if self.xlim_ind:
+            ax.set_xlim(*self.xlim_ind)
+        if self.ylim_ind:
+            ax.set_ylim(*self.ylim_ind)
+        return fig, ax
+
+    def _linje_figur(self):
+        """Banen uden fyldfarve og med gennemsigtig figur - kun linjerne."""
+        fig, _ = self._tegn(self.klasse(**{**self.pitch_kw, 'pitch_color': 'none'}), self.figsize)
+        fig.patch.set_alpha(0)
+        plt.close(fig)
+        return fig
+
+    def raster(self, dpi, lag='fyld'):
+        """Banen som RGBA-array (række 0 nederst, som renderer.draw_image vil have det) i den givne dpi."""
+        noegle = (round(float(dpi), 3), lag)
+        billede = self._rastre.get(noegle)
+        if billede is not None:
+            return billede
+        with self._lock:
+            if noegle not in self._rastre:
+                if lag not in self._figurer:
+                    self._figurer[lag] = self._linje_figur()
+                fig = self._figurer[lag]
+                fig.set_dpi(dpi)
+                canvas = FigureCanvasAgg(fig)  # figuren er lukket i pyplot - tegn direkte med Agg
+                canvas.draw()
+                self._rastre[noegle] = np.asarray(canvas.buffer_rgba())[::-1].copy()
+            return self._rastre[noegle]
+
+    def ny(self):
+        """(pitch, fig, ax) som pitch.draw(), men med banen som forudrenderet baggrund."""
+        fig = plt.figure(figsize=self.figsize, facecolor=self.facecolor)
+        ax = fig.add_axes(self.position)
+        ax.set_xlim(self.xlim)
+        ax.set_ylim(self.ylim)
+        ax.set_aspect(self.aspect)
+        ax.axis('off')
+        ax.add_artist(_Baggrund(self, 'fyld', zorder=-10))
+        if self.linjer_over_data:
+            ax.add_artist(_Baggrund(self, 'linjer', zorder=self.pitch.line_zorder))
+        return self.pitch, fig, ax
+
+
+def _hashbar(v):
+    return tuple(v) if isinstance(v, list) else v
+
+
+@lru_cache(maxsize=64)
+def _skabelon(noegle):
+    return BaneSkabelon(**dict(noegle))
+
+
+def bane_skabelon(**variant) -> BaneSkabelon:
+    """BaneSkabelon for variant (samme argumenter som BaneSkabelon); tegnes én gang pr. proces."""
+    return _skabelon(tuple(sorted((k, _hashbar(v)) for k, v in variant.items())))
+
+
+def ny_bane(**variant):
+    """
+    Drop-in for Pitch(**kw).draw(figsize=...): returnerer (pitch, fig, ax) med en
+    forudrenderet bane. Fx ny_bane(lodret=True, half=True, pitch_type='opta', figsize=(5, 7)).
+    Akse-udsnittet er en del af varianten (xlim/ylim) - sæt det ikke bagefter.
+    """
+    return bane_skabelon(**variant).ny()
+
 
 def get_boundaries():
     """
@@ -32,20 +174,17 @@ def get_pitch(type="staaende", zone_boundaries=None, zone_data=None, t_color="#c
     Kan automatisk tegne zoner ind, hvis zone_boundaries medsendes.
     """
     if type == "liggende":
-        pitch = Pitch(pitch_type='custom', pitch_length=105, pitch_width=68, 
-                      pitch_color='#ffffff', line_color='#cccccc', orientation='horizontal')
-        fig, ax = pitch.draw(figsize=(10, 7))
-        
+        pitch, fig, ax = ny_bane(pitch_type='custom', pitch_length=105, pitch_width=68,
+                                 pitch_color='#ffffff', line_color='#cccccc', figsize=(10, 7))
+
     elif type == "halv":
-        pitch = VerticalPitch(pitch_type='custom', pitch_length=105, pitch_width=68, 
-                              pitch_color='#ffffff', line_color='#cccccc')
-        fig, ax = pitch.draw(figsize=(8, 10))
-        ax.set_ylim(55, 105) # Viser fra midterlinjen og op
-        
+        # Viser fra midterlinjen og op
+        pitch, fig, ax = ny_bane(lodret=True, pitch_type='custom', pitch_length=105, pitch_width=68,
+                                 pitch_color='#ffffff', line_color='#cccccc', figsize=(8, 10), ylim=(55, 105))
+
     else:
-        pitch = VerticalPitch(pitch_type='custom', pitch_length=105, pitch_width=68, 
-                              pitch_color='#ffffff', line_color='#cccccc')
-        fig, ax = pitch.draw(figsize=(7, 10))
+        pitch, fig, ax = ny_bane(lodret=True, pitch_type='custom', pitch_length=105, pitch_width=68,
+                                 pitch_color='#ffffff', line_color='#cccccc', figsize=(7, 10))
 
     # Hvis zoner er medsendt, tegnes de automatisk op
     if zone_boundaries:
@@ -116,15 +255,12 @@ def get_lines(type="staaende", t_color="#cc0000"):
     ]
 
     if type == "halv":
-        pitch = VerticalPitch(pitch_type='custom', pitch_length=105, pitch_width=68, 
-                              pitch_color='#ffffff', line_color='#cccccc')
-        fig, ax = pitch.draw(figsize=(8, 10))
-        ax.set_ylim(55, 105)
+        pitch, fig, ax = ny_bane(lodret=True, pitch_type='custom', pitch_length=105, pitch_width=68,
+                                 pitch_color='#ffffff', line_color='#cccccc', figsize=(8, 10), ylim=(55, 105))
         y_min, y_max = 55, 105
     else:
-        pitch = VerticalPitch(pitch_type='custom', pitch_length=105, pitch_width=68, 
-                              pitch_color='#ffffff', line_color='#cccccc')
-        fig, ax = pitch.draw(figsize=(7, 10))
+        pitch, fig, ax = ny_bane(lodret=True, pitch_type='custom', pitch_length=105, pitch_width=68,
+                                 pitch_color='#ffffff', line_color='#cccccc', figsize=(7, 10))
         y_min, y_max = 0, 105
 
     # Tegn de 5 vertikale zoner op
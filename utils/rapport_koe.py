@@ -0,0 +1,233 @@
+# utils/rapport_koe.py
+"""
+Jobkø for tunge rapporter (PDF), der bygges i en baggrundsproces.
+
+Modstanderrapporten blev bygget inde i sidens kørsel - alle zonefigurer plus
+reportlab - ved hvert rerun, og sessionen var låst, mens det stod på. Her:
+  - et job bestilles med en nøgle (hold, sæson og et fingeraftryk af data/filtre)
+  - det bygges i en worker-proces; Streamlit-processen kører tråde, så der
+    bruges 'spawn' og ikke fork
+  - workeren melder fremskridt i en lille statusfil, som siden læser ved hvert poll
+  - den færdige fil gemmes på disk i .cache/rapporter, så samme nøgle igen (også
+    efter en genstart) er et opslag
+Byggefunktionen skal ligge på modulniveau (den pickles som reference), tage
+fremskridt=callback(andel, tekst) og returnere filens bytes.
+"""
+import os
+import json
+import tempfile
+import threading
+import multiprocessing as mp
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import streamlit as st
+
+RAPPORT_DIR = os.path.join(os.getcwd(), ".cache", "rapporter")
+RAPPORT_WORKERS = 1
+MAKS_PAA_DISK = 100
+MAKS_JOBS = 32
+POLL_SEKUNDER = 1.0
+
+VENTER, KOERER, FAERDIG, FEJL = "venter", "kører", "færdig", "fejl"
+
+
+def _gem(sti, data):
+    """Atomisk skrivning (bytes), så en halvt skrevet fil aldrig læses."""
+    tmp = f"{sti}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, sti)
+    except OSError:
+        pass
+
+
+def _koer_job(byg, args, kwargs, status_sti):
+    """Kører i workeren: bygger filen og skriver fremskridt til statusfilen."""
+    def fremskridt(andel, tekst=""):
+        _gem(status_sti, json.dumps({"andel": float(andel), "tekst": tekst}).encode("utf-8"))
+
+    fremskridt(0.0, "Starter")
+    return byg(*args, fremskridt=fremskridt, **kwargs)
+
+
+class RapportJob:
+    """Ét bestilt job. tilstand: venter/kører/færdig/fejl; andel og tekst er seneste fremskridt."""
+
+    def __init__(self, noegle, status_sti, future=None, data=None):
+        self.noegle = noegle
+        self.status_sti = status_sti
+        self.future = future
+        self.data = data
+        self.fejl = None
+        self.andel, self.tekst = (1.0, "Færdig") if data is not None else (0.0, "I kø")
+
+    @property
+    def tilstand(self):
+        if self.data is not None:
+            return FAERDIG
+        if self.fejl is not None:
+            return FEJL
+        # Et future, der er færdigt men endnu ikke gemt, tæller som kørende
+        return KOERER if self.future is not None and (self.future.running() or self.future.done()) else VENTER
+
+    @property
+    def aktiv(self):
+        return self.tilstand in (VENTER, KOERER)
+
+    def opdater(self):
+        """Læser workerens seneste fremskridt (kun mens jobbet kører)."""
+        if self.tilstand != KOERER:
+            return self
+        try:
+            with open(self.status_sti, encoding="utf-8") as f:
+                status = json.load(f)
+            self.andel, self.tekst = min(max(status["andel"], 0.0), 1.0), status.get("tekst", "")
+        except (OSError, ValueError, KeyError):
+            pass
+        return self
+
+
+class RapportKoe:
+    """
+    Jobs nøglet på en streng (fx et fingeraftryk). Færdige filer ligger i
+    hukommelsen (de seneste MAKS_JOBS) og på disk i cache_dir.
+    """
+
+    def __init__(self, cache_dir=RAPPORT_DIR, workers=RAPPORT_WORKERS, maks_filer=MAKS_PAA_DISK):
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self.maks_filer = maks_filer
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()
+        self._pool = None
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _sti(self, noegle, endelse):
+        return os.path.join(self.cache_dir, f"{noegle}.{endelse}")
+
+    def _hent_pool(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=mp.get_context("spawn"))
+        return self._pool
+
+    def _husk(self, job):
+        self._jobs[job.noegle] = job
+        self._jobs.move_to_end(job.noegle)
+        while len(self._jobs) > MAKS_JOBS:
+            gammel = next((n for n, j in self._jobs.items() if not j.aktiv), None)
+            if gammel is None:
+                break
+            self._jobs.pop(gammel)
+
+    def job(self, noegle, endelse="pdf"):
+        """Jobbet for noegle (også et færdigt fra disken), eller None hvis det ikke er bestilt."""
+        with self._lock:
+            job = self._jobs.get(noegle)
+        if job is not None:
+            return job.opdater()
+        try:
+            with open(self._sti(noegle, endelse), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        job = RapportJob(noegle, None, data=data)
+        with self._lock:
+            self._husk(job)
+        return job
+
+    def bestil(self, noegle, byg, *args, endelse="pdf", **kwargs):
+        """
+        Sætter byg(*args, fremskridt=..., **kwargs) i kø, hvis noegle ikke allerede er
+        bygget eller i gang. Et fejlet job bestilles forfra.
+        """
+        job = self.job(noegle, endelse)
+        if job is not None and job.tilstand != FEJL:
+            return job
+        status_sti = self._sti(noegle, "status")
+        with self._lock:
+            try:
+                future = self._hent_pool().submit(_koer_job, byg, args, kwargs, status_sti)
+            except BrokenProcessPool:
+                # En worker er død (fx løbet tør for hukommelse) - start en ny pulje
+                self._pool = None
+                future = self._hent_pool().submit(_koer_job, byg, args, kwargs, status_sti)
+            job = RapportJob(noegle, status_sti, future=future)
+            self._husk(job)
+        future.add_done_callback(lambda f, j=job, e=endelse: self._faerdig(j, f, e))
+        return job
+
+    def _faerdig(self, job, future, endelse):
+        try:
+            os.remove(job.status_sti)
+        except OSError:
+            pass
+        try:
+            data = future.result()
+        except Exception as e:
+            job.fejl = f"{type(e).__name__}: {e}"
+            return
+        sti = self._sti(job.noegle, endelse)
+        _gem(sti, data)
+        job.data = data
+        job.andel, job.tekst = 1.0, "Færdig"
+        self.ryd_disk()
+
+    def ryd_disk(self):
+        """Sletter de ældste rapporter, når der ligger flere end maks_filer."""
+        try:
+            filer = [e for e in os.scandir(self.cache_dir) if e.is_file() and not e.name.endswith((".tmp", ".status"))]
+        except OSError:
+            return
+        if len(filer) <= self.maks_filer:
+            return
+        filer.sort(key=lambda e: e.stat().st_mtime)
+        for e in filer[:len(filer) - self.maks_filer]:
+            try:
+                os.remove(e.path)
+            except OSError:
+                pass
+
+
+@st.cache_resource
+def get_rapport_koe():
+    try:
+        return RapportKoe()
+    except OSError as e:
+        st.warning(f"Rapporter gemmes kun midlertidigt: {e}")
+        return RapportKoe(cache_dir=tempfile.mkdtemp(prefix="rapporter-"))
+
+
+def vis_rapport_job(noegle, byg, *args, filnavn, knap_tekst="Generér PDF-rapport",
+                    mime="application/pdf", key="rapport", **kwargs):
+    """
+    Knap -> job i baggrunden -> fremskridtslinje -> download-knap. Kun dette panel
+    genkøres (st.fragment), mens jobbet kører, så resten af siden kan bruges imens.
+    En rapport med samme nøgle er klar med det samme.
+    """
+    koe = get_rapport_koe()
+    endelse = filnavn.rsplit(".", 1)[-1]
+    job = koe.job(noegle, endelse)
+
+    @st.fragment(run_every=POLL_SEKUNDER if job is not None and job.aktiv else None)
+    def panel():
+        job = koe.job(noegle, endelse)
+        if job is None or job.tilstand == FEJL:
+            if job is not None:
+                st.error(f"Rapporten kunne ikke bygges ({job.fejl}).")
+            if st.button(knap_tekst if job is None else "Prøv igen", key=f"{key}_bestil"):
+                koe.bestil(noegle, byg, *args, endelse=endelse, **kwargs)
+                st.rerun()
+        elif job.aktiv:
+            st.progress(job.andel, text=f"Bygger rapporten: {job.tekst}" if job.tilstand == KOERER else "Rapporten er i kø")
+        else:
+            st.download_button(knap_tekst.replace("Generér", "Download"), data=job.data,
+                               file_name=filnavn, mime=mime, key=f"{key}_download")
+            if st.session_state.get(f"{key}_poller"):
+                # Jobbet blev færdigt under et poll - genkør hele siden, så pollingen stopper
+                st.session_state[f"{key}_poller"] = False
+                st.rerun()
+        st.session_state[f"{key}_poller"] = job is not None and job.aktiv
+
+    panel()
@@ -0,0 +1,186 @@
+"""
+Hurtig tætheds-renderer (binned KDE) til heatmaps og mplsoccer-baner.
+
+seaborn/mplsoccer's kdeplot evaluerer scipy's gaussian_kde i hvert gitterpunkt for
+hvert datapunkt - O(punkter x gitter) - og derfor blev data samplet ned. Her:
+  - punkterne fordeles lineært (bilineært) på gitterets knuder: O(punkter)
+  - kernen er scipy's Scott-kovarians (fuld 2x2, samme båndbredde som seaborn)
+  - tætheden er én FFT-foldning af gitteret med kernen: O(gitter log gitter)
+  - niveauerne er seaborn's iso-andels-niveauer (levels/thresh betyder det samme)
+Resultatet ligner seaborn's kdeplot, men prisen er stort set uafhængig af antallet
+af events - en hel sæson tegnes på samme tid som en enkelt kamp.
+
+kdeplot(pitch, x, y, ax=ax, ...) er en drop-in for pitch.kdeplot(x, y, ax=ax, ...).
+"""
+from numbers import Number
+import numpy as np
+
+KDE_MOTOR = 'binned'  # 'seaborn' giver den gamle pitch.kdeplot
+
+
+def scott_kovarians(x, y, antal=None, bw_adjust=1.0):
+    """
+    Kernens kovarians som scipy.stats.gaussian_kde (Scotts regel: n^(-1/6) pr. akse).
+    antal: hyppighedsvægte, fx tællinger pr. gittercelle. Returnerer (kovarians, n).
+    """
+    fw = None if antal is None else np.asarray(antal).astype(np.int64)
+    n = len(x) if fw is None else int(fw.sum())
+    kov = np.cov(np.vstack([x, y]), fweights=fw)
+    return kov * (n ** (-1 / 6) * bw_adjust) ** 2, n
+
+
+def _gauss_kerne(kov, dx, dy, rx, ry):
+    """2D Gauss-tæthed (pr. arealenhed) i gitter-offsets -rx..rx, -ry..ry."""
+    u = np.arange(-rx, rx + 1) * dx
+    v = np.arange(-ry, ry + 1) * dy
+    U, V = np.meshgrid(u, v)
+    inv = np.linalg.inv(kov)
+    q = inv[0, 0] * U ** 2 + 2 * inv[0, 1] * U * V + inv[1, 1] * V ** 2
+    return np.exp(-0.5 * q) / (2 * np.pi * np.sqrt(np.linalg.det(kov)))
+
+
+def fft_foldning(B: np.ndarray, K: np.ndarray) -> np.ndarray:
+    """Lineær foldning af B med en centreret kerne K via rfft2; samme form som B."""
+    ry, rx = K.shape[0] // 2, K.shape[1] // 2
+    form = (B.shape[0] + K.shape[0] - 1, B.shape[1] + K.shape[1] - 1)
+    ud = np.fft.irfft2(np.fft.rfft2(B, form) * np.fft.rfft2(K, form), form)
+    return ud[ry:ry + B.shape[0], rx:rx + B.shape[1]]
+
+
+def lineaer_binning(x, y, x0, dx, nx, y0, dy, ny, vaegte=None) -> np.ndarray:
+    """Bilineær fordeling af punkterne på knuderne x0 + i*dx, y0 + j*dy. Form (ny, nx)."""
+    u = (x - x0) / dx
+    v = (y - y0) / dy
+    i = np.clip(np.floor(u).astype(np.int64), 0, nx - 2)
+    j = np.clip(np.floor(v).astype(np.int64), 0, ny - 2)
+    fu, fv = u - i, v - j
+    w = np.ones(len(x)) if vaegte is None else np.asarray(vaegte, dtype=float)
+    B = np.zeros(ny * nx)
+    for di, dj, vaegt in ((0, 0, (1 - fu) * (1 - fv)), (1, 0, fu * (1 - fv)), (0, 1, (1 - fu) * fv), (1, 1, fu * fv)):
+        B += np.bincount((j + dj) * nx + (i + di), weights=w * vaegt, minlength=ny * nx)
+    return B.reshape(ny, nx)
+
+
+def _kerne_radius(kov, dx, dy, nx, ny):
+    """Kernen afskæres ved 4 spredninger (og er aldrig bredere end gitteret)."""
+    rx = min(int(np.ceil(4 * np.sqrt(kov[0, 0]) / dx)), nx - 1)
+    ry = min(int(np.ceil(4 * np.sqrt(kov[1, 1]) / dy)), ny - 1)
+    return max(rx, 1), max(ry, 1)
+
+
+def binned_kde(x, y, clip=None, gridsize=200, cut=3, bw_adjust=1.0, vaegte=None):
+    """
+    Tæthed på et gridsize x gridsize-gitter som seaborn's bivariate KDE
+    (støtte = data +/- cut*båndbredde, klippet til clip=((x_min, x_max), (y_min, y_max))).
+    Returnerer (xx, yy, Z) med Z i form (len(yy), len(xx)), eller None ved for lidt data.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    ok = np.isfinite(x) & np.isfinite(y)
+    if vaegte is not None:
+        vaegte = np.asarray(vaegte, dtype=float)[ok]
+    x, y = x[ok], y[ok]
+    if len(x) < 2:
+        return None
+
+    if vaegte is None:
+        kov, _ = scott_kovarians(x, y, bw_adjust=bw_adjust)
+    else:
+        kov, _ = _vaegtet_kovarians(x, y, vaegte, bw_adjust)
+    if not np.all(np.isfinite(kov)) or np.linalg.det(kov) <= 0:
+        return None
+
+    akser = []
+    for akse, v, bw in ((0, x, np.sqrt(kov[0, 0])), (1, y, np.sqrt(kov[1, 1]))):
+        lo, hi = v.min() - bw * cut, v.max() + bw * cut
+        c_lo, c_hi = (lo, hi) if clip is None or clip[akse] is None else sorted(clip[akse])
+        c_lo, c_hi = max(lo, c_lo), min(hi, c_hi)
+        d = (c_hi - c_lo) / (gridsize - 1)
+        # Binning-gitteret forlænges, så punkter uden for den klippede støtte stadig tæller med
+        foer = int(np.ceil((c_lo - lo) / d)) if d > 0 else 0
+        efter = int(np.ceil((hi - c_hi) / d)) if d > 0 else 0
+        akser.append((c_lo - foer * d, d, foer + gridsize + efter, foer))
+    (x0, dx, nx, fx), (y0, dy, ny, fy) = akser
+    if dx <= 0 or dy <= 0:
+        return None
+
+    B = lineaer_binning(x, y, x0, dx, nx, y0, dy, ny, vaegte)
+    rx, ry = _kerne_radius(kov, dx, dy, nx, ny)
+    Z = fft_foldning(B, _gauss_kerne(kov, dx, dy, rx, ry)) / B.sum()
+    Z = np.maximum(Z[fy:fy + gridsize, fx:fx + gridsize], 0)
+    xx = x0 + (fx + np.arange(gridsize)) * dx
+    yy = y0 + (fy + np.arange(gridsize)) * dy
+    return xx, yy, Z
+
+
+def _vaegtet_kovarians(x, y, vaegte, bw_adjust):
+    """Som gaussian_kde med weights: n_eff = (sum w)^2 / sum w^2."""
+    w = vaegte / vaegte.sum()
+    n_eff = 1 / np.sum(w ** 2)
+    kov = np.cov(np.vstack([x, y]), aweights=w, bias=False)
+    return kov * (n_eff ** (-1 / 6) * bw_adjust) ** 2, n_eff
+
+
+def kde_fra_gitter(H: np.ndarray, xc, yc, bw_adjust=1.0) -> np.ndarray:
+    """
+    Tæthed direkte fra et forhåndstalt gitter (fx RumGitter.sum): tællingerne er
+    binningen, og kernen er Scott-kovariansen beregnet fra gitterets egne momenter.
+    """
+    n = H.sum()
+    if n <= 1:
+        return np.zeros_like(H, dtype=float)
+    X, Y = np.meshgrid(xc, yc)
+    valgt = H.ravel() > 0
+    kov, _ = scott_kovarians(X.ravel()[valgt], Y.ravel()[valgt], H.ravel()[valgt], bw_adjust)
+    dx, dy = xc[1] - xc[0], yc[1] - yc[0]
+    # Celle-kvantiseringen giver ingen rigtig spredning - sørg for en kerne på mindst en halv celle
+    kov = kov + np.diag([(dx / 2) ** 2, (dy / 2) ** 2]) * (np.linalg.det(kov) <= 0)
+    rx, ry = _kerne_radius(kov, dx, dy, H.shape[1], H.shape[0])
+    return np.maximum(fft_foldning(H.astype(float), _gauss_kerne(kov, dx, dy, rx, ry)) / n, 0)
+
+
+def iso_niveauer(Z: np.ndarray, levels=10, thresh=0.05) -> np.ndarray:
+    """
+    seaborn's iso-andels-niveauer: niveau k omslutter andelen 1 - q_k af massen.
+    levels: antal eller en liste af andele i [0, 1]. Stigende og unikke (klar til contour).
+    """
+    kvantiler = np.linspace(thresh or 0, 1, levels) if isinstance(levels, Number) else np.asarray(levels)
+    vaerdier = np.sort(Z.ravel())[::-1]
+    if vaerdier.sum() <= 0:
+        return np.array([])
+    andel = np.cumsum(vaerdier) / vaerdier.sum()
+    return np.unique(np.take(vaerdier, np.searchsorted(andel, 1 - kvantiler), mode='clip'))
+
+
+def tegn_taethed(ax, xx, yy, Z, levels=10, thresh=0.05, fill=False, **contour_kws):
+    """Tegner Z som seaborn's kdeplot (contour/contourf på iso-andels-niveauer)."""
+    niveauer = iso_niveauer(Z, levels, thresh)
+    if len(niveauer) < 2:
+        return None
+    contour_kws.pop('label', None)
+    tegn = ax.contourf if fill else ax.contour
+    return tegn(xx, yy, Z, levels=niveauer, **contour_kws)
+
+
+def kdeplot(pitch, x, y, ax=None, levels=10, thresh=0.05, fill=False, gridsize=200, cut=3,
+            bw_adjust=1, weights=None, motor=None, **contour_kws):
+    """
+    Drop-in for pitch.kdeplot(x, y, ax=ax, ...): vender koordinaterne på lodrette
+    baner og klipper til banen som mplsoccer, men tegner med binned_kde.
+    motor='seaborn' (eller KDE_MOTOR) bruger mplsoccer/seaborn som før.
+    """
+    if (motor or KDE_MOTOR) == 'seaborn':
+        return pitch.kdeplot(x, y, ax=ax, levels=levels, thresh=thresh, fill=fill, gridsize=gridsize,
+                             cut=cut, bw_adjust=bw_adjust, weights=weights, **contour_kws)
+
+    x = np.ravel(np.asarray(x, dtype=float))
+    y = np.ravel(np.asarray(y, dtype=float))
+    if x.size != y.size:
+        raise ValueError("x and y must be the same size")
+    if pitch.vertical:
+        x, y = y, x
+
+    res = binned_kde(x, y, clip=pitch.kde_clip, gridsize=gridsize, cut=cut, bw_adjust=bw_adjust, vaegte=weights)
+    if res is None:
+        return None
+    return tegn_taethed(ax, *res, levels=levels, thresh=thresh, fill=fill, **contour_kws)
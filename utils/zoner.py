@@ -0,0 +1,122 @@
+"""
+Vektoriseret zone-tildeling for banekoordinater.
+
+Skud-, assist- og målzone-siderne havde hver sin map_to_zone/find_zone, der blev
+kørt række for række med df.apply og løb hele ZONE_BOUNDARIES igennem pr. skud.
+Her kompileres en zone-definition én gang til et opslagsgitter:
+  - alle zonekanter på hver akse samles i et sorteret kant-array
+  - hver akse deles i "slots": åbne intervaller mellem kanterne plus selve kanterne,
+    så punkter præcis på en kant får samme zone som før (første zone i dict-rækkefølgen)
+  - en tabel slot-x * slot-y -> zone-kode udfyldes med den gamle første-match-regel
+Tildelingen er derefter to np.digitize-kald og ét tabelopslag for hele arrayet.
+
+Koordinatsystemer:
+  - 'opta': 0-100 på begge akser (også Wyscout-skalaen)
+  - 'meter': 105 x 68 meter, som get_pitch/get_boundaries
+Zonerne beskrives som i get_boundaries: y er banens længde, x er bredden.
+"""
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+OPTA = 'opta'
+METER = 'meter'
+BANE_LAENGDE, BANE_BREDDE = 105.0, 68.0
+
+
+def _graenser(b):
+    """(y_min, y_max, x_min, x_max) for både {'y_min': ...} og {'y': (min, max), 'x': (...)}."""
+    if 'y_min' in b:
+        return b['y_min'], b['y_max'], b['x_min'], b['x_max']
+    return b['y'][0], b['y'][1], b['x'][0], b['x'][1]
+
+
+def konverter(laengde, bredde, fra=OPTA, til=METER):
+    """Omregner koordinat-arrays mellem 'opta' (0-100) og 'meter' (105 x 68)."""
+    laengde = np.asarray(laengde, dtype=float)
+    bredde = np.asarray(bredde, dtype=float)
+    if fra == til:
+        return laengde, bredde
+    if fra == OPTA and til == METER:
+        return laengde * (BANE_LAENGDE / 100), bredde * (BANE_BREDDE / 100)
+    if fra == METER and til == OPTA:
+        return laengde * (100 / BANE_LAENGDE), bredde * (100 / BANE_BREDDE)
+    raise ValueError(f"Ukendt koordinatsystem: {fra} -> {til}")
+
+
+def _slots(kanter: np.ndarray, v: np.ndarray) -> np.ndarray:
+    """
+    Slot pr. værdi: 2i+1 præcis på kant i, 2i i det åbne interval før kant i
+    (0 = under første kant, 2n = over sidste). NaN lander over sidste kant.
+    """
+    i = np.digitize(v, kanter, right=True)
+    paa_kant = np.zeros(len(v), dtype=bool)
+    inde = i < len(kanter)
+    paa_kant[inde] = kanter[i[inde]] == v[inde]
+    return 2 * i + paa_kant
+
+
+def _repraesentanter(kanter: np.ndarray) -> np.ndarray:
+    """Én værdi pr. slot, som ligger i slottet - bruges til at udfylde tabellen."""
+    ud = np.empty(2 * len(kanter) + 1)
+    ud[1::2] = kanter
+    ud[2:-1:2] = (kanter[:-1] + kanter[1:]) / 2
+    ud[0], ud[-1] = kanter[0] - 1, kanter[-1] + 1
+    return ud
+
+
+class ZoneGitter:
+    """
+    Kompileret zone-definition.
+    boundaries: {zone: grænser} i systemet `system`; overlap afgøres af dict-rækkefølgen
+    (første zone, der rammer med <= i begge ender, vinder - som de gamle løkker).
+    fallback: zonen for punkter uden for alle zoner (og NaN).
+    """
+
+    def __init__(self, boundaries: dict, system=METER, fallback="Zone 8"):
+        self.system = system
+        self.fallback = fallback
+        self.boundaries = boundaries
+        self.navne = np.array(list(boundaries) + [fallback], dtype=object)
+
+        g = np.array([_graenser(b) for b in boundaries.values()], dtype=float).reshape(-1, 4)
+        self._y_kanter = np.unique(g[:, :2]) if len(g) else np.zeros(1)
+        self._x_kanter = np.unique(g[:, 2:]) if len(g) else np.zeros(1)
+
+        ry = _repraesentanter(self._y_kanter)[:, None, None]
+        rx = _repraesentanter(self._x_kanter)[None, :, None]
+        rammer = (g[:, 0] <= ry) & (ry <= g[:, 1]) & (g[:, 2] <= rx) & (rx <= g[:, 3])
+        # Første ramte zone pr. celle; ingen ramt -> fallback (sidste navn)
+        self._tabel = np.where(rammer.any(axis=2), rammer.argmax(axis=2), len(boundaries))
+
+    def koder(self, laengde, bredde, system=None) -> np.ndarray:
+        """Zone-kode pr. punkt (indeks i self.navne)."""
+        laengde, bredde = konverter(laengde, bredde, system or self.system, self.system)
+        return self._tabel[_slots(self._y_kanter, laengde.ravel()), _slots(self._x_kanter, bredde.ravel())]
+
+    def tildel(self, laengde, bredde, system=None) -> np.ndarray:
+        """Zonenavn pr. punkt. laengde/bredde er arrays i `system` (standard: gitterets eget)."""
+        return self.navne[self.koder(laengde, bredde, system)]
+
+
+@lru_cache(maxsize=32)
+def _kompiler(noegle, system, fallback):
+    return ZoneGitter({navn: dict(b) for navn, b in noegle}, system, fallback)
+
+
+def zone_gitter(boundaries: dict, system=METER, fallback="Zone 8") -> ZoneGitter:
+    """ZoneGitter for boundaries; samme definition kompileres kun én gang pr. proces."""
+    noegle = tuple((navn, tuple(sorted(b.items()))) for navn, b in boundaries.items())
+    return _kompiler(noegle, system, fallback)
+
+
+def tildel_zoner(df: pd.DataFrame, laengde_col, bredde_col, boundaries: dict,
+                 system=METER, data_system=OPTA, fallback="Zone 8") -> pd.Series:
+    """
+    Zone pr. række i df ud fra to koordinatkolonner.
+    system: systemet boundaries er angivet i, data_system: kolonnernes system.
+    """
+    gitter = zone_gitter(boundaries, system, fallback)
+    laengde = pd.to_numeric(df[laengde_col], errors='coerce').to_numpy(dtype=float)
+    bredde = pd.to_numeric(df[bredde_col], errors='coerce').to_numpy(dtype=float)
+    return pd.Series(gitter.tildel(laengde, bredde, data_system), index=df.index)